@@ -1,8 +1,25 @@
-from openai import OpenAI
+# Importing this module does no I/O and loads neither the OpenAI SDK, the
+# risk store nor asyncio: the client is built on first use (get_client), the
+# loan tools are imported on the first tool call, asyncio only by the async
+# runtime, and warmup() does the first two ahead of time.
+
 import json
+import logging
 import os
-from dotenv import load_dotenv 
-from app.tools.loan_tools import get_customer_loan_eligibility
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+from app.agent.intent import FAST_PATH_STATS, extract_intent, render_answer
+from app.core import instrumentation
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
 
 TOOLS = [
     {
@@ -24,73 +41,551 @@ TOOLS = [
             "required": ["customer_id", "loan_amount"],
             "additionalProperties": False
         }
+    },
+    {
+        "type": "function",
+        "name": "get_customer_loan_eligibility_batch",
+        "description": "Evaluate loan eligibility for several customers and/or loan amounts in one call. Prefer this whenever a question involves more than one customer or amount.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "requests": {
+                    "type": "array",
+                    "description": "One entry per (customer, loan amount) pair to evaluate",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "customer_id": {
+                                "type": "string",
+                                "description": "Unique identifier of the customer"
+                            },
+                            "loan_amount": {
+                                "type": "number",
+                                "description": "Requested loan amount"
+                            }
+                        },
+                        "required": ["customer_id", "loan_amount"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["requests"],
+            "additionalProperties": False
+        }
     }
 ]
 
+def _loan_tools():
+    # Imported on first use: it pulls in NumPy and the risk store.
+    from app.tools import loan_tools
+    return loan_tools
+
+
+TOOL_HANDLERS = {
+    "get_customer_loan_eligibility": lambda args: _loan_tools().get_customer_loan_eligibility(
+        args.get("customer_id"), args.get("loan_amount")
+    ),
+    "get_customer_loan_eligibility_batch": lambda args: _loan_tools().get_customer_loan_eligibility_batch(
+        args.get("requests", [])
+    ),
+}
+
+# Upper bound on tool calls executed at the same time for one response.
+MAX_PARALLEL_TOOL_CALLS = 8
+
+MODEL = "gpt-4.1-mini"
+
+# Answer single, well-formed eligibility questions without the LLM (see
+# app/agent/intent.py). AGENT_FAST_PATH=0 sends everything to the LLM.
+FAST_PATH_ENABLED = os.getenv("AGENT_FAST_PATH", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# The OpenAI client; None until get_client() builds it. Assign a client here
+# (e.g. one pointed at the stub server) to use that one instead.
+client: Optional["OpenAI"] = None
+_CLIENT_LOCK = threading.Lock()
+_ENV_LOADED = False
+
+
+def check_api_key():
+    """
+    Loads .env and prints whether OPENAI_API_KEY looks usable.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    api_key = os.getenv('OPENAI_API_KEY')
+
+    if not api_key:
+        print("No API key was found - please head over to the troubleshooting notebook in this folder to identify & fix!")
+    elif not api_key.startswith("sk-proj-"):
+        print("An API key was found, but it doesn't start sk-proj-; please check you're using the right key - see troubleshooting notebook")
+    elif api_key.strip() != api_key:
+        print("An API key was found, but it looks like it might have space or tab characters at the start or end - please remove them - see troubleshooting notebook")
+    else:
+        print("API key found and looks good so far!")
+
+
+def _load_env():
+    # .env may also configure OPENAI_BASE_URL etc.; load it once, before
+    # the first client is built.
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        _ENV_LOADED = True
+        check_api_key()
+
+
+def get_client() -> "OpenAI":
+    """
+    The shared OpenAI client, built (after check_api_key) on first use.
+    """
+    global client
+    if client is None:
+        with _CLIENT_LOCK:
+            if client is None:
+                _load_env()
+                from openai import OpenAI
+
+                #i want to use the local model that i have running on my machine, so i will set the base url to localhost:8000
+                # client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
+                client = OpenAI()
+    return client
+
+
+_PRELOAD: Optional[Future] = None
+_PRELOAD_LOCK = threading.Lock()
+
+
+def preload_risk_store() -> Future:
+    """
+    Loads the risk store on a daemon thread unless it is loaded or loading;
+    returns a Future of the store. Lookups made meanwhile wait for the same
+    load (risk_store loads are single-flight).
+    """
+    global _PRELOAD
+    with _PRELOAD_LOCK:
+        if _PRELOAD is not None and not _PRELOAD.done():
+            return _PRELOAD
+        risk_store = sys.modules.get("app.core.risk_store")
+        if risk_store is not None and risk_store.RISK_CACHE is not None:
+            future = Future()
+            future.set_result(risk_store.RISK_CACHE)
+            return future
+        future = _PRELOAD = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            _loan_tools()
+            from app.core import risk_store
+            future.set_result(risk_store.load_and_precompute())
+        except BaseException as e:
+            # Kept on the future; the next lookup retries the load itself.
+            logger.warning("Risk store preload failed: %s: %s", type(e).__name__, e)
+            instrumentation.inc("agent_preload_errors_total")
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="risk-store-preload", daemon=True).start()
+    return future
+
+
+def warmup(preload_store: bool = True) -> Optional[Future]:
+    """
+    Builds the OpenAI client now and, with preload_store, starts loading the
+    risk store in the background (see preload_risk_store), so the first
+    question pays for neither. Returns the preload Future.
+    """
+    future = preload_risk_store() if preload_store else None
+    get_client()
+    return future
+
+
+def execute_tool_call(tool_call) -> dict:
+    """
+    Runs one function_call item and returns its function_call_output item.
+    """
+    arguments = tool_call.arguments
+
+    try:
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments)
+
+        handler = TOOL_HANDLERS.get(tool_call.name)
+        if handler is None:
+            tool_result = {"error": f"Unknown tool: {tool_call.name}"}
+        else:
+            with instrumentation.timer("agent_tool_seconds", tool=tool_call.name):
+                tool_result = handler(arguments)
+    except Exception as e:
+        tool_result = {"error": f"{type(e).__name__}: {e}"}
+
+    if instrumentation.ENABLED and isinstance(tool_result, dict) and "error" in tool_result:
+        instrumentation.inc("agent_tool_errors_total", tool=tool_call.name)
+
+    print(f"Tool executed ({tool_call.name}) → {tool_result}")
 
-load_dotenv(override=True)
-api_key = os.getenv('OPENAI_API_KEY')
+    return {
+        "type": "function_call_output",
+        "call_id": tool_call.call_id,
+        "output": json.dumps(tool_result)
+    }
+
+
+def execute_tool_calls(tool_calls) -> list:
+    """
+    Executes all tool calls of one response concurrently; outputs keep call order.
+    """
+    if len(tool_calls) == 1:
+        return [execute_tool_call(tool_calls[0])]
+
+    with ThreadPoolExecutor(max_workers=min(len(tool_calls), MAX_PARALLEL_TOOL_CALLS)) as pool:
+        return list(pool.map(execute_tool_call, tool_calls))
+
+
+def answer_fast_path(user_input: str) -> Optional[str]:
+    """
+    Templated answer for a question extract_intent recognizes, computed by
+    calling the eligibility tool directly; None when the question needs the
+    LLM.
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    started = time.perf_counter()
+    intent = extract_intent(user_input)
+    answer = None
+    if intent is not None:
+        try:
+            result = _loan_tools().get_customer_loan_eligibility(intent["customer_id"], intent["loan_amount"])
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        answer = render_answer(intent, result)
 
-# Check the key
+    if answer is None:
+        FAST_PATH_STATS.record_miss()
+        if instrumentation.ENABLED:
+            instrumentation.inc("agent_fast_path_total", result="miss")
+        return None
+    elapsed = time.perf_counter() - started
+    FAST_PATH_STATS.record_hit(elapsed)
+    if instrumentation.ENABLED:
+        instrumentation.inc("agent_fast_path_total", result="hit")
+        instrumentation.observe("agent_fast_path_seconds", elapsed)
+    return answer
 
-if not api_key:
-    print("No API key was found - please head over to the troubleshooting notebook in this folder to identify & fix!")
-elif not api_key.startswith("sk-proj-"):
-    print("An API key was found, but it doesn't start sk-proj-; please check you're using the right key - see troubleshooting notebook")
-elif api_key.strip() != api_key:
-    print("An API key was found, but it looks like it might have space or tab characters at the start or end - please remove them - see troubleshooting notebook")
-else:
-    print("API key found and looks good so far!")
 
+def fast_path_stats() -> dict:
+    return FAST_PATH_STATS.stats()
 
-#i want to use the local model that i have running on my machine, so i will set the base url to localhost:8000
-# client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
-client = OpenAI()
 
 def run_agent(user_input: str):
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=user_input,
-        tools=TOOLS
-    )
+    with instrumentation.timer("agent_run_seconds", mode="sync"):
+        answer = answer_fast_path(user_input)
+        if answer is not None:
+            return answer
+        return _run_agent(user_input)
+
+
+def _run_agent(user_input: str):
+    # Load the risk store while the first LLM call is in flight.
+    preload_risk_store()
+    client = get_client()
+    with instrumentation.timer("agent_llm_request_seconds", stage="initial", mode="sync"):
+        response = client.responses.create(
+            model=MODEL,
+            input=user_input,
+            tools=TOOLS
+        )
 
     print("Agent raw response:", response)
 
-    for output in response.output:
+    tool_calls = [output for output in response.output if output.type == "function_call"]
+
+    if not tool_calls:
+        return response.output_text
+
+    with instrumentation.timer("agent_tools_seconds", mode="sync"):
+        tool_outputs = execute_tool_calls(tool_calls)
+
+    # All outputs go back in a single follow-up request
+    with instrumentation.timer("agent_llm_request_seconds", stage="final", mode="sync"):
+        final_response = client.responses.create(
+            model=MODEL,  # SAME MODEL
+            previous_response_id=response.id,
+            input=tool_outputs
+        )
+
+    return final_response.output_text
+
+
+# ---------- Streaming ----------
+
+def _first_chunk(timings: Dict, started: float):
+    if "first_chunk_seconds" not in timings:
+        timings["first_chunk_seconds"] = time.perf_counter() - started
+        if instrumentation.ENABLED:
+            instrumentation.observe("agent_first_chunk_seconds", timings["first_chunk_seconds"], mode="stream")
+
+
+def _stream_stage(stage: str, timings: Dict, started: float, **request) -> Iterator[str]:
+    """
+    Streams one Responses API call, yielding output text deltas as they
+    arrive, and returns the completed response. Records the stage's time to
+    first text delta and total time in timings[stage].
+    """
+    stage_started = time.perf_counter()
+    first_token = None
+    response = None
+    with get_client().responses.create(model=MODEL, stream=True, **request) as stream:
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                if first_token is None:
+                    first_token = time.perf_counter() - stage_started
+                    _first_chunk(timings, started)
+                yield event.delta
+            elif event.type in ("response.completed", "response.incomplete", "response.failed"):
+                response = event.response
+            elif event.type == "error":
+                raise RuntimeError(f"Responses stream error: {event.message}")
+    seconds = time.perf_counter() - stage_started
+
+    timings[stage] = {"first_token_seconds": first_token, "seconds": seconds}
+    if instrumentation.ENABLED:
+        instrumentation.observe("agent_llm_request_seconds", seconds, stage=stage, mode="stream", outcome="ok")
+        if first_token is not None:
+            instrumentation.observe("agent_llm_first_token_seconds", first_token, stage=stage)
+    if response is None:
+        raise RuntimeError(f"Responses stream for the {stage} request ended without a response")
+    return response
+
+
+def run_agent_stream(user_input: str, timings: Optional[Dict] = None) -> Iterator[str]:
+    """
+    run_agent, yielding the answer in chunks as the model produces them:
+    the initial response's text (when it answers without tools), then the
+    follow-up response's text once the tool calls have run.
+
+    Pass a dict as `timings` to read latencies once the stream is exhausted:
+    "initial" and "final" hold first_token_seconds and seconds of each
+    Responses call, "tools" holds seconds, and "first_chunk_seconds" /
+    "seconds" cover the conversation as the caller saw it.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+
+    answer = answer_fast_path(user_input)
+    if answer is not None:
+        _first_chunk(timings, started)
+        yield answer
+    else:
+        preload_risk_store()
+        response = yield from _stream_stage("initial", timings, started, input=user_input, tools=TOOLS)
+        tool_calls = [output for output in response.output if output.type == "function_call"]
+
+        if tool_calls:
+            tools_started = time.perf_counter()
+            tool_outputs = execute_tool_calls(tool_calls)
+            timings["tools"] = {"seconds": time.perf_counter() - tools_started}
+            if instrumentation.ENABLED:
+                instrumentation.observe("agent_tools_seconds", timings["tools"]["seconds"], mode="stream", outcome="ok")
+
+            yield from _stream_stage(
+                "final", timings, started, previous_response_id=response.id, input=tool_outputs
+            )
+
+    timings["seconds"] = time.perf_counter() - started
+    if instrumentation.ENABLED:
+        instrumentation.observe("agent_run_seconds", timings["seconds"], mode="stream", outcome="ok")
+
+
+# ---------- Async runtime ----------
+
+class AgentOverloadedError(RuntimeError):
+    """Raised when no conversation slot frees up within queue_timeout."""
+
+
+class AsyncAgentRuntime:
+    """
+    Async run_agent for serving many eligibility conversations from one process.
+
+    All conversations share one AsyncOpenAI client and its pooled HTTP
+    connections. At most max_in_flight conversations run at once; callers
+    beyond that wait up to queue_timeout seconds for a slot and then get
+    AgentOverloadedError (backpressure instead of unbounded queueing).
+    Every Responses API call, and every tool call, is bounded by
+    request_timeout; a tool call that runs over it answers with an error
+    and gives up its slot (its thread finishes in the background).
+
+    base_url (or OPENAI_BASE_URL) can point at a local stub server, see
+    app/scripts/stub_responses_server.py. A runtime belongs to the event loop
+    it is first used on and its owner closes it there, before the loop
+    closes: use `async with AsyncAgentRuntime(...) as runtime`, or await
+    runtime.aclose().
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 200,
+        max_connections: int = 100,
+        request_timeout: float = 30.0,
+        queue_timeout: float = 5.0,
+        max_retries: int = 2,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        import asyncio
+
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        with _CLIENT_LOCK:
+            _load_env()
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=request_timeout,
+            max_retries=max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=request_timeout,
+            ),
+        )
+        self.request_timeout = request_timeout
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._loop: Optional["asyncio.AbstractEventLoop"] = None
+        self._closing = None
+        self.closed = False
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def run_agent(self, user_input: str) -> str:
+        import asyncio
+
+        if self.closed:
+            raise RuntimeError("AsyncAgentRuntime is closed")
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            instrumentation.inc("agent_rejected_total")
+            raise AgentOverloadedError(
+                f"No agent slot available within {self.queue_timeout}s"
+            ) from None
+
+        self.in_flight += 1
+        try:
+            with instrumentation.timer("agent_run_seconds", mode="async"):
+                if FAST_PATH_ENABLED:
+                    # The tool is synchronous (and loads the store on first use).
+                    answer = await asyncio.to_thread(answer_fast_path, user_input)
+                    if answer is not None:
+                        return answer
+                return await self._converse(user_input)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _converse(self, user_input: str) -> str:
+        import asyncio
+
+        preload_risk_store()
+        with instrumentation.timer("agent_llm_request_seconds", stage="initial", mode="async"):
+            response = await self.client.responses.create(
+                model=MODEL,
+                input=user_input,
+                tools=TOOLS
+            )
+
+        tool_calls = [output for output in response.output if output.type == "function_call"]
+
+        if not tool_calls:
+            return response.output_text
+
+        # Tools are synchronous; run them off the event loop, all at once.
+        with instrumentation.timer("agent_tools_seconds", mode="async"):
+            tool_outputs = await asyncio.gather(*(self._execute_tool_call(tool_call) for tool_call in tool_calls))
 
-        if output.type == "function_call":
+        with instrumentation.timer("agent_llm_request_seconds", stage="final", mode="async"):
+            final_response = await self.client.responses.create(
+                model=MODEL,
+                previous_response_id=response.id,
+                input=list(tool_outputs)
+            )
 
-            tool_name = output.name
-            arguments = output.arguments
+        return final_response.output_text
 
-            if isinstance(arguments, str):
-                arguments = json.loads(arguments)
+    async def _execute_tool_call(self, tool_call) -> dict:
+        import asyncio
 
-            if tool_name == "get_customer_loan_eligibility":
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(execute_tool_call, tool_call), timeout=self.request_timeout
+            )
+        except asyncio.TimeoutError:
+            instrumentation.inc("agent_tool_errors_total", tool=tool_call.name)
+            return {
+                "type": "function_call_output",
+                "call_id": tool_call.call_id,
+                "output": json.dumps({"error": f"TimeoutError: tool call took longer than {self.request_timeout}s"}),
+            }
 
-                customer_id = arguments.get("customer_id")
-                loan_amount = arguments.get("loan_amount")
+    async def aclose(self):
+        """
+        Closes the client and its connection pool; safe to call twice.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        await self.client.close()
 
-                tool_result = get_customer_loan_eligibility(
-                    customer_id, loan_amount
-                )
+    def close(self):
+        """
+        aclose() from synchronous code, on the loop the runtime was used on;
+        the scheduled close is kept in self._closing until it finishes. A
+        runtime whose loop is already closed can no longer close its
+        connections cleanly, so close runtimes before their loop.
+        """
+        import asyncio
 
-                print(f"Tool executed → {tool_result}")
+        if self.closed or self._closing is not None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop or running
+        if loop is None:
+            asyncio.run(self.aclose())
+            return
+        if loop.is_closed():
+            raise RuntimeError("AsyncAgentRuntime.close() after its event loop was closed")
+        if running is loop:
+            self._closing = loop.create_task(self.aclose())
+        elif loop.is_running():
+            self._closing = asyncio.run_coroutine_threadsafe(self.aclose(), loop)
+        else:
+            loop.run_until_complete(self.aclose())
 
-                # ✅ Correct second call
-                final_response = client.responses.create(
-                    model="gpt-4.1-mini",  # SAME MODEL
-                    previous_response_id=response.id,
-                    input=[
-                        {
-                            "type": "function_call_output",
-                            "call_id": output.call_id,
-                            "output": json.dumps(tool_result)
-                        }
-                    ]
-                )
+    async def __aenter__(self):
+        return self
 
-                return final_response.output_text
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
-    return response.output_text
 
+async def run_agent_async(user_input: str, runtime: Optional[AsyncAgentRuntime] = None) -> str:
+    """
+    run_agent on `runtime`, which the caller owns and closes. Without one,
+    a runtime is created for this call and closed before returning; servers
+    should keep one runtime per event loop and pass it in, so
+    conversations share its connections and concurrency limit.
+    """
+    if runtime is not None:
+        return await runtime.run_agent(user_input)
+    async with AsyncAgentRuntime() as runtime:
+        return await runtime.run_agent(user_input)
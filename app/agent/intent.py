@@ -0,0 +1,221 @@
+# app/agent/intent.py
+
+# Local fast path for single eligibility questions.
+#
+# Most questions have the shape "Is cust_001 eligible for a 5000 rupees
+# loan?": one customer, one amount. extract_intent recognizes those without
+# the LLM; run_agent then calls the eligibility tool directly and answers
+# from a per-reason_code template. Anything the extractor is not sure about
+# (several customers or amounts, an amount that is not the loan's, a
+# qualifier the template can't repeat such as a policy or loan type,
+# follow-up questions such as "why") returns None and goes to the LLM.
+
+import re
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Dict, Optional
+
+CUSTOMER_ID_PATTERN = re.compile(r"\bcust_\d+\b", re.IGNORECASE)
+
+# "5000", "5,000", "1,00,000", "2.5" with an optional currency marker in
+# front ("rs", "rs.", "inr", "₹"), a multiplier ("5k", "5 lakh") and/or a
+# currency word after it ("5000 rupees", "5000rs", "5000/-"). Digit groups
+# must follow the international (1,000,000) or Indian (10,00,000) system;
+# anything else ("5,00") is not an amount.
+AMOUNT_PATTERN = re.compile(
+    r"""
+    (?P<prefix>(?:\brs\.?|\binr|₹)\s*)?
+    (?<![\d,])(?<!\d\.)
+    (?P<number>(?:\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})*,\d{3}|\d+)(?:\.\d+)?)
+    (?![\d,]*\d)
+    (?:\s*(?P<multiplier>k|thousand|lakhs?|lacs?|crores?|cr|mn|million)\b)?
+    (?:\s*(?P<suffix>rupees?|rs|inr|/-)(?!\w))?
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000,
+    "mn": 1_000_000, "million": 1_000_000,
+}
+
+# Amounts are in rupees; any other currency is left to the LLM.
+_OTHER_CURRENCY = re.compile(
+    r"[$€£¥]|(?<![a-z])(?:usd|dollars?|bucks|eur|euros?|gbp|pounds?|sterling|jpy|yen"
+    r"|aed|dirhams?|sgd|cad|aud)(?![a-z])",
+    re.IGNORECASE,
+)
+
+# The amount only counts when the sentence ties it to the loan: "loan
+# of/for <amount>" or "<amount> loan".
+_AMOUNT_BEFORE = re.compile(
+    r"\bloans?\s+(?:(?:eligibility|amount)\s+)?(?:of|for)\s+(?:an?\s+)?$", re.IGNORECASE
+)
+_AMOUNT_AFTER = re.compile(r"^\s*loans?\b", re.IGNORECASE)
+_SIGN = re.compile(r"[-+−]\s*$")
+
+# Other units and other sums of money ("a salary of 50000") make any
+# amount in the question suspect.
+_OTHER_UNIT = re.compile(
+    r"%|\b(?:paise|paisa|paisas|cents?|percent|per\s+cent)\b"
+    r"|\b(?:salar\w*|sav(?:ed|ings?)|incomes?|earn\w*|balances?|deposit\w*|rent|revenues?"
+    r"|turnover|profits?|spen[dt]\w*|debts?|owe\w*|emis?)\b",
+    re.IGNORECASE,
+)
+
+# Qualifiers the templates can't repeat back ("under the current policy").
+_QUALIFIER = re.compile(
+    r"\b(?:polic\w*|tiers?|rules?|tenure|terms?|interest|rates?|collateral\w*|secured|unsecured"
+    r"|home|house|housing|car|auto|vehicle|personal|business|education\w*|student|gold|mortgage"
+    r"|old|new|previous|current|latest|under)\b",
+    re.IGNORECASE,
+)
+
+_ELIGIBILITY = re.compile(
+    r"\b(?:eligib\w*|qualif\w*|approv\w*|sanction\w*)\b|\bcan\b.*\b(?:get|take|borrow|avail)\b",
+    re.IGNORECASE,
+)
+_LOAN = re.compile(r"\bloans?\b", re.IGNORECASE)
+
+# Questions that want more than a yes/no for one amount.
+_NEEDS_LLM = re.compile(
+    r"\b(?:why|how|explain|reasons?|compare|versus|vs|if|not|instead|which|what|all|every|each|both|or|and"
+    r"|history|metrics?|growth|volatil\w*|cv|months?|years?)\b|n't",
+    re.IGNORECASE,
+)
+
+
+def parse_amount(match) -> Decimal:
+    amount = Decimal(match.group("number").replace(",", ""))
+    multiplier = match.group("multiplier")
+    if multiplier:
+        amount *= MULTIPLIERS[multiplier.lower()]
+    if amount == amount.to_integral_value():
+        amount = amount.quantize(Decimal(1))
+    return amount
+
+
+def extract_intent(text: str) -> Optional[Dict]:
+    """
+    {"customer_id", "loan_amount"} of a single eligibility question, or
+    None unless the question is unambiguous.
+    """
+    customer_ids = set(CUSTOMER_ID_PATTERN.findall(text))
+    if len(customer_ids) != 1:
+        return None
+    customer_id = customer_ids.pop()
+    # The risk store is case-sensitive and ids are not guaranteed to be
+    # lower case (ingested ids come from file names): "CUST_001" goes to
+    # the LLM rather than being answered CUSTOMER_NOT_FOUND.
+    if customer_id != customer_id.lower():
+        return None
+    rest = CUSTOMER_ID_PATTERN.sub(" ", text)
+    if not _ELIGIBILITY.search(rest) or not _LOAN.search(rest) or _NEEDS_LLM.search(rest):
+        return None
+    if _OTHER_CURRENCY.search(rest) or _OTHER_UNIT.search(rest) or _QUALIFIER.search(rest):
+        return None
+
+    matches = list(AMOUNT_PATTERN.finditer(rest))
+    if len(matches) != 1:
+        return None
+    match = matches[0]
+    if _SIGN.search(rest[:match.start()]) or _SIGN.search(rest[:match.start("number")]):
+        return None
+    if not (_AMOUNT_BEFORE.search(rest[:match.start()]) or _AMOUNT_AFTER.match(rest[match.end():])):
+        return None
+    amount = parse_amount(match)
+    if amount <= 0:
+        return None
+    return {"customer_id": customer_id, "loan_amount": amount}
+
+
+ANSWER_TEMPLATES = {
+    "ELIGIBLE": "Yes, {customer_id} is eligible for a loan of Rs {amount} under the current policy.",
+    "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT": (
+        "No, {customer_id} is not eligible for a loan of Rs {amount}: the amount exceeds the "
+        "largest loan the current policy allows."
+    ),
+    "LOSS_MAKING": (
+        "No, {customer_id} is not eligible for a loan of Rs {amount}: their outflows exceed their "
+        "inflows over their transaction history, so the account is loss making."
+    ),
+    "FRAUD_PATTERN_DETECTED": (
+        "No, {customer_id} is not eligible for a loan of Rs {amount}: their transactions show a "
+        "pattern of micro debits that is flagged as potential fraud."
+    ),
+    "NEGATIVE_GROWTH": (
+        "No, {customer_id} is not eligible for a loan of Rs {amount}: their monthly net cashflow "
+        "has declined, and this loan amount requires positive growth."
+    ),
+    "VOLATILITY_THRESHOLD_EXCEEDED": (
+        "No, {customer_id} is not eligible for a loan of Rs {amount}: their monthly cashflow is "
+        "more volatile than the policy allows for this amount."
+    ),
+    "CUSTOMER_NOT_FOUND": "I couldn't find a customer with the ID {customer_id}, so I can't assess their eligibility.",
+}
+
+
+def format_amount(amount: Decimal) -> str:
+    if amount == amount.to_integral_value():
+        return f"{int(amount):,}"
+    return f"{amount:,.2f}"
+
+
+def render_answer(intent: Dict, result: Dict) -> Optional[str]:
+    """
+    Answer to the question behind `intent` from the eligibility tool's
+    result; None for results without a template (e.g. errors).
+    """
+    template = ANSWER_TEMPLATES.get(result.get("reason_code"))
+    if template is None:
+        return None
+    return template.format(customer_id=intent["customer_id"], amount=format_amount(intent["loan_amount"]))
+
+
+class FastPathStats:
+    """
+    Hit rate of the fast path and latency of the questions it answered
+    (the most recent `window` of them).
+    """
+
+    def __init__(self, window: int = 10_000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.hits = 0
+        self.misses = 0
+
+    def record_hit(self, seconds: float):
+        with self._lock:
+            self.hits += 1
+            self._latencies.append(seconds)
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            latencies = sorted(self._latencies)
+        questions = hits + misses
+        result = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / questions if questions else 0.0,
+        }
+        if latencies:
+            result["p50_ms"] = latencies[len(latencies) // 2] * 1e3
+            result["p99_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3
+        return result
+
+
+FAST_PATH_STATS = FastPathStats()
@@ -1,6 +1,18 @@
-from typing import Dict, List
+import math
+from typing import Dict, List, Tuple
 from decimal import Decimal
 
+import numpy as np
+
+from app.core.transaction_table import (
+    TXN_CREDIT,
+    TXN_DEBIT,
+    TXN_DEBIT_MICRO,
+    MonthlyTable,
+    TransactionTable,
+    paise_to_decimal,
+)
+
 
 def aggregate_by_month(transactions: List[Dict]) -> Dict:
     result = {}
@@ -15,30 +27,32 @@ def aggregate_by_month(transactions: List[Dict]) -> Dict:
         result[key]["net_cashflow"] = result[key]["total_credit"] - result[key]["total_debit"]
     return result
 
+def _growth_between(first_cashflow: Decimal, last_cashflow: Decimal) -> Decimal:
+    if first_cashflow == Decimal("0"):
+        return Decimal("0")
+
+    growth = (last_cashflow - first_cashflow) / abs(first_cashflow)
+    return growth.quantize(Decimal("0.0001"))
+
 def compute_cashflow_growth(monthly_data: Dict) -> Decimal:
     sorted_months = sorted(monthly_data.keys())
     if len(sorted_months) < 2:
         return Decimal("0")
-    
+
     first_month = sorted_months[0]
     last_month = sorted_months[-1]
-    
+
     first_cashflow = monthly_data[first_month]["net_cashflow"]
     last_cashflow = monthly_data[last_month]["net_cashflow"]
-    
-    if first_cashflow == Decimal("0"):
-        return Decimal("0")
-    
-    growth = (last_cashflow - first_cashflow) / abs(first_cashflow)
-    return growth.quantize(Decimal("0.0001"))
 
+    return _growth_between(first_cashflow, last_cashflow)
 
 
-def compute_cashflow_volatility(monthly_data: Dict) -> Dict:
-    cashflows = [data["net_cashflow"] for data in monthly_data.values()]
+
+def _volatility_of(cashflows: List[Decimal]) -> Dict:
     if not cashflows:
         return {"cv": Decimal("0"), "stability_level": "stable"}
-    
+
     mean = sum(cashflows) / len(cashflows)
 
     if mean <= 0:
@@ -56,3 +70,494 @@ def compute_cashflow_volatility(monthly_data: Dict) -> Dict:
         stability_level = "unstable"
     return {"cv": cv.quantize(Decimal("0.0001")), "stability_level": stability_level}
 
+def compute_cashflow_volatility(monthly_data: Dict) -> Dict:
+    cashflows = [data["net_cashflow"] for data in monthly_data.values()]
+    return _volatility_of(cashflows)
+
+
+# ---------- Columnar variants ----------
+#
+# These operate on one customer's slice of a TransactionTable (integer paise
+# amounts, month keys and type codes) and return the exact same Decimal
+# results as the dict-based functions above.
+
+def aggregate_by_month_columnar(
+    months: np.ndarray, amounts: np.ndarray, types: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (month_keys, total_credit, total_debit, net_cashflow) in paise,
+    with months in order of first appearance (same order as aggregate_by_month).
+    """
+    keys, first_index, inverse = np.unique(months, return_index=True, return_inverse=True)
+
+    total_credit = np.zeros(len(keys), dtype=np.int64)
+    total_debit = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(total_credit, inverse, np.where(types == TXN_CREDIT, amounts, 0))
+    np.add.at(total_debit, inverse, np.where(types == TXN_DEBIT, amounts, 0))
+
+    order = np.argsort(first_index, kind="stable")
+    total_credit = total_credit[order]
+    total_debit = total_debit[order]
+    return keys[order], total_credit, total_debit, total_credit - total_debit
+
+def compute_cashflow_growth_columnar(month_keys: np.ndarray, net_cashflow: np.ndarray) -> Decimal:
+    if len(month_keys) < 2:
+        return Decimal("0")
+
+    first_cashflow = paise_to_decimal(net_cashflow[np.argmin(month_keys)])
+    last_cashflow = paise_to_decimal(net_cashflow[np.argmax(month_keys)])
+    return _growth_between(first_cashflow, last_cashflow)
+
+def compute_cashflow_volatility_columnar(net_cashflow: np.ndarray) -> Dict:
+    return _volatility_of([paise_to_decimal(cf) for cf in net_cashflow.tolist()])
+
+
+# ---------- Whole-portfolio batch engine ----------
+#
+# Computes the metrics of every customer at once with NumPy group-by
+# reductions. Growth and CV are evaluated in float64 and rounded to the
+# 4-decimal grid; any customer whose float result sits too close to a
+# rounding half-step or to a stability threshold is recomputed with the
+# Decimal functions above, so the output matches them exactly.
+
+# Bump whenever a change here alters computed metrics; persisted snapshots
+# keyed on an older version are then rebuilt.
+METRICS_VERSION = 1
+
+STABILITY_LEVELS = ("stable", "moderate", "unstable", "loss_making")
+_STABILITY_CODES = {level: code for code, level in enumerate(STABILITY_LEVELS)}
+
+# How a Decimal metric is rebuilt from its value in units of 0.0001:
+DECIMAL_PLAIN_ZERO = 0      # Decimal("0")
+DECIMAL_QUANTIZED = 1       # Decimal(value_e4).scaleb(-4)
+DECIMAL_NEGATIVE_ZERO = 2   # Decimal("-0.0000")
+
+METRICS_DTYPE = np.dtype([
+    ("growth_e4", np.int64),
+    ("growth_kind", np.int8),
+    ("cv_e4", np.int64),
+    ("cv_kind", np.int8),
+    ("stability", np.int8),
+    ("fraud_flag", np.bool_),
+    ("loss_flag", np.bool_),
+])
+
+_CV_STABLE_E4 = 1500
+_CV_MODERATE_E4 = 3500
+
+
+def _encode_decimal(value: Decimal) -> Tuple[int, int]:
+    if value == 0:
+        if value.as_tuple().exponent == 0:
+            return 0, DECIMAL_PLAIN_ZERO
+        if value.is_signed():
+            return 0, DECIMAL_NEGATIVE_ZERO
+    return int(value.scaleb(4)), DECIMAL_QUANTIZED
+
+
+def _decode_decimal(value_e4: int, kind: int) -> Decimal:
+    if kind == DECIMAL_PLAIN_ZERO:
+        return Decimal("0")
+    if kind == DECIMAL_NEGATIVE_ZERO:
+        return Decimal("-0.0000")
+    return Decimal(int(value_e4)).scaleb(-4)
+
+
+def metrics_record_to_dict(record) -> Dict:
+    """
+    Rebuilds the risk_store metrics dict (exact Decimals) from a METRICS_DTYPE record.
+    """
+    return {
+        "growth": _decode_decimal(record["growth_e4"], record["growth_kind"]),
+        "cv": _decode_decimal(record["cv_e4"], record["cv_kind"]),
+        "stability": STABILITY_LEVELS[record["stability"]],
+        "fraud_flag": bool(record["fraud_flag"]),
+        "loss_flag": bool(record["loss_flag"]),
+    }
+
+
+def _near_half_step(scaled: np.ndarray) -> np.ndarray:
+    tolerance = 1e-6 + np.abs(scaled) * 1e-12
+    fraction = scaled - np.floor(scaled)
+    return (np.abs(fraction - 0.5) < tolerance) | ~(np.abs(scaled) < 2.0 ** 50)
+
+
+def _segment_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    cumulative = np.zeros(len(values) + 1, dtype=values.dtype)
+    np.cumsum(values, out=cumulative[1:])
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+def aggregate_portfolio_by_month(table: TransactionTable) -> MonthlyTable:
+    """
+    Monthly credit/debit totals and debit_micro counts for every customer.
+    """
+    num_customers = len(table)
+    counts = np.diff(table.offsets)
+    months = table.months.astype(np.int64)
+
+    if len(months) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return MonthlyTable(
+            table.customer_ids, np.zeros(num_customers + 1, dtype=np.int64),
+            np.zeros(0, dtype=np.int16), empty, empty.copy(), empty.copy(),
+        )
+
+    # One group per (customer, month): sort rows by a combined integer key.
+    first_month = months.min()
+    span = int(months.max() - first_month) + 1
+    customer_of_row = np.repeat(np.arange(num_customers, dtype=np.int64), counts)
+    keys = customer_of_row * span + (months - first_month)
+
+    if np.all(keys[1:] >= keys[:-1]):
+        order = np.arange(len(keys))
+        sorted_keys = keys
+    else:
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+    amounts = table.amounts[order]
+    types = table.types[order]
+    total_credit = np.add.reduceat(np.where(types == TXN_CREDIT, amounts, 0), starts)
+    total_debit = np.add.reduceat(np.where(types == TXN_DEBIT, amounts, 0), starts)
+    micro_count = np.add.reduceat((types == TXN_DEBIT_MICRO).astype(np.int64), starts)
+
+    group_keys = sorted_keys[starts]
+    group_customer = group_keys // span
+    group_month = (group_keys % span + first_month).astype(np.int16)
+
+    # Customers occupy ascending row ranges, so ordering groups by their first
+    # row gives (customer, first appearance) order.
+    appearance = np.argsort(order[starts], kind="stable")
+
+    offsets = np.zeros(num_customers + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group_customer, minlength=num_customers), out=offsets[1:])
+
+    return MonthlyTable(
+        customer_ids=table.customer_ids,
+        offsets=offsets,
+        month_keys=group_month[appearance],
+        total_credit=total_credit[appearance],
+        total_debit=total_debit[appearance],
+        micro_count=micro_count[appearance],
+    )
+
+
+def compute_portfolio_metrics(monthly: MonthlyTable) -> np.ndarray:
+    """
+    Returns one METRICS_DTYPE record per customer, aligned with monthly.customer_ids.
+    """
+    num_customers = len(monthly)
+    offsets = monthly.offsets
+    net = monthly.net_cashflow
+    month_count = np.diff(offsets)
+    nonempty = month_count > 0
+
+    records = np.zeros(num_customers, dtype=METRICS_DTYPE)
+
+    total_net = _segment_sums(net, offsets)
+    records["loss_flag"] = total_net < 0
+    records["fraud_flag"] = _segment_sums(monthly.micro_count, offsets) > 0
+
+    # ---- growth: first vs last calendar month ----
+    customer_of_group = np.repeat(np.arange(num_customers, dtype=np.int64), month_count)
+    by_month = np.lexsort((monthly.month_keys, customer_of_group))
+    first_net = np.zeros(num_customers, dtype=np.int64)
+    last_net = np.zeros(num_customers, dtype=np.int64)
+    first_net[nonempty] = net[by_month[offsets[:-1][nonempty]]]
+    last_net[nonempty] = net[by_month[offsets[1:][nonempty] - 1]]
+
+    has_growth = (month_count >= 2) & (first_net != 0)
+    change = (last_net - first_net)[has_growth]
+    growth_scaled = change.astype(np.float64) * 1e4 / np.abs(first_net[has_growth]).astype(np.float64)
+    growth_e4 = np.rint(growth_scaled).astype(np.int64)
+
+    growth_kind = np.full(len(change), DECIMAL_QUANTIZED, dtype=np.int8)
+    growth_kind[(growth_e4 == 0) & (change < 0)] = DECIMAL_NEGATIVE_ZERO
+    records["growth_e4"][has_growth] = growth_e4
+    records["growth_kind"][has_growth] = growth_kind
+
+    for i in np.flatnonzero(has_growth)[_near_half_step(growth_scaled)]:
+        growth = _growth_between(paise_to_decimal(first_net[i]), paise_to_decimal(last_net[i]))
+        records["growth_e4"][i], records["growth_kind"][i] = _encode_decimal(growth)
+
+    # ---- volatility: population CV of monthly net cashflow ----
+    records["stability"][nonempty & (total_net <= 0)] = _STABILITY_CODES["loss_making"]
+
+    profitable = nonempty & (total_net > 0)
+    mean = np.zeros(num_customers)
+    mean[profitable] = total_net[profitable] / month_count[profitable]
+    squared_dev = (net - mean[customer_of_group]) ** 2
+    variance = np.bincount(customer_of_group, weights=squared_dev, minlength=num_customers)
+    cv_scaled = np.sqrt(variance[profitable] / month_count[profitable]) / mean[profitable] * 1e4
+
+    stability = np.where(
+        cv_scaled <= _CV_STABLE_E4, _STABILITY_CODES["stable"],
+        np.where(cv_scaled <= _CV_MODERATE_E4, _STABILITY_CODES["moderate"], _STABILITY_CODES["unstable"]),
+    )
+    records["cv_e4"][profitable] = np.rint(cv_scaled).astype(np.int64)
+    records["cv_kind"][profitable] = DECIMAL_QUANTIZED
+    records["stability"][profitable] = stability
+
+    threshold_tolerance = 1e-6 + cv_scaled * 1e-12
+    ambiguous = (
+        _near_half_step(cv_scaled)
+        | (np.abs(cv_scaled - _CV_STABLE_E4) < threshold_tolerance)
+        | (np.abs(cv_scaled - _CV_MODERATE_E4) < threshold_tolerance)
+    )
+    for i in np.flatnonzero(profitable)[ambiguous]:
+        cashflows = [paise_to_decimal(cf) for cf in net[offsets[i]:offsets[i + 1]].tolist()]
+        volatility = _volatility_of(cashflows)
+        records["cv_e4"][i], records["cv_kind"][i] = _encode_decimal(volatility["cv"])
+        records["stability"][i] = _STABILITY_CODES[volatility["stability_level"]]
+
+    return records
+
+
+# ---------- Exact metrics from running sums ----------
+#
+# Growth only needs the first and last month's net cashflow, and the CV of
+# n monthly values with sum S and sum of squares Q is sqrt(n*Q - S*S) / S.
+# With integer paise both are exact rationals, so they can be rounded to the
+# 0.0001 grid with integer arithmetic. Only when the exact value is within a
+# hair of a half-step or stability threshold (where the Decimal pipeline's
+# own 28-digit rounding could tip it) do we fall back to the Decimal functions.
+
+_EXTRA_DIGITS = 10 ** 20
+_HALF_STEP = _EXTRA_DIGITS // 2
+
+
+def _tie_margin(units: int) -> int:
+    # Covers the Decimal pipeline's relative error (~1e-27) at this magnitude.
+    return 2 + abs(units) // 10 ** 6
+
+
+def growth_from_endpoints(first_cashflow: int, last_cashflow: int) -> Decimal:
+    """
+    compute_cashflow_growth for a customer with >= 2 months, given the net
+    cashflow (in paise) of its first and last calendar month.
+    """
+    if first_cashflow == 0:
+        return Decimal("0")
+
+    change = last_cashflow - first_cashflow
+    scaled = change * 10_000 * _EXTRA_DIGITS // abs(first_cashflow)
+    units, fraction = divmod(scaled, _EXTRA_DIGITS)
+    if abs(fraction - _HALF_STEP) <= _tie_margin(units):
+        return _growth_between(paise_to_decimal(first_cashflow), paise_to_decimal(last_cashflow))
+
+    units += fraction > _HALF_STEP
+    if units == 0 and change < 0:
+        return Decimal("-0.0000")
+    return Decimal(units).scaleb(-4)
+
+
+def volatility_from_sums(count: int, net_sum: int, net_sq_sum: int, cashflows) -> Dict:
+    """
+    compute_cashflow_volatility from running sums of monthly net cashflow (paise).
+
+    `cashflows` is a zero-argument callable returning the monthly values in
+    paise; it is only called for the rare near-tie fallback.
+    """
+    if count == 0:
+        return {"cv": Decimal("0"), "stability_level": "stable"}
+    if net_sum <= 0:
+        return {"cv": Decimal("0"), "stability_level": "loss_making"}
+
+    spread = count * net_sq_sum - net_sum * net_sum
+    scaled = math.isqrt(spread * 10 ** 8 * _EXTRA_DIGITS ** 2) // net_sum
+    units, fraction = divmod(scaled, _EXTRA_DIGITS)
+
+    margin = _tie_margin(units)
+    near_tie = (
+        abs(fraction - _HALF_STEP) <= margin
+        or abs(scaled - _CV_STABLE_E4 * _EXTRA_DIGITS) <= margin
+        or abs(scaled - _CV_MODERATE_E4 * _EXTRA_DIGITS) <= margin
+    )
+    if near_tie:
+        return _volatility_of([paise_to_decimal(cf) for cf in cashflows()])
+
+    if scaled <= _CV_STABLE_E4 * _EXTRA_DIGITS:
+        stability_level = "stable"
+    elif scaled <= _CV_MODERATE_E4 * _EXTRA_DIGITS:
+        stability_level = "moderate"
+    else:
+        stability_level = "unstable"
+    units += fraction > _HALF_STEP
+    return {"cv": Decimal(units).scaleb(-4), "stability_level": stability_level}
+
+
+def metrics_from_window_sums(
+    count: np.ndarray,
+    net_sum: np.ndarray,
+    net_sq_sum: np.ndarray,
+    first_net: np.ndarray,
+    last_net: np.ndarray,
+    micro_count: np.ndarray,
+    cashflows,
+) -> np.ndarray:
+    """
+    METRICS_DTYPE records for many month windows at once, from each
+    window's month count, sum and sum of squares of monthly net cashflow,
+    net cashflow of its first and last month, and debit_micro count (paise;
+    net_sq_sum may be an object array of Python ints).
+
+    Float estimates are rounded like compute_portfolio_metrics. The CV comes
+    from sums, so its float error is bounded explicitly. Any window whose
+    bounds straddle a half-step or stability threshold is recomputed exactly
+    with growth_from_endpoints / volatility_from_sums. cashflows(i) returns
+    window i's monthly net cashflows and is only called for those.
+    """
+    records = np.zeros(len(count), dtype=METRICS_DTYPE)
+    records["loss_flag"] = net_sum < 0
+    records["fraud_flag"] = micro_count > 0
+
+    # ---- growth: first vs last month of the window ----
+    has_growth = (count >= 2) & (first_net != 0)
+    change = (last_net - first_net)[has_growth]
+    growth_scaled = change.astype(np.float64) * 1e4 / np.abs(first_net[has_growth]).astype(np.float64)
+    growth_e4 = np.rint(growth_scaled).astype(np.int64)
+
+    growth_kind = np.full(len(change), DECIMAL_QUANTIZED, dtype=np.int8)
+    growth_kind[(growth_e4 == 0) & (change < 0)] = DECIMAL_NEGATIVE_ZERO
+    records["growth_e4"][has_growth] = growth_e4
+    records["growth_kind"][has_growth] = growth_kind
+
+    for i in np.flatnonzero(has_growth)[_near_half_step(growth_scaled)]:
+        growth = growth_from_endpoints(int(first_net[i]), int(last_net[i]))
+        records["growth_e4"][i], records["growth_kind"][i] = _encode_decimal(growth)
+
+    # ---- volatility: sqrt(n*Q - S*S) / S ----
+    records["stability"][(count > 0) & (net_sum <= 0)] = _STABILITY_CODES["loss_making"]
+
+    profitable = (count > 0) & (net_sum > 0)
+    n = count[profitable].astype(np.float64)
+    total = net_sum[profitable].astype(np.float64)
+    squares = np.asarray(net_sq_sum)[profitable].astype(np.float64)
+    spread = n * squares - total * total
+    # Conversions, products and the subtraction each add at most one
+    # rounding of the operands' magnitude; +1 covers integer truncation.
+    error = 1e-15 * (n * squares + total * total) + 1.0
+    cv_scaled = np.sqrt(np.maximum(spread, 0.0)) / total * 1e4
+    cv_low = np.sqrt(np.maximum(spread - error, 0.0)) / total * 1e4
+    cv_high = np.sqrt(spread + error) / total * 1e4
+
+    stability = np.where(
+        cv_scaled <= _CV_STABLE_E4, _STABILITY_CODES["stable"],
+        np.where(cv_scaled <= _CV_MODERATE_E4, _STABILITY_CODES["moderate"], _STABILITY_CODES["unstable"]),
+    )
+    records["cv_e4"][profitable] = np.rint(cv_scaled).astype(np.int64)
+    records["cv_kind"][profitable] = DECIMAL_QUANTIZED
+    records["stability"][profitable] = stability
+
+    ambiguous = (
+        (np.rint(cv_low) != np.rint(cv_high))
+        | _near_half_step(cv_low)
+        | _near_half_step(cv_high)
+        | ((cv_low <= _CV_STABLE_E4 + 1e-6) & (cv_high >= _CV_STABLE_E4 - 1e-6))
+        | ((cv_low <= _CV_MODERATE_E4 + 1e-6) & (cv_high >= _CV_MODERATE_E4 - 1e-6))
+    )
+    for i in np.flatnonzero(profitable)[ambiguous]:
+        volatility = volatility_from_sums(
+            int(count[i]), int(net_sum[i]), int(net_sq_sum[i]), lambda i=i: cashflows(i)
+        )
+        records["cv_e4"][i], records["cv_kind"][i] = _encode_decimal(volatility["cv"])
+        records["stability"][i] = _STABILITY_CODES[volatility["stability_level"]]
+
+    return records
+
+
+class RunningCashflowState:
+    """
+    Incrementally maintained monthly aggregates for one customer.
+
+    Each added transaction updates its month's credit/debit totals and the
+    running sum / sum of squares of monthly net cashflow in O(1), so the
+    customer's metrics can be refreshed without revisiting older data.
+    Months keep first-appearance order, like aggregate_by_month.
+    """
+
+    def __init__(self):
+        self.month_position: Dict[int, int] = {}
+        self.month_keys: List[int] = []
+        self.total_credit: List[int] = []
+        self.total_debit: List[int] = []
+        self.micro_counts: List[int] = []
+        self.first_month = None
+        self.last_month = None
+        self.micro_count = 0
+        self.net_sum = 0
+        self.net_sq_sum = 0
+
+    def _add_month(self, key: int) -> int:
+        i = self.month_position[key] = len(self.month_keys)
+        self.month_keys.append(key)
+        self.total_credit.append(0)
+        self.total_debit.append(0)
+        self.micro_counts.append(0)
+        if self.first_month is None or key < self.first_month:
+            self.first_month = key
+        if self.last_month is None or key > self.last_month:
+            self.last_month = key
+        return i
+
+    @classmethod
+    def from_monthly_rows(cls, month_keys, total_credit, total_debit, micro_count) -> "RunningCashflowState":
+        state = cls()
+        for key, credit, debit, micro in zip(month_keys, total_credit, total_debit, micro_count):
+            i = state._add_month(int(key))
+            state.total_credit[i] = int(credit)
+            state.total_debit[i] = int(debit)
+            state.micro_counts[i] = int(micro)
+            net = state.net_cashflow(i)
+            state.net_sum += net
+            state.net_sq_sum += net * net
+        state.micro_count = int(sum(micro_count))
+        return state
+
+    def net_cashflow(self, i: int) -> int:
+        return self.total_credit[i] - self.total_debit[i]
+
+    def add(self, key: int, amount_paise: int, type_code: int):
+        i = self.month_position.get(key)
+        if i is None:
+            i = self._add_month(key)
+
+        if type_code == TXN_DEBIT_MICRO:
+            self.micro_count += 1
+            self.micro_counts[i] += 1
+        if type_code not in (TXN_CREDIT, TXN_DEBIT):
+            return
+
+        old_net = self.net_cashflow(i)
+        if type_code == TXN_CREDIT:
+            self.total_credit[i] += amount_paise
+        else:
+            self.total_debit[i] += amount_paise
+        new_net = self.net_cashflow(i)
+        self.net_sum += new_net - old_net
+        self.net_sq_sum += new_net * new_net - old_net * old_net
+
+    def metrics_record(self) -> np.void:
+        record = np.zeros((), dtype=METRICS_DTYPE)[()]
+        count = len(self.month_keys)
+
+        growth = Decimal("0")
+        if count >= 2:
+            growth = growth_from_endpoints(
+                self.net_cashflow(self.month_position[self.first_month]),
+                self.net_cashflow(self.month_position[self.last_month]),
+            )
+
+        volatility = volatility_from_sums(
+            count, self.net_sum, self.net_sq_sum,
+            lambda: [self.net_cashflow(i) for i in range(count)],
+        )
+
+        record["growth_e4"], record["growth_kind"] = _encode_decimal(growth)
+        record["cv_e4"], record["cv_kind"] = _encode_decimal(volatility["cv"])
+        record["stability"] = _STABILITY_CODES[volatility["stability_level"]]
+        record["fraud_flag"] = self.micro_count > 0
+        record["loss_flag"] = self.net_sum < 0
+        return record
@@ -0,0 +1,112 @@
+# app/benchmarks/fixtures.py
+
+# Deterministic benchmark fixtures built with the vectorized generator.
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.dataset_shards import ShardWriter
+from app.core.transaction_table import TXN_CREDIT, TXN_TYPE_CODES, TransactionTable, month_from_key, paise_to_decimal
+from app.data.vectorized_generator import format_paise, generate_block, table_json_members, table_shard_lines
+
+FIXTURE_SEED = 1234
+
+_TYPE_NAMES = {code: name for name, code in TXN_TYPE_CODES.items()}
+
+
+class Fixture:
+    """
+    A portfolio of about `num_transactions` transactions (whole customers,
+    so slightly more), plus files derived from it on demand. Call cleanup()
+    to remove the files.
+    """
+
+    def __init__(self, num_transactions: int, seed: int = FIXTURE_SEED):
+        self.seed = seed
+        blocks, profiles, total, block = [], [], 0, 0
+        while total < num_transactions:
+            table, block_profiles = generate_block(seed, block, num_customers=10 ** 6, block_size=100)
+            blocks.append(table)
+            profiles.extend(block_profiles)
+            total += table.num_transactions
+            block += 1
+
+        table = TransactionTable.concatenate(blocks)
+        num_customers = max(1, int(np.searchsorted(table.offsets, num_transactions)))
+        self.table = table.head(num_customers)
+        self.profiles = profiles[:num_customers]
+        self.workdir = Path(tempfile.mkdtemp(prefix="risk-bench-"))
+        self._paths: Dict[str, Path] = {}
+
+    @property
+    def num_transactions(self) -> int:
+        return self.table.num_transactions
+
+    @property
+    def customer_ids(self) -> List[str]:
+        return self.table.customer_ids
+
+    def customer_transactions(self, i: int) -> List[Dict]:
+        """
+        Customer i as the dicts aggregate_by_month expects (Decimal amounts).
+        """
+        rows = slice(int(self.table.offsets[i]), int(self.table.offsets[i + 1]))
+        transactions = []
+        for key, paise, code in zip(
+            self.table.months[rows].tolist(), self.table.amounts[rows].tolist(), self.table.types[rows].tolist()
+        ):
+            year, month = month_from_key(key)
+            transactions.append({"year": year, "month": month, "amount": paise_to_decimal(paise), "type": _TYPE_NAMES[code]})
+        return transactions
+
+    def statement_text(self) -> str:
+        """
+        All transactions as one bank statement in the BankStatementParser layout.
+        """
+        rng = np.random.default_rng(self.seed)
+        days = rng.integers(1, 29, size=self.num_transactions).tolist()
+        lines = ["Date Type Amount Description"]
+        for i, (key, paise, code, day) in enumerate(zip(
+            self.table.months.tolist(), self.table.amounts.tolist(), self.table.types.tolist(), days
+        )):
+            year, month = month_from_key(key)
+            kind = "CR" if code == TXN_CREDIT else "DR"
+            lines.append(f"{day:02d}-{month:02d}-{year} {kind} {format_paise(paise)} TXN/{i}")
+        return "\n".join(lines)
+
+    def json_dataset(self) -> Path:
+        path = self._paths.get("json")
+        if path is None:
+            path = self._paths["json"] = self.workdir / "json" / "generated_transactions.json"
+            path.parent.mkdir(parents=True)
+            with open(path, "w") as f:
+                f.write("{")
+                f.write(table_json_members(self.table, self.profiles))
+                f.write("}")
+        return path
+
+    def sharded_dataset(self, num_shards: int = 8) -> Path:
+        path = self._paths.get("sharded")
+        if path is None:
+            path = self._paths["sharded"] = self.workdir / "sharded" / "generated_transactions"
+            per_shard = -(-len(self.customer_ids) // num_shards)
+            with ShardWriter(path, per_shard) as writer:
+                for line, count in table_shard_lines(self.table, self.profiles):
+                    writer.write_line(line, count)
+        return path
+
+    def loan_requests(self, count: int) -> List[Dict]:
+        rng = np.random.default_rng(self.seed + 1)
+        customers = rng.integers(0, len(self.customer_ids), size=count).tolist()
+        amounts = rng.choice([5000, 50000, 100000, 250000, 500000, 1000000, 5000000], size=count).tolist()
+        return [
+            {"customer_id": self.customer_ids[c], "loan_amount": a}
+            for c, a in zip(customers, amounts)
+        ]
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
@@ -0,0 +1,188 @@
+# app/benchmarks/harness.py
+
+# Timing, latency percentiles, peak memory and result files for the
+# benchmark suite.
+#
+# A benchmark body is a zero-argument callable. Bodies of self_timed cases
+# return the per-operation latencies (seconds) they measured themselves;
+# those feed the percentiles and their sum is the run time, so per-op setup
+# inside the body stays untimed. Other bodies' return values are ignored.
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+RESULTS_FORMAT_VERSION = 1
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """
+    Percentiles of per-operation latencies, in milliseconds.
+    """
+    values = np.asarray(latencies, dtype=np.float64) * 1e3
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max()),
+    }
+
+
+def peak_memory(body: Callable) -> int:
+    """
+    Peak bytes allocated (tracemalloc) while running body once.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        body()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def measure(
+    name: str,
+    size: int,
+    body: Callable[[], Optional[List[float]]],
+    ops: int,
+    unit: str,
+    repeat: int = 3,
+    self_timed: bool = False,
+    track_memory: bool = True,
+    extra: Optional[Dict] = None,
+) -> Dict:
+    """
+    Runs body `repeat` times and reports the fastest run; peak memory comes
+    from one more run under tracemalloc, kept separate so tracing overhead
+    never shows up in the timings.
+    """
+    best_seconds, best_latencies = None, None
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        started = time.perf_counter()
+        latencies = body()
+        seconds = time.perf_counter() - started
+        if self_timed:
+            seconds = float(sum(latencies))
+        else:
+            latencies = None
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds, best_latencies = seconds, latencies
+
+    result = {
+        "name": name,
+        "size": size,
+        "ops": ops,
+        "unit": unit,
+        "seconds": best_seconds,
+        "throughput": ops / best_seconds if best_seconds > 0 else None,
+        "latency": latency_summary(best_latencies) if best_latencies else None,
+        "peak_memory_bytes": peak_memory(body) if track_memory else None,
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def time_calls(calls: Callable[[], None], count: int) -> List[float]:
+    """
+    Latency of each of `count` invocations of calls().
+    """
+    clock = time.perf_counter
+    latencies = []
+    for _ in range(count):
+        started = clock()
+        calls()
+        latencies.append(clock() - started)
+    return latencies
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info() -> Dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(path: Path, results: List[Dict], config: Dict) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "format_version": RESULTS_FORMAT_VERSION,
+            "environment": environment_info(),
+            "config": config,
+            "results": results,
+        }, f, indent=2)
+    return path
+
+
+def load_results(path: Path) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[Dict]:
+    """
+    Matches results by (name, size); speedup > 1 means current is faster.
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["size"]))
+        if old is None or not old["seconds"] or not result["seconds"]:
+            continue
+        row = {
+            "name": result["name"],
+            "size": result["size"],
+            "baseline_seconds": old["seconds"],
+            "seconds": result["seconds"],
+            "speedup": old["seconds"] / result["seconds"],
+        }
+        if old.get("peak_memory_bytes") and result.get("peak_memory_bytes"):
+            row["memory_ratio"] = result["peak_memory_bytes"] / old["peak_memory_bytes"]
+        rows.append(row)
+    return rows
+
+
+def format_result(result: Dict) -> str:
+    line = f"{result['name']:<40} {result['size']:>9,} txns  {result['seconds'] * 1e3:10.2f} ms"
+    if result["throughput"]:
+        line += f"  {result['throughput']:>14,.0f} {result['unit']}/s"
+    if result["latency"]:
+        latency = result["latency"]
+        line += f"  p50 {latency['p50_ms']:.3f} p99 {latency['p99_ms']:.3f} ms"
+    if result["peak_memory_bytes"] is not None:
+        line += f"  peak {result['peak_memory_bytes'] / 2**20:.1f} MiB"
+    if result.get("source"):
+        line += f"  [{result['source']}]"
+    return line
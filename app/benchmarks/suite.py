@@ -0,0 +1,366 @@
+# app/benchmarks/suite.py
+
+# Benchmarks for every stage of the pipeline, from statement parsing to a
+# full agent round trip against the local stub LLM.
+#
+# Every benchmark takes a Fixture and returns result dicts (see
+# harness.measure); run_suite runs them for each fixture size.
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.benchmarks.fixtures import FIXTURE_SEED, Fixture
+from app.benchmarks.harness import format_result, measure, time_calls
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+# Per-call latency benchmarks sample at most this many calls.
+MAX_CALLS = 20_000
+
+AGENT_CALLS = 50
+
+IMPORT_RUNS = 10
+
+# Modules a bare `import app.agent.agent_handler` must not load; each of them
+# is loaded on first use instead (see agent_handler.warmup).
+LAZY_MODULES = (
+    "openai", "httpx", "dotenv", "numpy", "asyncio", "http.server", "app.core.risk_store", "app.tools.loan_tools",
+)
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.agent.agent_handler
+seconds = time.perf_counter() - started
+print(json.dumps({"seconds": seconds, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+_LOAN_AMOUNTS = [Decimal(a) for a in ("5000", "50000", "100000", "250000", "500000", "1000000", "5000000")]
+
+
+def _quiet():
+    # The agent and tools print on every call; keep the report readable.
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _load_store(data_path, min_parallel_bytes: Optional[int] = None, **kwargs):
+    """
+    Loads data_path into a fresh store. min_parallel_bytes overrides
+    risk_store.PARALLEL_MIN_BYTES for this load, so small fixtures can still
+    take the parallel path.
+    """
+    from app.core import risk_store
+
+    risk_store.DATA_PATH = data_path
+    risk_store.unload()
+    threshold = risk_store.PARALLEL_MIN_BYTES
+    if min_parallel_bytes is not None:
+        risk_store.PARALLEL_MIN_BYTES = min_parallel_bytes
+    try:
+        return risk_store.load_and_precompute(**kwargs)
+    finally:
+        risk_store.PARALLEL_MIN_BYTES = threshold
+
+
+def _store_source() -> Optional[str]:
+    from app.core import risk_store
+
+    return risk_store.store_info().get("source")
+
+
+def bench_parse_text(fixture: Fixture, repeat: int) -> List[Dict]:
+    from app.ingestion.parser import BankStatementParser
+
+    text = fixture.statement_text()
+    parser = BankStatementParser("cust_bench")
+    return [measure(
+        "parse_text", fixture.num_transactions, lambda: parser.parse_text(text),
+        ops=fixture.num_transactions, unit="lines", repeat=repeat,
+    )]
+
+
+def bench_dict_metrics(fixture: Fixture, repeat: int) -> List[Dict]:
+    from app.analysis.financial_metrics import aggregate_by_month, compute_cashflow_growth, compute_cashflow_volatility
+
+    def score(transactions):
+        monthly = aggregate_by_month(transactions)
+        compute_cashflow_growth(monthly)
+        compute_cashflow_volatility(monthly)
+
+    def body():
+        # Builds each customer's dicts untimed; times only the metrics calls.
+        latencies = []
+        for i in range(len(fixture.customer_ids)):
+            transactions = fixture.customer_transactions(i)
+            latencies.extend(time_calls(lambda: score(transactions), 1))
+        return latencies
+
+    return [measure(
+        "aggregate_by_month+volatility", fixture.num_transactions, body,
+        ops=fixture.num_transactions, unit="txns", repeat=repeat, self_timed=True,
+        extra={"latency_per": "customer"},
+    )]
+
+
+def bench_portfolio_metrics(fixture: Fixture, repeat: int) -> List[Dict]:
+    from app.analysis.financial_metrics import aggregate_portfolio_by_month, compute_portfolio_metrics
+
+    return [measure(
+        "portfolio_metrics (columnar)", fixture.num_transactions,
+        lambda: compute_portfolio_metrics(aggregate_portfolio_by_month(fixture.table)),
+        ops=fixture.num_transactions, unit="txns", repeat=repeat,
+    )]
+
+
+def bench_load_and_precompute(fixture: Fixture, repeat: int) -> List[Dict]:
+    json_path = fixture.json_dataset()
+    sharded_path = fixture.sharded_dataset()
+    size = fixture.num_transactions
+    results = []
+
+    for name, path, kwargs in (
+        ("load_and_precompute json", json_path, {"use_snapshot": False, "workers": 1}),
+        ("load_and_precompute json streaming", json_path, {"use_snapshot": False, "workers": 1, "streaming": True}),
+        ("load_and_precompute sharded", sharded_path, {"use_snapshot": False, "workers": 1}),
+        # Forced parallel (at least two workers, any fixture size): otherwise
+        # small fixtures or single-CPU hosts would quietly load serially.
+        ("load_and_precompute sharded parallel", sharded_path,
+         {"use_snapshot": False, "workers": max(2, os.cpu_count() or 1), "min_parallel_bytes": 0}),
+    ):
+        results.append(measure(
+            name, size, lambda: _load_store(path, **kwargs), ops=size, unit="txns", repeat=repeat,
+            # Worker processes allocate outside tracemalloc's view.
+            track_memory=kwargs["workers"] == 1,
+        ))
+        # The code path that actually ran ("serial", "sharded_parallel", ...).
+        results[-1]["source"] = _store_source()
+
+    _load_store(json_path, use_snapshot=True)
+    results.append(measure(
+        "load_and_precompute warm snapshot", size, lambda: _load_store(json_path, use_snapshot=True),
+        ops=size, unit="txns", repeat=repeat,
+    ))
+    results[-1]["source"] = _store_source()
+
+    _load_store(json_path, lazy=True)
+    results.append(measure(
+        "load_and_precompute lazy (indexed)", size, lambda: _load_store(json_path, lazy=True),
+        ops=size, unit="txns", repeat=repeat,
+    ))
+    results[-1]["source"] = _store_source()
+    return results
+
+
+def bench_rule_engine(fixture: Fixture, repeat: int) -> List[Dict]:
+    from app.core.rule_engine import evaluate_loan_eligibility, evaluate_loan_eligibility_batch
+
+    store = _load_store(fixture.json_dataset(), use_snapshot=False)
+    requests = fixture.loan_requests(min(MAX_CALLS, 20 * len(fixture.customer_ids)))
+    metrics = [store[request["customer_id"]] for request in requests]
+    amounts = [Decimal(request["loan_amount"]) for request in requests]
+    calls = len(requests)
+
+    def body():
+        latencies = []
+        for customer_metrics, amount in zip(metrics, amounts):
+            latencies.extend(time_calls(lambda: evaluate_loan_eligibility(customer_metrics, amount), 1))
+        return latencies
+
+    records, _ = store.records_for(fixture.customer_ids)
+    grid = records[:, None]
+    return [
+        measure(
+            "evaluate_loan_eligibility", fixture.num_transactions, body,
+            ops=calls, unit="calls", repeat=repeat, self_timed=True,
+        ),
+        measure(
+            "evaluate_loan_eligibility_batch", fixture.num_transactions,
+            lambda: evaluate_loan_eligibility_batch(grid, _LOAN_AMOUNTS),
+            ops=grid.size * len(_LOAN_AMOUNTS), unit="decisions", repeat=repeat,
+        ),
+    ]
+
+
+def bench_loan_tool(fixture: Fixture, repeat: int) -> List[Dict]:
+    from app.tools.loan_tools import DECISION_CACHE, get_customer_loan_eligibility
+
+    _load_store(fixture.json_dataset(), use_snapshot=False)
+    requests = fixture.loan_requests(min(MAX_CALLS, 20 * len(fixture.customer_ids)))
+
+    def run(clear_cache: bool):
+        def body():
+            if clear_cache:
+                DECISION_CACHE.clear()
+            latencies = []
+            for request in requests:
+                if clear_cache:
+                    DECISION_CACHE.clear()
+                latencies.extend(time_calls(
+                    lambda: get_customer_loan_eligibility(request["customer_id"], request["loan_amount"]), 1
+                ))
+            return latencies
+        return body
+
+    results = [
+        measure(
+            "get_customer_loan_eligibility uncached", fixture.num_transactions, run(True),
+            ops=len(requests), unit="calls", repeat=repeat, self_timed=True,
+        ),
+        measure(
+            "get_customer_loan_eligibility memoized", fixture.num_transactions, run(False),
+            ops=len(requests), unit="calls", repeat=repeat, self_timed=True,
+            extra={"decision_cache": DECISION_CACHE.stats()},
+        ),
+    ]
+    return results
+
+
+def bench_agent_end_to_end(fixture: Fixture, repeat: int) -> List[Dict]:
+    from openai import OpenAI
+
+    from app.scripts.stub_responses_server import start_stub_server
+
+    _load_store(fixture.json_dataset(), use_snapshot=False)
+    from app.agent import agent_handler
+
+    server = start_stub_server()
+    client = OpenAI(base_url=server.base_url, api_key="stub")
+    # get_client() returns whatever client is set, so no real one is built.
+    previous_client, agent_handler.client = agent_handler.client, client
+    previous_fast_path = agent_handler.FAST_PATH_ENABLED
+    try:
+        requests = fixture.loan_requests(AGENT_CALLS)
+        questions = [
+            f"Is {request['customer_id']} eligible for a {request['loan_amount']} rupees loan?"
+            for request in requests
+        ]
+
+        def run(fast_path: bool):
+            def body():
+                agent_handler.FAST_PATH_ENABLED = fast_path
+                latencies = []
+                with _quiet():
+                    for question in questions:
+                        latencies.extend(time_calls(lambda: agent_handler.run_agent(question), 1))
+                return latencies
+            return body
+
+        agent_handler.FAST_PATH_STATS.reset()
+        results = [
+            measure(
+                "run_agent end-to-end (stub LLM)", fixture.num_transactions, run(False),
+                ops=len(questions), unit="conversations", repeat=repeat, self_timed=True, track_memory=False,
+            ),
+            measure(
+                "run_agent fast path", fixture.num_transactions, run(True),
+                ops=len(questions), unit="conversations", repeat=repeat, self_timed=True, track_memory=False,
+            ),
+        ]
+        results[-1]["fast_path"] = agent_handler.fast_path_stats()
+        return results
+    finally:
+        agent_handler.FAST_PATH_ENABLED = previous_fast_path
+        agent_handler.client = previous_client
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def _import_agent(*flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(_REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    return subprocess.run(
+        [sys.executable, *flags, "-c", _IMPORT_PROBE],
+        capture_output=True, text=True, check=True, cwd=_REPO_ROOT, env=env,
+    )
+
+
+def _slowest_imports(importtime_log: str, count: int = 5) -> List[Dict]:
+    # `-X importtime` lines: "import time: <self us> | <cumulative us> | <module>"
+    entries = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        entries.append({"module": module.strip(), "self_ms": int(own) / 1e3, "cumulative_ms": int(cumulative) / 1e3})
+    return sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:count]
+
+
+def bench_import_agent(fixture: Fixture, repeat: int) -> List[Dict]:
+    loaded = set()
+
+    def body():
+        latencies = []
+        for _ in range(IMPORT_RUNS):
+            probe = json.loads(_import_agent().stdout)
+            loaded.update(probe["loaded"])
+            latencies.append(probe["seconds"])
+        return latencies
+
+    result = measure(
+        "import app.agent.agent_handler", fixture.num_transactions, body,
+        ops=IMPORT_RUNS, unit="imports", repeat=repeat, self_timed=True, track_memory=False,
+    )
+    result["eager_modules"] = sorted(loaded)
+    result["slowest_imports"] = _slowest_imports(_import_agent("-X", "importtime").stderr)
+    if loaded:
+        print(f"WARNING: importing app.agent.agent_handler loads {', '.join(sorted(loaded))}; keep them lazy")
+    return [result]
+
+
+BENCHMARKS: Dict[str, Callable[[Fixture, int], List[Dict]]] = {
+    "parse_text": bench_parse_text,
+    "dict_metrics": bench_dict_metrics,
+    "portfolio_metrics": bench_portfolio_metrics,
+    "load_and_precompute": bench_load_and_precompute,
+    "rule_engine": bench_rule_engine,
+    "loan_tool": bench_loan_tool,
+    "agent": bench_agent_end_to_end,
+    "import_agent": bench_import_agent,
+}
+
+
+def run_suite(
+    sizes=DEFAULT_SIZES,
+    only: Optional[List[str]] = None,
+    repeat: int = 3,
+    seed: int = FIXTURE_SEED,
+    verbose: bool = True,
+) -> List[Dict]:
+    """
+    Runs the selected benchmarks (all by default) for every fixture size and
+    returns their results.
+    """
+    from app.core import risk_store
+
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}; choose from {list(BENCHMARKS)}")
+
+    saved_path = risk_store.DATA_PATH
+    results = []
+    try:
+        for size in sizes:
+            fixture = Fixture(size, seed)
+            try:
+                for name in names:
+                    for result in BENCHMARKS[name](fixture, repeat):
+                        result["benchmark"] = name
+                        results.append(result)
+                        if verbose:
+                            print(format_result(result), flush=True)
+            finally:
+                fixture.cleanup()
+    finally:
+        risk_store.DATA_PATH = saved_path
+        risk_store.unload()
+    return results
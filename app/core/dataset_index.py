@@ -0,0 +1,184 @@
+# app/core/dataset_index.py
+
+# Persistent byte-offset index: customer_id -> where that customer's record
+# lives in the dataset (file, byte offset, byte length).
+#
+# Works for both dataset layouts: for generated_transactions.json the range
+# covers the customer's payload object, for a sharded dataset it covers the
+# customer's line. The index is saved as plain .npy files that np.load can
+# memory-map, keyed by dataset_tag and dataset_fingerprint, so it is built
+# once per dataset version and later opened in constant time.
+
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core import instrumentation
+from app.core.dataset_shards import dataset_root, iter_shard_spans, records_table, shard_paths
+from app.core.dataset_stream import decode_customer_payload, iter_customer_payload_spans
+from app.core.keyed_dirs import publish_keyed_dir
+from app.core.metrics_snapshot import dataset_fingerprint, dataset_tag
+from app.core.transaction_table import TransactionTable, TransactionTableBuilder
+
+INDEX_FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("customer_ids", "file_index", "offsets", "lengths")
+_FILES_FILE = "files.json"
+_META_FILE = "meta.json"
+
+
+def default_index_dir(data_path: Path) -> Path:
+    root = dataset_root(data_path)
+    return (root or Path(data_path)).parent / ".risk_index"
+
+
+def index_key(data_path: Path) -> str:
+    return f"{dataset_tag(data_path)}-{dataset_fingerprint(data_path)[:28]}-v{INDEX_FORMAT_VERSION}"
+
+
+class DatasetIndex:
+    """
+    Sorted customer ids with the (file, offset, length) of their records.
+    """
+
+    def __init__(
+        self,
+        files: List[Path],
+        sharded: bool,
+        customer_ids: np.ndarray,
+        file_index: np.ndarray,
+        offsets: np.ndarray,
+        lengths: np.ndarray,
+    ):
+        self.files = files
+        self.sharded = sharded
+        self.customer_ids = customer_ids
+        self.file_index = file_index
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def position(self, customer_id) -> int:
+        if not isinstance(customer_id, str):
+            return -1
+        i = int(np.searchsorted(self.customer_ids, customer_id))
+        if i < len(self.customer_ids) and self.customer_ids[i] == customer_id:
+            return i
+        return -1
+
+    def locate(self, customer_id: str) -> Optional[Tuple[Path, int, int]]:
+        i = self.position(customer_id)
+        if i < 0:
+            return None
+        return self.files[int(self.file_index[i])], int(self.offsets[i]), int(self.lengths[i])
+
+    def read_customer_table(self, customer_id: str) -> Optional[TransactionTable]:
+        """
+        Seeks to the customer's record and decodes only that record.
+        """
+        location = self.locate(customer_id)
+        if location is None:
+            return None
+        path, offset, length = location
+        with open(path, "rb") as f:
+            f.seek(offset)
+            text = f.read(length).decode("utf-8")
+
+        if self.sharded:
+            table, _ = records_table([json.loads(text)])
+            return table
+        builder = TransactionTableBuilder()
+        builder.add_customer_rows(customer_id, decode_customer_payload(text)["transactions"])
+        return builder.build()
+
+    @classmethod
+    def build(cls, data_path: Path) -> "DatasetIndex":
+        """
+        Scans the dataset once, recording every customer's byte range.
+        """
+        root = dataset_root(data_path)
+        if root is not None:
+            files = shard_paths(root)
+            spans = ((i, span) for i, path in enumerate(files) for span in iter_shard_spans(path))
+        else:
+            files = [Path(data_path)]
+            spans = ((0, span) for span in iter_customer_payload_spans(data_path))
+
+        customer_ids, file_index, offsets, lengths = [], [], [], []
+        for i, (customer_id, start, end) in spans:
+            customer_ids.append(customer_id)
+            file_index.append(i)
+            offsets.append(start)
+            lengths.append(end - start)
+
+        ids = np.asarray(customer_ids, dtype=str) if customer_ids else np.zeros(0, dtype="U1")
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        if len(ids) > 1 and np.any(ids[1:] == ids[:-1]):
+            raise ValueError(f"Duplicate customer_id in dataset: {data_path}")
+        return cls(
+            files=files,
+            sharded=root is not None,
+            customer_ids=ids,
+            file_index=np.asarray(file_index, dtype=np.int32)[order],
+            offsets=np.asarray(offsets, dtype=np.int64)[order],
+            lengths=np.asarray(lengths, dtype=np.int64)[order],
+        )
+
+    def save(self, index_dir: Path, key: str) -> Path:
+        """
+        Writes the index atomically and removes the dataset's indexes for
+        other keys.
+        """
+        def write(staging: Path):
+            for name in _COLUMNS:
+                np.save(staging / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+            with open(staging / _FILES_FILE, "w") as f:
+                json.dump({"sharded": self.sharded, "files": [str(path.resolve()) for path in self.files]}, f)
+            # meta.json is written last: its presence marks a complete index.
+            with open(staging / _META_FILE, "w") as f:
+                json.dump({"key": key, "customers": len(self), "format_version": INDEX_FORMAT_VERSION}, f)
+
+        return publish_keyed_dir(index_dir, key, write)
+
+    @classmethod
+    def load(cls, index_dir: Path, key: str) -> Optional["DatasetIndex"]:
+        path = Path(index_dir) / key
+        if not (path / _META_FILE).exists():
+            return None
+        try:
+            columns = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _COLUMNS}
+            with open(path / _FILES_FILE, "r") as f:
+                files = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable dataset index %s: %s", path, e)
+            instrumentation.inc("risk_store_index_errors_total", operation="read")
+            return None
+        return cls(files=[Path(p) for p in files["files"]], sharded=files["sharded"], **columns)
+
+
+def load_or_build_index(data_path: Path, index_dir: Optional[Path] = None) -> DatasetIndex:
+    """
+    The persisted index for the current version of the dataset, building
+    (and saving) it first if needed.
+    """
+    index_dir = Path(index_dir) if index_dir is not None else default_index_dir(data_path)
+    key = index_key(data_path)
+    index = DatasetIndex.load(index_dir, key)
+    if index is not None:
+        return index
+
+    index = DatasetIndex.build(data_path)
+    try:
+        index.save(index_dir, key)
+    except OSError as e:
+        logger.warning("Could not write dataset index to %s: %s", index_dir, e)
+        instrumentation.inc("risk_store_index_errors_total", operation="write")
+    return index
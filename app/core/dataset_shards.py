@@ -0,0 +1,266 @@
+# app/core/dataset_shards.py
+
+# Sharded, line-delimited dataset format.
+#
+# A dataset is a directory holding manifest.json and N shard files
+# (shard-00000.jsonl, ...). Every line of a shard is one customer, with the
+# transactions stored column-wise:
+#
+#   {"customer_id": "cust_001", "profile": "stable",
+#    "year": [2025, ...], "month": [1, ...], "amount_paise": [1234550, ...],
+#    "type": ["credit", ...]}
+#
+# Amounts are integer paise, so a shard decodes straight into a
+# TransactionTable without per-transaction Decimal parsing, and shards can be
+# written, read and scored independently (in parallel or one at a time).
+
+import json
+import os
+import re
+import shutil
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.dataset_stream import iter_customer_payloads
+from app.core.transaction_table import (
+    MONTH_EPOCH_YEAR,
+    TXN_OTHER,
+    TXN_TYPE_CODES,
+    TransactionTable,
+)
+
+SHARD_FORMAT = "customer-jsonl"
+SHARD_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+_TYPE_NAMES = {code: name for name, code in TXN_TYPE_CODES.items()}
+_TYPE_NAMES[TXN_OTHER] = "other"
+
+
+def shard_name(index: int) -> str:
+    return f"shard-{index:05d}.jsonl"
+
+
+def dataset_root(path: Path) -> Optional[Path]:
+    """
+    The dataset directory if `path` is a sharded dataset (its directory or
+    its manifest), else None.
+    """
+    path = Path(path)
+    if path.is_dir() and (path / MANIFEST_FILE).is_file():
+        return path
+    if path.name == MANIFEST_FILE and path.is_file():
+        return path.parent
+    return None
+
+
+def is_sharded_dataset(path: Path) -> bool:
+    return dataset_root(path) is not None
+
+
+def read_manifest(path: Path) -> Dict:
+    root = dataset_root(path)
+    if root is None:
+        raise ValueError(f"Not a sharded dataset: {path}")
+    with open(root / MANIFEST_FILE, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SHARD_FORMAT or manifest.get("version") != SHARD_FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset format in {root / MANIFEST_FILE}")
+    return manifest
+
+
+def shard_paths(path: Path) -> List[Path]:
+    root = dataset_root(path)
+    return [root / shard["file"] for shard in read_manifest(root)["shards"]]
+
+
+def encode_customer_line(
+    customer_id: str,
+    profile: Optional[str],
+    month_keys,
+    amounts_paise,
+    type_codes,
+) -> str:
+    """
+    One shard line from a customer's (month_key, amount_paise, type_code)
+    columns (arrays or lists).
+    """
+    years, months = np.divmod(np.asarray(month_keys, dtype=np.int64), 12)
+    record = {"customer_id": customer_id}
+    if profile is not None:
+        record["profile"] = profile
+    record["year"] = (years + MONTH_EPOCH_YEAR).tolist()
+    record["month"] = (months + 1).tolist()
+    record["amount_paise"] = np.asarray(amounts_paise, dtype=np.int64).tolist()
+    record["type"] = [_TYPE_NAMES[code] for code in np.asarray(type_codes, dtype=np.int64).tolist()]
+    return json.dumps(record, separators=(",", ":"))
+
+
+class ShardWriter:
+    """
+    Streams customer lines into shard files, starting a new shard every
+    `customers_per_shard` customers, and writes the manifest on close().
+
+    Everything goes to a staging directory that replaces `directory` only
+    once complete, so readers never see a half-written dataset.
+    """
+
+    def __init__(self, directory: Path, customers_per_shard: int, metadata: Optional[Dict] = None):
+        self.directory = Path(directory)
+        self.customers_per_shard = max(1, int(customers_per_shard))
+        self.metadata = metadata or {}
+        self.directory.parent.mkdir(parents=True, exist_ok=True)
+        self._staging = self.directory.with_name(self.directory.name + ".tmp")
+        shutil.rmtree(self._staging, ignore_errors=True)
+        self._staging.mkdir()
+        self._shards: List[Dict] = []
+        self._file = None
+
+    def write_line(self, line: str, num_transactions: int):
+        if self._file is None or self._shards[-1]["customers"] >= self.customers_per_shard:
+            self._open_next()
+        self._file.write(line)
+        self._file.write("\n")
+        shard = self._shards[-1]
+        shard["customers"] += 1
+        shard["transactions"] += int(num_transactions)
+
+    def start_shard(self):
+        """
+        Starts a new shard even if the current one is not full, e.g. to keep
+        the shard layout of a dataset being rewritten.
+        """
+        self._open_next()
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        name = shard_name(len(self._shards))
+        self._file = open(self._staging / name, "w")
+        self._shards.append({"file": name, "customers": 0, "transactions": 0})
+
+    def close(self) -> Path:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for shard in self._shards:
+            shard["bytes"] = (self._staging / shard["file"]).stat().st_size
+
+        manifest = {
+            "format": SHARD_FORMAT,
+            "version": SHARD_FORMAT_VERSION,
+            "amount_unit": "paise",
+            "customers": sum(shard["customers"] for shard in self._shards),
+            "transactions": sum(shard["transactions"] for shard in self._shards),
+            "shards": self._shards,
+            **self.metadata,
+        }
+        with open(self._staging / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        os.replace(self._staging, self.directory)
+        return self.directory
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_shard_lines(shard_path: Path) -> Iterator[Dict]:
+    with open(shard_path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_shard_table(shard_path: Path) -> Tuple[TransactionTable, List[Optional[str]]]:
+    """
+    Decodes one shard into a TransactionTable plus each customer's profile.
+    """
+    return records_table(iter_shard_lines(shard_path))
+
+
+def records_table(records: Iterable[Dict]) -> Tuple[TransactionTable, List[Optional[str]]]:
+    """
+    TransactionTable (plus profiles) from decoded shard lines.
+    """
+    customer_ids, profiles = [], []
+    offsets = array("q", [0])
+    years, months, amounts, types = [], [], [], []
+    type_codes = TXN_TYPE_CODES
+    for record in records:
+        customer_ids.append(record["customer_id"])
+        profiles.append(record.get("profile"))
+        years.extend(record["year"])
+        months.extend(record["month"])
+        amounts.extend(record["amount_paise"])
+        types.extend([type_codes.get(name, TXN_OTHER) for name in record["type"]])
+        offsets.append(len(amounts))
+
+    month_keys = (np.array(years, dtype=np.int64) - MONTH_EPOCH_YEAR) * 12 + np.array(months, dtype=np.int64) - 1
+    table = TransactionTable(
+        customer_ids=customer_ids,
+        offsets=np.frombuffer(offsets, dtype=np.int64),
+        months=month_keys.astype(np.int16),
+        amounts=np.array(amounts, dtype=np.int64),
+        types=np.array(types, dtype=np.int8),
+    )
+    return table, profiles
+
+
+_CUSTOMER_ID_PREFIX = re.compile(rb'\{\s*"customer_id"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def iter_shard_spans(shard_path: Path) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yields (customer_id, start, end) byte ranges of the lines of a shard.
+    """
+    with open(shard_path, "rb") as f:
+        position = 0
+        for line in f:
+            start, position = position, position + len(line)
+            if not line.strip():
+                continue
+            match = _CUSTOMER_ID_PREFIX.match(line)
+            if match:
+                customer_id = json.loads(match.group(1))
+            else:
+                customer_id = json.loads(line)["customer_id"]
+            yield customer_id, start, position
+
+
+def convert_json_dataset(json_path: Path, directory: Path, num_shards: int = 8) -> Path:
+    """
+    Rewrites a generated_transactions.json-style file as a sharded dataset,
+    streaming one customer at a time.
+    """
+    customers = sum(1 for _ in iter_customer_payloads(json_path))
+    per_shard = -(-customers // max(1, num_shards)) if customers else 1
+    with ShardWriter(directory, per_shard, {"source": str(json_path)}) as writer:
+        for customer_id, payload in iter_customer_payloads(json_path):
+            rows = payload["transactions"]
+            line = encode_customer_line(
+                customer_id,
+                payload.get("profile"),
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                [row[2] for row in rows],
+            )
+            writer.write_line(line, len(rows))
+    return Path(directory)
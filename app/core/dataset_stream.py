@@ -0,0 +1,142 @@
+# app/core/dataset_stream.py
+
+# Incremental reader for generated_transactions.json.
+#
+# The dataset is one large JSON object {customer_id: payload, ...}. Instead of
+# json.load-ing all of it, customers are decoded one at a time from a bounded
+# text buffer, and every transaction is collapsed into a compact
+# (month_key, amount_paise, type_code) tuple while it is being decoded.
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from app.core.transaction_table import TXN_OTHER, TXN_TYPE_CODES, month_key, parse_amount_paise
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = " \t\n\r"
+
+
+def _compact_transaction(obj: Dict):
+    if "amount" in obj and "type" in obj and "month" in obj:
+        return (
+            month_key(obj["year"], obj["month"]),
+            parse_amount_paise(obj["amount"]),
+            TXN_TYPE_CODES.get(obj["type"], TXN_OTHER),
+        )
+    return obj
+
+
+_DECODER = json.JSONDecoder(object_hook=_compact_transaction)
+_PLAIN_DECODER = json.JSONDecoder()
+
+
+def iter_customer_payloads(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yields (customer_id, payload) pairs one customer at a time.
+
+    payload["transactions"] holds (month_key, amount_paise, type_code) tuples.
+    Memory is bounded by the largest single customer plus one read chunk.
+    """
+    return _iter_members(path, chunk_size, raw=False)
+
+
+def iter_customer_payload_texts(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+    """
+    Like iter_customer_payloads, but yields each payload as its raw JSON text
+    (to be decoded elsewhere with decode_customer_payload).
+    """
+    return _iter_members(path, chunk_size, raw=True)
+
+
+def decode_customer_payload(text: str) -> Dict:
+    return _DECODER.decode(text)
+
+
+def iter_customer_payload_spans(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yields (customer_id, start, end): the byte range of each customer's
+    payload in the file, so it can later be read back with a seek.
+    """
+    # latin-1 maps every byte to one character, so character positions are
+    # byte offsets; customer ids are re-decoded as UTF-8.
+    for customer_id, (start, end) in _iter_members(path, chunk_size, raw=False, spans=True):
+        yield customer_id.encode("latin-1").decode("utf-8"), start, end
+
+
+def _iter_members(path: Path, chunk_size: int, raw: bool, spans: bool = False):
+    encoding = "latin-1" if spans else None
+    with open(path, "r", encoding=encoding, newline="" if spans else None) as f:
+        buffer = ""
+        pos = 0
+        base = 0  # file position of buffer[0]
+        eof = False
+
+        def fill(min_chars: int) -> bool:
+            nonlocal buffer, pos, base, eof
+            if eof:
+                return False
+            data = f.read(max(chunk_size, min_chars))
+            if not data:
+                eof = True
+                return False
+            base += pos
+            buffer = buffer[pos:] + data
+            pos = 0
+            return True
+
+        def next_char() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill(0):
+                    raise ValueError(f"Unexpected end of dataset: {path}")
+
+        def decode_value(decoder=_DECODER, keep_text=False):
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Incomplete value: grow the buffer geometrically and retry.
+                    if not fill(len(buffer) - pos):
+                        raise
+                    continue
+                if keep_text:
+                    value = buffer[pos:end]
+                pos = end
+                return value
+
+        if next_char() != "{":
+            raise ValueError(f"Dataset must be a JSON object: {path}")
+        pos += 1
+
+        if next_char() == "}":
+            return
+        while True:
+            customer_id = decode_value()
+            if next_char() != ":":
+                raise ValueError(f"Malformed dataset near customer {customer_id!r}: {path}")
+            pos += 1
+            next_char()
+            if spans:
+                start = base + pos
+                decode_value(_PLAIN_DECODER)
+                yield customer_id, (start, base + pos)
+            elif raw:
+                # Only locate the payload's end (in C); keep its text as-is.
+                yield customer_id, decode_value(_PLAIN_DECODER, keep_text=True)
+            else:
+                yield customer_id, decode_value()
+
+            separator = next_char()
+            pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed dataset after customer {customer_id!r}: {path}")
+            next_char()
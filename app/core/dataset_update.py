@@ -0,0 +1,152 @@
+# app/core/dataset_update.py
+
+# Writes new transactions back into the source dataset.
+#
+# Encoded (month_key, amount_paise, type_code) rows are merged into the
+# customers' existing transactions, and unknown customers are added at the
+# end. The dataset is rewritten by streaming it one customer at a time, and
+# the result replaces the original only once it is complete. A sharded dataset
+# keeps its shard layout. A generated_transactions.json-style file is
+# rewritten compactly: untouched customers are copied verbatim.
+#
+# The rewrite changes the dataset's size/mtime, so snapshot and index keys
+# derived from it (metrics_snapshot.dataset_fingerprint) change too and stale
+# snapshots or indexes are never reused.
+
+import json
+import os
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from app.core.dataset_shards import ShardWriter, dataset_root, encode_customer_line, read_manifest, shard_paths
+from app.core.dataset_stream import iter_customer_payload_texts
+from app.core.transaction_table import TXN_OTHER, TXN_TYPE_CODES, month_from_key, paise_to_decimal
+
+
+class PackedRows(Sequence):
+    """
+    (month_key, amount_paise, type_code) rows packed into one int64 array
+    (24 bytes a row instead of a tuple each), for buffering many rows
+    before a merge.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values = array("q")
+
+    def extend(self, rows):
+        for row in rows:
+            self._values.extend(row)
+
+    def __len__(self) -> int:
+        return len(self._values) // 3
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        values = self._values
+        return values[3 * index], values[3 * index + 1], values[3 * index + 2]
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        values = iter(self._values)
+        return zip(values, values, values)
+
+
+Rows = Union[List[Tuple[int, int, int]], PackedRows]
+
+_TYPE_NAMES = {code: name for name, code in TXN_TYPE_CODES.items()}
+_TYPE_NAMES[TXN_OTHER] = "other"
+
+_MANIFEST_FIELDS = ("format", "version", "amount_unit", "customers", "transactions", "shards")
+
+
+def merge_transaction_rows(data_path: Path, updates: Dict[str, Rows]) -> int:
+    """
+    Appends each customer's rows in `updates` to the dataset at data_path
+    (a sharded dataset or a JSON file). Returns the number of rows written.
+    """
+    if not updates:
+        return 0
+    if dataset_root(data_path) is not None:
+        _merge_sharded(dataset_root(data_path), updates)
+    else:
+        _merge_json(Path(data_path), updates)
+    return sum(len(rows) for rows in updates.values())
+
+
+def _merge_sharded(root: Path, updates: Dict[str, Rows]):
+    manifest = read_manifest(root)
+    metadata = {key: value for key, value in manifest.items() if key not in _MANIFEST_FIELDS}
+    customers_per_shard = max((shard["customers"] for shard in manifest["shards"]), default=0) or len(updates)
+    pending = dict(updates)
+
+    with ShardWriter(root, customers_per_shard, metadata) as writer:
+        for path in shard_paths(root):
+            writer.start_shard()
+            with open(path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    rows = pending.pop(record["customer_id"], None)
+                    if rows:
+                        for key, paise, code in rows:
+                            year, month = month_from_key(key)
+                            record["year"].append(year)
+                            record["month"].append(month)
+                            record["amount_paise"].append(paise)
+                            record["type"].append(_TYPE_NAMES[code])
+                        line = json.dumps(record, separators=(",", ":"))
+                    writer.write_line(line.rstrip("\n"), len(record["amount_paise"]))
+
+        for customer_id, rows in pending.items():
+            line = encode_customer_line(
+                customer_id, None, [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+            )
+            writer.write_line(line, len(rows))
+
+
+def _transaction_dicts(customer_id: str, rows: Rows) -> List[Dict]:
+    transactions = []
+    for key, paise, code in rows:
+        year, month = month_from_key(key)
+        transactions.append({
+            "customer_id": customer_id,
+            "year": year,
+            "month": month,
+            "amount": str(paise_to_decimal(paise)),
+            "type": _TYPE_NAMES[code],
+        })
+    return transactions
+
+
+def _merge_json(path: Path, updates: Dict[str, Rows]):
+    pending = dict(updates)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            f.write("{")
+            first = True
+            for customer_id, text in iter_customer_payload_texts(path):
+                rows = pending.pop(customer_id, None)
+                if rows:
+                    payload = json.loads(text)
+                    payload["transactions"].extend(_transaction_dicts(customer_id, rows))
+                    text = json.dumps(payload)
+                f.write(("" if first else ", ") + f"{json.dumps(customer_id)}: {text}")
+                first = False
+            for customer_id, rows in pending.items():
+                payload = {"profile": None, "transactions": _transaction_dicts(customer_id, rows)}
+                f.write(("" if first else ", ") + f"{json.dumps(customer_id)}: {json.dumps(payload)}")
+                first = False
+            f.write("}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
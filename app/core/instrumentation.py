@@ -0,0 +1,237 @@
+# app/core/instrumentation.py
+
+# Process-wide counters, gauges and latency histograms for the eligibility
+# path, exported in the Prometheus text format.
+#
+# Disabled by default (set APP_METRICS=1 or call enable()). While disabled
+# every recording function returns immediately; hot paths additionally
+# check `instrumentation.ENABLED` before building labels, so the disabled
+# cost there is one attribute lookup.
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+ENABLED = os.getenv("APP_METRICS", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Seconds; upper bounds of the latency histogram buckets (+Inf is implicit).
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[Tuple[str, Tuple], float] = {}
+_GAUGES: Dict[Tuple[str, Tuple], float] = {}
+# (name, labels) -> [per-bucket counts..., +Inf count, sum]
+_HISTOGRAMS: Dict[Tuple[str, Tuple], List[float]] = {}
+
+_NULL_TIMER = nullcontext()
+
+_HELP = {
+    "risk_store_load_seconds": "Time to make the risk store available, by source.",
+    "risk_store_customers": "Customers in the active risk store.",
+    "risk_store_generation": "Generation of the active risk store; increases on every load or reload.",
+    "risk_store_snapshot_errors_total": "Risk snapshots that could not be read or written, by operation.",
+    "risk_store_index_errors_total": "Dataset indexes that could not be read or written, by operation.",
+    "risk_store_reload_total": "Risk store reloads, by outcome (ok or error).",
+    "risk_store_window_series_seconds": "Time to build the rolling-window prefix sums of a risk store.",
+    "loan_decisions_total": "Eligibility decisions returned by the loan tools, by reason_code.",
+    "decision_cache_lookups_total": "Decision cache lookups, by result.",
+    "rule_evaluation_seconds": "Rule engine evaluation time, by mode.",
+    "agent_run_seconds": "End-to-end agent conversation time, by mode.",
+    "agent_llm_request_seconds": "Responses API call time, by stage.",
+    "agent_llm_first_token_seconds": "Time from a streamed Responses API call to its first text delta, by stage.",
+    "agent_first_chunk_seconds": "Time from the start of a streamed conversation to its first answer chunk.",
+    "agent_tools_seconds": "Time to execute all tool calls of one response.",
+    "agent_tool_seconds": "Time of a single tool call, by tool.",
+    "agent_tool_errors_total": "Tool calls that returned an error, by tool.",
+    "agent_rejected_total": "Async conversations rejected for lack of a slot.",
+    "agent_preload_errors_total": "Background risk store preloads that failed.",
+    "agent_fast_path_total": "Questions offered to the local fast path, by result (hit or miss).",
+    "agent_fast_path_seconds": "Time to answer a question on the local fast path.",
+}
+
+
+def enable(enabled: bool = True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def describe(name: str, help_text: str):
+    _HELP[name] = help_text
+
+
+def _key(name: str, labels: Dict) -> Tuple[str, Tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0.0) + amount
+
+
+def set_gauge(name: str, value: float, **labels):
+    if not ENABLED:
+        return
+    with _LOCK:
+        _GAUGES[_key(name, labels)] = float(value)
+
+
+def observe(name: str, value: float, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, value)
+    with _LOCK:
+        histogram = _HISTOGRAMS.get(key)
+        if histogram is None:
+            histogram = _HISTOGRAMS[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+        histogram[bucket] += 1
+        histogram[-1] += value
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started, outcome="error" if exc_type else "ok", **self.labels)
+        return False
+
+
+def timer(name: str, **labels):
+    """
+    Context manager observing the duration of its block (seconds) in the
+    `name` histogram, labelled outcome="ok" or "error".
+    """
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def reset():
+    with _LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _HISTOGRAMS.clear()
+
+
+def snapshot() -> Dict:
+    """
+    Current values as plain dicts: {name: {labels_tuple: value}}; histograms
+    map to {"count", "sum", "buckets"}.
+    """
+    result = {"counters": {}, "gauges": {}, "histograms": {}}
+    with _LOCK:
+        for (name, labels), value in _COUNTERS.items():
+            result["counters"].setdefault(name, {})[labels] = value
+        for (name, labels), value in _GAUGES.items():
+            result["gauges"].setdefault(name, {})[labels] = value
+        for (name, labels), histogram in _HISTOGRAMS.items():
+            result["histograms"].setdefault(name, {})[labels] = {
+                "count": int(sum(histogram[:-1])),
+                "sum": histogram[-1],
+                "buckets": list(histogram[:-1]),
+            }
+    return result
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple, extra: Optional[Tuple] = None) -> str:
+    pairs = list(labels) + list(extra or ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def export_prometheus() -> str:
+    """
+    All metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+    with _LOCK:
+        counters = sorted(_COUNTERS.items())
+        gauges = sorted(_GAUGES.items())
+        histograms = sorted((key, list(value)) for key, value in _HISTOGRAMS.items())
+
+    lines = []
+    seen = set()
+
+    def header(name: str, kind: str):
+        if name in seen:
+            return
+        seen.add(name)
+        if name in _HELP:
+            lines.append(f"# HELP {name} {_HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), value in gauges:
+        header(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), histogram in histograms:
+        header(name, "histogram")
+        cumulative = 0.0
+        for bound, count in zip(LATENCY_BUCKETS, histogram):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', repr(bound)),))} {_format_value(cumulative)}")
+        cumulative += histogram[len(LATENCY_BUCKETS)]
+        lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {_format_value(cumulative)}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {repr(histogram[-1])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(host: str = "127.0.0.1", port: int = 9108) -> "ThreadingHTTPServer":
+    """
+    Serves GET /metrics from a daemon thread; call .shutdown() to stop it.
+    Also enables recording.
+    """
+    # Imported here: most processes never serve metrics.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = export_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,49 @@
+# app/core/keyed_dirs.py
+
+# Atomic publishing of keyed artifact directories (metrics snapshots, dataset
+# indexes).
+#
+# Artifacts live under a shared parent such as data/.risk_snapshots/, one
+# directory per key. Keys are "<dataset tag>-<version>": the tag (see
+# metrics_snapshot.dataset_tag) identifies the dataset, the rest its version.
+# Publishing a new version only removes older versions of the same dataset,
+# so datasets sharing the parent directory do not delete each other's files.
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+_STAGING_PREFIX = ".tmp-"
+
+
+def key_tag(key: str) -> str:
+    return key.split("-", 1)[0]
+
+
+def publish_keyed_dir(parent: Path, key: str, write: Callable[[Path], None]) -> Path:
+    """
+    Calls write(staging) to fill a fresh staging directory under parent,
+    then swaps it in as parent/key and removes the other versions with the
+    same dataset tag.
+    """
+    parent = Path(parent)
+    parent.mkdir(parents=True, exist_ok=True)
+    target = parent / key
+
+    staging = Path(tempfile.mkdtemp(prefix=_STAGING_PREFIX, dir=parent))
+    try:
+        write(staging)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    prefix = key_tag(key) + "-"
+    for stale in parent.iterdir():
+        if stale.is_dir() and stale.name != key and stale.name.startswith(prefix):
+            shutil.rmtree(stale, ignore_errors=True)
+    return target
@@ -0,0 +1,121 @@
+# app/core/lazy_metrics.py
+
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.analysis.financial_metrics import (
+    METRICS_DTYPE,
+    aggregate_portfolio_by_month,
+    compute_portfolio_metrics,
+)
+from app.core.dataset_index import DatasetIndex
+from app.core.metrics_table import OverlayMetricsMapping
+from app.core.transaction_table import MonthlyTable
+
+
+class LazyMetricsStore(OverlayMetricsMapping):
+    """
+    customer_id -> metrics mapping that scores customers on first use.
+
+    A miss seeks to the customer's record through the DatasetIndex, scores
+    just that customer and keeps the METRICS_DTYPE record in an LRU of at
+    most `max_entries` customers; memory follows that budget, not the size
+    of the portfolio. Offers the same lookup API as MetricsTable, so
+    risk_store can serve either one; records replaced by set_record live in
+    the overlay, which is never evicted.
+    """
+
+    def __init__(self, index: DatasetIndex, max_entries: int = 10_000):
+        self.index = index
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, np.void]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        super().__init__()
+
+    def position(self, customer_id) -> int:
+        return self.index.position(customer_id)
+
+    def _score(self, customer_id: str) -> Optional[Tuple[MonthlyTable, np.void]]:
+        table = self.index.read_customer_table(customer_id)
+        if table is None:
+            return None
+        monthly = aggregate_portfolio_by_month(table)
+        return monthly, compute_portfolio_metrics(monthly)[0]
+
+    def _base_record(self, customer_id: str) -> Optional[np.void]:
+        with self._lock:
+            record = self._lru.get(customer_id)
+            if record is not None:
+                self._lru.move_to_end(customer_id)
+                self.hits += 1
+                return record
+            self.misses += 1
+
+        scored = self._score(customer_id)
+        if scored is None:
+            return None
+        record = scored[1]
+        with self._lock:
+            self._lru[customer_id] = record
+            self._lru.move_to_end(customer_id)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+        return record
+
+    def _base_records_for(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        records = np.zeros(ids.shape, dtype=METRICS_DTYPE)
+        found = np.zeros(ids.shape, dtype=np.bool_)
+        flat_records = records.reshape(-1)
+        flat_found = found.reshape(-1)
+        for i, customer_id in enumerate(ids.ravel().tolist()):
+            if customer_id in self._overlay:
+                # Filled in from the overlay; no need to score the customer.
+                continue
+            record = self._base_record(customer_id)
+            if record is not None:
+                flat_records[i] = record
+                flat_found[i] = True
+        return records, found
+
+    def monthly_rows(self, customer_id: str) -> Optional[Tuple[List, List, List, List]]:
+        """
+        (month_keys, total_credit, total_debit, micro_count) of the
+        customer's dataset record, or None if the dataset doesn't have it.
+        """
+        scored = self._score(customer_id)
+        if scored is None:
+            return None
+        monthly = scored[0]
+        return (
+            monthly.month_keys.tolist(),
+            monthly.total_credit.tolist(),
+            monthly.total_debit.tolist(),
+            monthly.micro_count.tolist(),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._lru),
+                "max_entries": self.max_entries,
+                "customers": len(self.index),
+            }
+
+    def _base_ids(self) -> Iterator[str]:
+        return iter(self.index.customer_ids.tolist())
+
+    def _base_len(self) -> int:
+        return len(self.index)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._lru) * METRICS_DTYPE.itemsize
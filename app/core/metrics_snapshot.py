@@ -0,0 +1,142 @@
+# app/core/metrics_snapshot.py
+
+# On-disk snapshot of the precomputed risk metrics.
+#
+# A snapshot is a directory of plain .npy files (sorted customer ids, their
+# METRICS_DTYPE records and monthly aggregates) that np.load can memory-map,
+# so a warm start only maps the files instead of re-parsing and re-scoring
+# the whole dataset.
+# The directory name is a key derived from the source data (a file or a
+# sharded dataset), the policy config and METRICS_VERSION; any change to
+# those produces a new key and the snapshot is rebuilt. Keys start with the
+# dataset's tag, so saving one only replaces that dataset's snapshots (see
+# app/core/keyed_dirs.py).
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.analysis.financial_metrics import METRICS_DTYPE, METRICS_VERSION
+from app.config.policy_config import POLICY_CONFIG
+from app.core import instrumentation
+from app.core.dataset_shards import MANIFEST_FILE, dataset_root, shard_paths
+from app.core.keyed_dirs import publish_keyed_dir
+from app.core.metrics_table import MetricsTable
+from app.core.transaction_table import MonthlyTable
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+_IDS_FILE = "customer_ids.npy"
+_RECORDS_FILE = "metrics.npy"
+_META_FILE = "meta.json"
+_MONTHLY_COLUMNS = ("offsets", "month_keys", "total_credit", "total_debit", "micro_count")
+
+
+def default_snapshot_dir(data_path: Path) -> Path:
+    root = dataset_root(data_path)
+    if root is not None:
+        return root.parent / ".risk_snapshots"
+    return Path(data_path).parent / ".risk_snapshots"
+
+
+def policy_fingerprint(policy: dict = POLICY_CONFIG) -> str:
+    return hashlib.sha256(repr(policy).encode()).hexdigest()[:16]
+
+
+def dataset_tag(data_path: Path) -> str:
+    """
+    Short, stable id of a dataset's location (not its contents): the prefix
+    of its snapshot and index keys.
+    """
+    root = dataset_root(data_path) or Path(data_path)
+    return hashlib.sha256(str(root.resolve()).encode()).hexdigest()[:12]
+
+
+def dataset_fingerprint(data_path: Path, content_hash: bool = False) -> str:
+    """
+    Identifies the source data: a file, or a sharded dataset's manifest and
+    shards. By default files are identified by size and mtime; pass
+    content_hash=True to hash their contents instead (slower, but immune
+    to mtime-preserving copies).
+    """
+    data_path = Path(data_path)
+    root = dataset_root(data_path)
+    if root is not None:
+        data_path = root
+        files = [root / MANIFEST_FILE] + shard_paths(root)
+    else:
+        files = [data_path]
+
+    digest = hashlib.sha256()
+    digest.update(str(data_path.resolve()).encode())
+    for path in files:
+        digest.update(path.name.encode())
+        if content_hash:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        else:
+            stat = path.stat()
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def snapshot_key(data_path: Path, content_hash: bool = False) -> str:
+    """
+    Identifies the snapshot for the current data, policy and metrics code.
+    """
+    digest = hashlib.sha256()
+    digest.update(dataset_fingerprint(data_path, content_hash).encode())
+    digest.update(policy_fingerprint().encode())
+    digest.update(f"metrics-v{METRICS_VERSION}:format-v{SNAPSHOT_FORMAT_VERSION}".encode())
+    return f"{dataset_tag(data_path)}-{digest.hexdigest()[:32]}"
+
+
+def load_snapshot(snapshot_dir: Path, key: str) -> Optional[MetricsTable]:
+    path = Path(snapshot_dir) / key
+    if not (path / _META_FILE).exists():
+        return None
+    try:
+        customer_ids = np.load(path / _IDS_FILE, mmap_mode="r")
+        records = np.load(path / _RECORDS_FILE, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable risk snapshot %s: %s", path, e)
+        instrumentation.inc("risk_store_snapshot_errors_total", operation="read")
+        return None
+    if records.dtype != METRICS_DTYPE or len(records) != len(customer_ids):
+        return None
+
+    monthly = None
+    if (path / "monthly_offsets.npy").exists():
+        columns = {name: np.load(path / f"monthly_{name}.npy", mmap_mode="r") for name in _MONTHLY_COLUMNS}
+        monthly = MonthlyTable(customer_ids, **columns)
+    return MetricsTable(customer_ids, records, monthly)
+
+
+def save_snapshot(snapshot_dir: Path, key: str, table: MetricsTable) -> Path:
+    """
+    Writes the snapshot atomically and removes the dataset's snapshots for
+    other keys.
+    """
+    def write(staging: Path):
+        np.save(staging / _IDS_FILE, np.ascontiguousarray(table.customer_ids))
+        np.save(staging / _RECORDS_FILE, np.ascontiguousarray(table.records))
+        if table.monthly is not None:
+            for name in _MONTHLY_COLUMNS:
+                np.save(staging / f"monthly_{name}.npy", np.ascontiguousarray(getattr(table.monthly, name)))
+        # meta.json is written last: its presence marks a complete snapshot.
+        with open(staging / _META_FILE, "w") as f:
+            json.dump({
+                "key": key,
+                "customers": len(table),
+                "metrics_version": METRICS_VERSION,
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+            }, f)
+
+    return publish_keyed_dir(snapshot_dir, key, write)
@@ -0,0 +1,190 @@
+# app/core/metrics_table.py
+
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.analysis.financial_metrics import METRICS_DTYPE, metrics_record_to_dict
+from app.core.transaction_table import MonthlyTable
+
+
+class OverlayMetricsMapping(Mapping, ABC):
+    """
+    Lookup API shared by the risk store's backends (MetricsTable,
+    LazyMetricsStore, SharedMetricsStore): customer_id -> metrics dict,
+    record()/records_for() over METRICS_DTYPE records, and set_record().
+
+    Records replaced after load (see set_record) live in a small overlay
+    dict in front of the backend's own records; each replacement is a
+    single dict assignment, so readers never observe a partially updated
+    customer. Subclasses must implement position() and the _base_* lookups.
+    """
+
+    def __init__(self):
+        self._overlay: Dict[str, np.void] = {}
+
+    @abstractmethod
+    def position(self, customer_id) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _base_record(self, customer_id: str) -> Optional[np.void]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _base_records_for(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _base_ids(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _base_len(self) -> int:
+        raise NotImplementedError
+
+    def record(self, customer_id: str) -> Optional[np.void]:
+        record = self._overlay.get(customer_id)
+        if record is not None:
+            return record
+        return self._base_record(customer_id)
+
+    def records_for(self, customer_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized lookup: (records, found) for an array of customer ids.
+        Records of unknown customers are zero-filled.
+        """
+        ids = np.asarray(customer_ids, dtype=str)
+        records, found = self._base_records_for(ids)
+        if self._overlay:
+            flat_records = records.reshape(-1)
+            flat_found = found.reshape(-1)
+            for index, customer_id in enumerate(ids.ravel().tolist()):
+                record = self._overlay.get(customer_id)
+                if record is not None:
+                    flat_records[index] = record
+                    flat_found[index] = True
+        return records, found
+
+    def set_record(self, customer_id: str, record: np.void):
+        self._overlay[customer_id] = record
+
+    def __getitem__(self, customer_id: str) -> dict:
+        record = self.record(customer_id)
+        if record is None:
+            raise KeyError(customer_id)
+        return metrics_record_to_dict(record)
+
+    def __contains__(self, customer_id) -> bool:
+        return customer_id in self._overlay or self.position(customer_id) >= 0
+
+    def _added_ids(self) -> List[str]:
+        return [cid for cid in list(self._overlay) if self.position(cid) < 0]
+
+    def __len__(self) -> int:
+        if not self._overlay:
+            return self._base_len()
+        return self._base_len() + len(self._added_ids())
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._base_ids()
+        if self._overlay:
+            yield from self._added_ids()
+
+
+class MetricsTable(OverlayMetricsMapping):
+    """
+    Read-only customer_id -> metrics mapping backed by two flat arrays:
+    customer ids sorted ascending and their METRICS_DTYPE records.
+
+    Lookups binary-search the id array, so a table loaded with
+    np.load(mmap_mode="r") is usable without building any per-customer
+    Python objects up front. `monthly` optionally carries the customers'
+    monthly aggregates (same order), used for incremental updates.
+    """
+
+    def __init__(
+        self,
+        customer_ids: np.ndarray,
+        records: np.ndarray,
+        monthly: Optional[MonthlyTable] = None,
+    ):
+        self.customer_ids = customer_ids
+        self.records = records
+        self.monthly = monthly
+        super().__init__()
+
+    @classmethod
+    def from_records(
+        cls,
+        customer_ids: List[str],
+        records: np.ndarray,
+        monthly: Optional[MonthlyTable] = None,
+    ) -> "MetricsTable":
+        if len(customer_ids) == 0:
+            return cls(np.zeros(0, dtype="U1"), np.zeros(0, dtype=METRICS_DTYPE), monthly)
+        ids = np.asarray(customer_ids, dtype=str)
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        if len(ids) > 1 and np.any(ids[1:] == ids[:-1]):
+            raise ValueError("Duplicate customer_id in metrics records")
+        if monthly is not None:
+            monthly = monthly.take(order)
+        return cls(ids, np.asarray(records, dtype=METRICS_DTYPE)[order], monthly)
+
+    def position(self, customer_id) -> int:
+        """
+        Row of customer_id in the base arrays, or -1.
+        """
+        if not isinstance(customer_id, str):
+            return -1
+        i = int(np.searchsorted(self.customer_ids, customer_id))
+        if i < len(self.customer_ids) and self.customer_ids[i] == customer_id:
+            return i
+        return -1
+
+    def _base_record(self, customer_id: str) -> Optional[np.void]:
+        i = self.position(customer_id)
+        return self.records[i] if i >= 0 else None
+
+    def _base_records_for(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        records = np.zeros(ids.shape, dtype=METRICS_DTYPE)
+        found = np.zeros(ids.shape, dtype=np.bool_)
+        if len(self.customer_ids):
+            positions = np.minimum(np.searchsorted(self.customer_ids, ids), len(self.customer_ids) - 1)
+            found = self.customer_ids[positions] == ids
+            records[found] = self.records[positions[found]]
+        return records, found
+
+    def _base_ids(self) -> Iterator[str]:
+        return iter(self.customer_ids.tolist())
+
+    def _base_len(self) -> int:
+        return len(self.customer_ids)
+
+    def monthly_rows(self, customer_id: str) -> Optional[Tuple[List, List, List, List]]:
+        """
+        (month_keys, total_credit, total_debit, micro_count) of a customer in
+        the base table, or None if the customer isn't in it.
+        """
+        i = self.position(customer_id)
+        if i < 0:
+            return None
+        if self.monthly is None:
+            raise RuntimeError("Risk store has no monthly aggregates; cannot update incrementally")
+        rows = self.monthly.customer_rows(i)
+        return (
+            self.monthly.month_keys[rows].tolist(),
+            self.monthly.total_credit[rows].tolist(),
+            self.monthly.total_debit[rows].tolist(),
+            self.monthly.micro_count[rows].tolist(),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        size = self.customer_ids.nbytes + self.records.nbytes
+        if self.monthly is not None:
+            size += self.monthly.nbytes
+        return size
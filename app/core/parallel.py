@@ -0,0 +1,30 @@
+# app/core/parallel.py
+
+# Order-preserving process-pool map shared by precompute, the dataset
+# generator and statement ingestion.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+
+def map_ordered(worker: Callable, tasks: Iterable, workers: int) -> Iterator:
+    """
+    worker(task) for every task, across `workers` processes, yielded in task
+    order so the output does not depend on scheduling. At most 2 * workers
+    tasks are in flight, so memory tracks the worker count rather than the
+    number of tasks. With workers <= 1 the tasks run inline.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield worker(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(worker, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,201 @@
+# app/core/policy_simulation.py
+
+# What-if analysis of loan policies over the whole portfolio.
+#
+# Under the rule engine's precedence (loss, fraud, growth, volatility) a
+# customer's decision for a tier depends only on two flags, the sign of
+# growth and cv. PolicySimulator therefore keeps the portfolio as:
+#   - the number of loss-making and fraud-flagged customers,
+#   - the sorted cv_e4 values of all other ("clean") customers,
+#   - the sorted cv_e4 values of the clean customers with positive growth.
+# Each tier's approvals are then a binary search on one of those arrays
+# (cv_e4 <= floor(max_cv * 1e4), as in evaluate_loan_eligibility_batch),
+# so simulating a policy costs O(tiers * log n) whatever the portfolio size.
+
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config.policy_config import POLICY_CONFIG
+from app.core.rule_engine import (
+    REASON_CODES,
+    CompiledPolicy,
+    loan_amounts_to_paise,
+)
+
+
+class PolicySimulator:
+    """
+    Approval counts and reason-code breakdowns of candidate policies for a
+    fixed set of METRICS_DTYPE records. Build once (O(n log n)), then
+    simulate any number of policies.
+    """
+
+    def __init__(self, records: np.ndarray):
+        records = np.asarray(records).reshape(-1)
+        loss = records["loss_flag"]
+        fraud = records["fraud_flag"] & ~loss
+        clean = ~(loss | fraud)
+
+        self.customers = len(records)
+        self.loss_making = int(loss.sum())
+        self.fraud = int(fraud.sum())
+        self.cv_clean = np.sort(records["cv_e4"][clean])
+        self.cv_positive_growth = np.sort(records["cv_e4"][clean & (records["growth_e4"] > 0)])
+
+    def _approved(self, require_positive_growth: bool, max_cv_e4: int) -> int:
+        cv = self.cv_positive_growth if require_positive_growth else self.cv_clean
+        return int(np.searchsorted(cv, max_cv_e4, side="right"))
+
+    def _rule_reasons(self, require_positive_growth: bool, max_cv_e4: int) -> Dict[str, int]:
+        reasons = dict.fromkeys(REASON_CODES, 0)
+        approved = self._approved(require_positive_growth, max_cv_e4)
+        clean = len(self.cv_clean)
+        reasons["ELIGIBLE"] = approved
+        reasons["LOSS_MAKING"] = self.loss_making
+        reasons["FRAUD_PATTERN_DETECTED"] = self.fraud
+        if require_positive_growth:
+            growing = len(self.cv_positive_growth)
+            reasons["NEGATIVE_GROWTH"] = clean - growing
+            reasons["VOLATILITY_THRESHOLD_EXCEEDED"] = growing - approved
+        else:
+            reasons["VOLATILITY_THRESHOLD_EXCEEDED"] = clean - approved
+        return reasons
+
+    def _no_rule_reasons(self) -> Dict[str, int]:
+        reasons = dict.fromkeys(REASON_CODES, 0)
+        reasons["LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT"] = self.customers
+        return reasons
+
+    def _summary(self, reasons: Dict[str, int]) -> Dict:
+        approved = reasons["ELIGIBLE"]
+        return {
+            "approved": approved,
+            "approval_rate": approved / self.customers if self.customers else 0.0,
+            "reasons": reasons,
+        }
+
+    def simulate(self, policy: Dict, loan_amounts) -> Dict:
+        """
+        Outcome of `policy` (shaped like POLICY_CONFIG) for every customer at
+        every amount in `loan_amounts`: one summary per effective tier and
+        per amount, each with approved, approval_rate and reasons (count
+        per reason code).
+        """
+        compiled = CompiledPolicy(policy["loan_rules"])
+        tiers = []
+        for tier, rule in enumerate(compiled.rules):
+            summary = self._summary(self._rule_reasons(
+                bool(compiled.require_positive_growth[tier]), int(compiled.max_cv_e4[tier])
+            ))
+            tiers.append({
+                "tier": tier,
+                "max_amount": rule["max_amount"],
+                "max_cv": rule["max_cv"],
+                "require_positive_growth": rule["require_positive_growth"],
+                **summary,
+            })
+
+        amounts = []
+        for loan_amount, tier in zip(loan_amounts, _tiers_for(compiled, loan_amounts)):
+            if tier is None:
+                summary = self._summary(self._no_rule_reasons())
+            else:
+                summary = {key: tiers[tier][key] for key in ("approved", "approval_rate", "reasons")}
+            amounts.append({"loan_amount": loan_amount, "tier": tier, **summary})
+
+        return {"customers": self.customers, "tiers": tiers, "amounts": amounts}
+
+    def compare(self, candidate: Dict, loan_amounts, baseline: Dict = POLICY_CONFIG) -> Dict:
+        """
+        simulate(candidate) plus, per amount, how it differs from `baseline`:
+        approval and reason-count deltas, and how many customers it newly
+        approves or newly rejects.
+        """
+        result = self.simulate(candidate, loan_amounts)
+        base = self.simulate(baseline, loan_amounts)
+        candidate_policy = CompiledPolicy(candidate["loan_rules"])
+        baseline_policy = CompiledPolicy(baseline["loan_rules"])
+
+        for amount, base_amount, tier, base_tier in zip(
+            result["amounts"], base["amounts"],
+            _tiers_for(candidate_policy, loan_amounts), _tiers_for(baseline_policy, loan_amounts),
+        ):
+            both = 0
+            if tier is not None and base_tier is not None:
+                # Approved under both rules: the stricter growth requirement
+                # and the lower cv limit.
+                both = self._approved(
+                    bool(candidate_policy.require_positive_growth[tier] or baseline_policy.require_positive_growth[base_tier]),
+                    int(min(candidate_policy.max_cv_e4[tier], baseline_policy.max_cv_e4[base_tier])),
+                )
+            amount["diff"] = {
+                "approved": amount["approved"] - base_amount["approved"],
+                "newly_approved": amount["approved"] - both,
+                "newly_rejected": base_amount["approved"] - both,
+                "reasons": {
+                    code: amount["reasons"][code] - base_amount["reasons"][code] for code in REASON_CODES
+                },
+            }
+        result["baseline"] = base
+        return result
+
+
+def _tiers_for(compiled: CompiledPolicy, loan_amounts) -> List[Optional[int]]:
+    if not len(loan_amounts):
+        return []
+    tiers = compiled.tiers_for_paise(loan_amounts_to_paise(list(loan_amounts))).tolist()
+    return [tier if tier < len(compiled) else None for tier in tiers]
+
+
+def policy_variant(policy: Dict, tier: int, **changes) -> Dict:
+    """
+    Copy of `policy` with loan_rules[tier] updated, e.g.
+    policy_variant(POLICY_CONFIG, 1, max_cv=Decimal("0.20")).
+    """
+    loan_rules = [dict(rule) for rule in policy["loan_rules"]]
+    loan_rules[tier].update(changes)
+    return {**policy, "loan_rules": loan_rules}
+
+
+_SIMULATOR_CACHE: Dict = {}
+
+
+def get_simulator() -> PolicySimulator:
+    """
+    PolicySimulator over the active risk store, rebuilt only when the store
+    is reloaded or a customer's metrics change.
+    """
+    from app.core import risk_store
+    from app.core.lazy_metrics import LazyMetricsStore
+
+    snapshot = risk_store.current_snapshot()
+    key = (snapshot.generation, sum(snapshot.customer_versions.values()))
+    simulator = _SIMULATOR_CACHE.get(key)
+    if simulator is None:
+        if isinstance(snapshot.store, LazyMetricsStore):
+            raise ValueError("Policy simulation needs a precomputed risk store, not a lazy one")
+        records, _ = snapshot.records_for(np.asarray(list(snapshot.store), dtype=str))
+        simulator = PolicySimulator(records)
+        _SIMULATOR_CACHE.clear()
+        _SIMULATOR_CACHE[key] = simulator
+    return simulator
+
+
+def simulate_policies(
+    candidates: Dict[str, Dict],
+    loan_amounts,
+    baseline: Optional[Dict] = None,
+) -> Dict[str, Dict]:
+    """
+    compare() for each named candidate policy against baseline (default:
+    the current POLICY_CONFIG) over the active risk store.
+    """
+    simulator = get_simulator()
+    baseline = POLICY_CONFIG if baseline is None else baseline
+    loan_amounts = [Decimal(str(amount)) for amount in loan_amounts]
+    return {
+        name: simulator.compare(policy, loan_amounts, baseline)
+        for name, policy in candidates.items()
+    }
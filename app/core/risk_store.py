@@ -1,115 +1,632 @@
-# Load JSON once
+# Load JSON once (whole file, or streamed one customer at a time)
 
-# Convert amounts back to Decimal
+# Encode transactions into a columnar table (paise, month keys, type codes)
 
 # Precompute metrics
 
-# Store eligibility signals
+# Store eligibility signals (and persist them as a memory-mappable snapshot)
 
 import json
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
 from pathlib import Path
-from decimal import Decimal
-
-from app.analysis.financial_metrics import aggregate_by_month, compute_cashflow_growth, compute_cashflow_volatility
-
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.analysis.financial_metrics import (
+    METRICS_DTYPE,
+    RunningCashflowState,
+    aggregate_portfolio_by_month,
+    compute_portfolio_metrics,
+    metrics_record_to_dict,
+)
+from app.core.dataset_shards import dataset_root, read_manifest, read_shard_table, shard_paths
+from app.core import instrumentation
+from app.core.dataset_index import load_or_build_index
+from app.core.dataset_stream import decode_customer_payload, iter_customer_payload_texts, iter_customer_payloads
+from app.core.dataset_update import merge_transaction_rows
+from app.core.lazy_metrics import LazyMetricsStore
+from app.core.metrics_snapshot import default_snapshot_dir, load_snapshot, save_snapshot, snapshot_key
+from app.core.metrics_table import MetricsTable
+from app.core.parallel import map_ordered
+from app.core.shared_metrics import SharedMetricsStore
+from app.core.transaction_table import (
+    MonthlyTable,
+    TransactionTable,
+    TransactionTableBuilder,
+    encode_transaction,
+)
+from app.core.window_metrics import CashflowSeries, window_records_for
+
+logger = logging.getLogger(__name__)
+
+# A generated_transactions.json-style file, or a sharded dataset (its
+# directory or manifest.json, see app/core/dataset_shards.py).
 DATA_PATH = Path("data/generated_transactions.json")
 
-RISK_CACHE = {}
-
-def _convert_to_decimal(obj):
-    if isinstance(obj, str) and obj.replace(".", "", 1).isdigit():
-        return Decimal(obj)
-    elif isinstance(obj, list):
-        return [_convert_to_decimal(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: _convert_to_decimal(value) for key, value in obj.items()}
-    return obj
-
-def load_and_precompute():
-    global RISK_CACHE
-    if RISK_CACHE:
-        return RISK_CACHE
-
-    with open(DATA_PATH, "r") as f:
-        raw_data = json.load(f)
-
-    for customer_id, payload in raw_data.items():
-        transactions = _convert_to_decimal(payload["transactions"])
-
-        monthly = aggregate_by_month(transactions)
-        growth = compute_cashflow_growth(monthly)
-        volatility = compute_cashflow_volatility(monthly)
-
-        RISK_CACHE[customer_id] = {
-            "growth": growth,
-            "cv": volatility["cv"],
-            "stability": volatility["stability_level"],
-            "fraud_flag": any(txn["type"] == "debit_micro" for txn in transactions),
-            "loss_flag": sum(m["net_cashflow"] for m in monthly.values()) < 0
+# Rows buffered before a streamed batch is folded into metrics.
+STREAM_BATCH_ROWS = 100_000
+
+# Worker processes for precompute when load_and_precompute/reload get no
+# `workers`. Serial by default, so a serving process never starts a process
+# pool at startup or on reload; RISK_PRECOMPUTE_WORKERS sets a count ("auto"
+# for os.cpu_count()). Offline scripts pass `workers` explicitly.
+PRECOMPUTE_WORKERS = os.getenv("RISK_PRECOMPUTE_WORKERS") or 1
+
+# Datasets smaller than this are always precomputed serially.
+PARALLEL_MIN_BYTES = 16 << 20
+
+# Approximate amount of JSON text handed to a worker per task.
+PARALLEL_CHUNK_BYTES = 4 << 20
+
+# Reuse/persist precomputed metrics under default_snapshot_dir(DATA_PATH).
+SNAPSHOT_ENABLED = True
+
+# Lazy mode: score customers on first lookup through a persistent byte-offset
+# index (under default_index_dir(DATA_PATH)) instead of precomputing the
+# whole portfolio; at most LAZY_CACHE_ENTRIES customers are kept in memory.
+LAZY_MODE = False
+LAZY_CACHE_ENTRIES = 10_000
+
+# Shared mode: attach read-only to the shared-memory metrics segment of this
+# name (published by a loader process, see publish_shared_store) instead of
+# loading DATA_PATH, so worker processes never precompute.
+SHARED_STORE_NAME = os.getenv("RISK_SHARED_STORE") or None
+
+# The published store (MetricsTable or LazyMetricsStore), None until the
+# first load; always _ACTIVE.store.
+RISK_CACHE = None
+
+# The published StoreSnapshot, None until the first load. Loads and reloads
+# replace it as a whole, so readers take a local reference and need no lock.
+_ACTIVE: Optional["StoreSnapshot"] = None
+
+# Single-flight guard: one thread at a time builds a store (first load or
+# reload); concurrent first lookups block on it and read what it published.
+_LOAD_LOCK = threading.Lock()
+
+# Serializes append_transactions with each other and with publishing.
+_APPEND_LOCK = threading.Lock()
+
+# Guards the lazy build of StoreSnapshot.window_series.
+_WINDOW_LOCK = threading.Lock()
+
+# Last StoreSnapshot.generation handed out.
+_STORE_GENERATION = 0
+
+# Replaced snapshots that something (an in-flight call) still references;
+# each drops out of the set once its last reference goes.
+_RETIRED = weakref.WeakSet()
+
+
+class StoreSnapshot:
+    """
+    One published version of the risk store, plus the running state of the
+    customers append_transactions touched since it was published.
+
+    A reload publishes a new StoreSnapshot and leaves this one as it is, so
+    a caller holding it (see current_snapshot) sees metrics and metrics
+    versions that agree with each other for as long as it keeps it. The
+    store is freed when the last holder lets go.
+    """
+
+    __slots__ = (
+        "store", "generation", "version", "data_path", "source", "loaded_at",
+        "customer_state", "customer_versions", "window_series", "__weakref__",
+    )
+
+    def __init__(self, store, generation: int, version: str, data_path: Path, source: str):
+        self.store = store
+        self.generation = generation
+        self.version = version
+        self.data_path = data_path
+        self.source = source
+        self.loaded_at = time.time()
+        self.customer_state: Dict[str, RunningCashflowState] = {}
+        self.customer_versions: Dict[str, int] = {}
+        self.window_series: Optional[CashflowSeries] = None
+
+    def get(self, customer_id: str) -> Optional[dict]:
+        return self.store.get(customer_id)
+
+    def records_for(self, customer_ids) -> Tuple[np.ndarray, np.ndarray]:
+        return self.store.records_for(customer_ids)
+
+    def metrics_version(self, customer_id: str) -> tuple:
+        """
+        Changes whenever get(customer_id) may return something different;
+        use it in cache keys.
+        """
+        return self.generation, self.customer_versions.get(customer_id, 0)
+
+    def info(self) -> dict:
+        return {
+            "generation": self.generation,
+            "version": self.version,
+            "data_path": str(self.data_path),
+            "source": self.source,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.loaded_at)),
+            "customers": len(self.store),
+            "appended_customers": len(self.customer_versions),
         }
-    return RISK_CACHE
-
-
-def get_customer_metrics(customer_id: str)-> dict:
-    if not RISK_CACHE:
-        load_and_precompute()
-    return RISK_CACHE.get(customer_id)
-# Load JSON once
-
-# Convert amounts back to Decimal
 
-# Precompute metrics
-
-# Store eligibility signals
-
-import json
-from pathlib import Path
-from decimal import Decimal
-
-from app.analysis.financial_metrics import aggregate_by_month, compute_cashflow_growth, compute_cashflow_volatility
-
-DATA_PATH = Path("data/generated_transactions.json")
 
-RISK_CACHE = {}
+def _iter_streamed_tables(batch_rows: int):
+    builder = TransactionTableBuilder()
+    for customer_id, payload in iter_customer_payloads(DATA_PATH):
+        builder.add_customer_rows(customer_id, payload["transactions"])
+        del payload
+        if builder.num_transactions >= batch_rows:
+            yield builder.build()
+    if len(builder):
+        yield builder.build()
 
-def _convert_to_decimal(obj):
-    if isinstance(obj, str) and obj.replace(".", "", 1).isdigit():
-        return Decimal(obj)
-    elif isinstance(obj, list):
-        return [_convert_to_decimal(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: _convert_to_decimal(value) for key, value in obj.items()}
-    return obj
-
-def load_and_precompute():
-    global RISK_CACHE
-    if RISK_CACHE:
-        return RISK_CACHE
+def _iter_tables(streaming: bool, batch_rows: int):
+    if streaming:
+        yield from _iter_streamed_tables(batch_rows)
+        return
 
     with open(DATA_PATH, "r") as f:
         raw_data = json.load(f)
 
-    for customer_id, payload in raw_data.items():
-        transactions = _convert_to_decimal(payload["transactions"])
-
-        monthly = aggregate_by_month(transactions)
-        growth = compute_cashflow_growth(monthly)
-        volatility = compute_cashflow_volatility(monthly)
-
-        RISK_CACHE[customer_id] = {
-            "growth": growth,
-            "cv": volatility["cv"],
-            "stability": volatility["stability_level"],
-            "fraud_flag": any(txn["type"] == "debit_micro" for txn in transactions),
-            "loss_flag": sum(m["net_cashflow"] for m in monthly.values()) < 0
-        }
-    return RISK_CACHE
+    table = TransactionTable.from_customer_dict(raw_data)
+    del raw_data
+    yield table
+
+def _score_table(table: TransactionTable):
+    monthly = aggregate_portfolio_by_month(table)
+    return monthly, compute_portfolio_metrics(monthly)
+
+def _assemble_metrics_table(parts) -> MetricsTable:
+    monthly = MonthlyTable.concatenate([part_monthly for part_monthly, _ in parts])
+    records = [part_records for _, part_records in parts]
+    records = np.concatenate(records) if records else np.zeros(0, dtype=METRICS_DTYPE)
+    return MetricsTable.from_records(monthly.customer_ids, records, monthly)
+
+def _compute_metrics_table(streaming: bool, batch_rows: int) -> MetricsTable:
+    return _assemble_metrics_table([_score_table(table) for table in _iter_tables(streaming, batch_rows)])
+
+def _score_payload_chunk(members):
+    # Runs in a worker process: decode, encode and score one chunk of customers.
+    builder = TransactionTableBuilder()
+    for customer_id, text in members:
+        builder.add_customer_rows(customer_id, decode_customer_payload(text)["transactions"])
+    return _score_table(builder.build())
+
+def _iter_payload_chunks(chunk_bytes: int):
+    chunk, size = [], 0
+    for customer_id, text in iter_customer_payload_texts(DATA_PATH):
+        chunk.append((customer_id, text))
+        size += len(text)
+        if size >= chunk_bytes:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+def _compute_metrics_table_parallel(workers: int, chunk_bytes: int) -> MetricsTable:
+    """
+    The parent only splits the file into raw per-customer JSON texts; workers
+    decode and score whole chunks.
+    """
+    return _assemble_metrics_table(list(map_ordered(_score_payload_chunk, _iter_payload_chunks(chunk_bytes), workers)))
+
+def _score_shard(path: Path):
+    # Runs in a worker process (or inline): decode and score one shard.
+    table, _ = read_shard_table(path)
+    return _score_table(table)
+
+def _compute_metrics_table_sharded(workers: int) -> MetricsTable:
+    """
+    Shards are decoded and scored independently: across the pool when
+    workers > 1, otherwise one at a time, so memory follows the shard size.
+    """
+    paths = shard_paths(DATA_PATH)
+    if workers > 1 and len(paths) > 1:
+        return _assemble_metrics_table(list(map_ordered(_score_shard, paths, workers)))
+    return _assemble_metrics_table([_score_shard(path) for path in paths])
+
+def _dataset_bytes() -> int:
+    if dataset_root(DATA_PATH) is not None:
+        return sum(shard.get("bytes", 0) for shard in read_manifest(DATA_PATH)["shards"])
+    return DATA_PATH.stat().st_size
+
+def _resolve_workers(workers) -> int:
+    if workers is None:
+        workers = PRECOMPUTE_WORKERS
+    if workers is None or str(workers).strip().lower() == "auto":
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+def _publish(table, source: str, started: float, key: str) -> "StoreSnapshot":
+    global RISK_CACHE, _ACTIVE, _STORE_GENERATION
+    with _APPEND_LOCK:
+        _STORE_GENERATION += 1
+        snapshot = StoreSnapshot(table, _STORE_GENERATION, key[-16:], DATA_PATH, source)
+        if _ACTIVE is not None:
+            _RETIRED.add(_ACTIVE)
+        _ACTIVE = snapshot
+        RISK_CACHE = table
+    if instrumentation.ENABLED:
+        instrumentation.observe("risk_store_load_seconds", time.perf_counter() - started, source=source)
+        instrumentation.set_gauge("risk_store_customers", len(table))
+        instrumentation.set_gauge("risk_store_generation", snapshot.generation)
+    return snapshot
+
+def load_and_precompute(
+    streaming: bool = False,
+    batch_rows: int = STREAM_BATCH_ROWS,
+    use_snapshot: Optional[bool] = None,
+    workers: Optional[int] = None,
+    lazy: Optional[bool] = None,
+):
+    """
+    streaming=True reads the dataset one customer at a time and folds it into
+    metrics in batches of ~batch_rows transactions, so peak memory follows the
+    batch size (or the largest customer) instead of the file size.
+
+    workers > 1 shards customers across a process pool; the default is
+    PRECOMPUTE_WORKERS (serial unless configured). Inputs under
+    PARALLEL_MIN_BYTES stay serial.
+    A sharded DATA_PATH is scored shard by shard (one shard per task when
+    parallel), whatever `streaming` says.
+
+    With snapshots enabled, a snapshot matching the current data file, policy
+    and metrics version is memory-mapped instead of recomputing; otherwise the
+    metrics are computed and a fresh snapshot is written.
+
+    lazy=True (default: LAZY_MODE) skips all of that and installs a
+    LazyMetricsStore: startup only opens (or, once per dataset version,
+    builds) the offset index, and customers are scored when first looked up.
+    With SHARED_STORE_NAME set, the store is the attached shared-memory
+    segment of that name and none of the options apply.
+
+    Safe to call from many threads at once: one of them loads, the rest wait
+    and return the same store. Once a store is loaded this just returns it;
+    use reload() to pick up new data.
+    """
+    snapshot = _ACTIVE
+    if snapshot is not None:
+        return snapshot.store
+
+    with _LOAD_LOCK:
+        snapshot = _ACTIVE
+        if snapshot is None:
+            snapshot = _load(streaming, batch_rows, use_snapshot, workers, lazy)
+        return snapshot.store
+
+
+def _load(
+    streaming: bool, batch_rows: int, use_snapshot: Optional[bool], workers: Optional[int], lazy: Optional[bool]
+) -> "StoreSnapshot":
+    # Caller holds _LOAD_LOCK.
+    started = time.perf_counter()
+    if SHARED_STORE_NAME:
+        store = SharedMetricsStore.attach(SHARED_STORE_NAME)
+        return _publish(store, "shared", started, store.version)
+
+    key = snapshot_key(DATA_PATH)
+    if lazy is None:
+        lazy = LAZY_MODE
+    if lazy:
+        return _publish(LazyMetricsStore(load_or_build_index(DATA_PATH), LAZY_CACHE_ENTRIES), "lazy", started, key)
+
+    if use_snapshot is None:
+        use_snapshot = SNAPSHOT_ENABLED
+
+    if use_snapshot:
+        snapshot_dir = default_snapshot_dir(DATA_PATH)
+        table = load_snapshot(snapshot_dir, key)
+        if table is not None:
+            return _publish(table, "snapshot", started, key)
+
+    workers = _resolve_workers(workers)
+    parallel = workers > 1 and _dataset_bytes() >= PARALLEL_MIN_BYTES
+    if dataset_root(DATA_PATH) is not None:
+        source = "sharded_parallel" if parallel else "sharded"
+        table = _compute_metrics_table_sharded(workers if parallel else 1)
+    elif parallel:
+        source = "parallel"
+        table = _compute_metrics_table_parallel(workers, PARALLEL_CHUNK_BYTES)
+    else:
+        source = "streaming" if streaming else "serial"
+        table = _compute_metrics_table(streaming, batch_rows)
+
+    if use_snapshot:
+        try:
+            save_snapshot(snapshot_dir, key, table)
+        except OSError as e:
+            logger.warning("Could not write risk snapshot to %s: %s", snapshot_dir, e)
+            instrumentation.inc("risk_store_snapshot_errors_total", operation="write")
+
+    return _publish(table, source, started, key)
+
+
+def current_snapshot() -> StoreSnapshot:
+    """
+    The published StoreSnapshot, loaded on first use; a plain read
+    afterwards. Callers that make several lookups for one request should
+    take it once and use it throughout.
+    """
+    snapshot = _ACTIVE
+    if snapshot is None:
+        load_and_precompute()
+        snapshot = _ACTIVE
+    return snapshot
+
+
+def reload(
+    data_path: Optional[Path] = None,
+    streaming: bool = False,
+    batch_rows: int = STREAM_BATCH_ROWS,
+    use_snapshot: Optional[bool] = None,
+    workers: Optional[int] = None,
+    lazy: Optional[bool] = None,
+) -> StoreSnapshot:
+    """
+    Builds a new store from data_path (default: DATA_PATH, re-read) and then
+    swaps it in atomically; options as for load_and_precompute.
+
+    The current store keeps serving while the new one is built; calls that
+    already hold it finish on it. Only one build runs at a time. Appended
+    transactions (append_transactions) do not carry over to the new store.
+    On error the current store stays active. Reloads are counted in
+    risk_store_reload_total by outcome.
+    """
+    global DATA_PATH
+    with _LOAD_LOCK:
+        previous_path = DATA_PATH
+        if data_path is not None:
+            DATA_PATH = Path(data_path)
+        try:
+            snapshot = _load(streaming, batch_rows, use_snapshot, workers, lazy)
+        except BaseException:
+            DATA_PATH = previous_path
+            instrumentation.inc("risk_store_reload_total", outcome="error")
+            raise
+    instrumentation.inc("risk_store_reload_total", outcome="ok")
+    return snapshot
+
+
+def reload_in_background(data_path: Optional[Path] = None, **kwargs) -> Future:
+    """
+    reload() on a daemon thread. Returns a Future of the new StoreSnapshot.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(reload(data_path, **kwargs))
+        except BaseException as e:
+            # Counted by reload(); the caller sees it through the future.
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="risk-store-reload", daemon=True).start()
+    return future
+
+
+def publish_shared_store(name: Optional[str] = None) -> SharedMetricsStore:
+    """
+    Copies this process's store (loading it if needed) into a new
+    shared-memory segment for workers to attach to; name=None lets the OS
+    pick one. The caller owns the segment: keep the returned store open
+    while workers run and unlink() it at shutdown.
+    """
+    snapshot = current_snapshot()
+    if isinstance(snapshot.store, LazyMetricsStore):
+        raise ValueError("A lazy risk store cannot be published to shared memory")
+    customer_ids = np.asarray(list(snapshot.store), dtype=str)
+    records, _ = snapshot.records_for(customer_ids)
+    return SharedMetricsStore.create(customer_ids, records, name=name, version=snapshot.version)
+
+
+def store_info() -> dict:
+    """
+    What is being served, for debugging: the active snapshot's generation,
+    version and source, whether a load is running, and how many replaced
+    snapshots are still held by in-flight calls.
+    """
+    snapshot = _ACTIVE
+    info = snapshot.info() if snapshot is not None else {"generation": None, "version": None}
+    info["loading"] = _LOAD_LOCK.locked()
+    info["retired_in_use"] = len(_RETIRED)
+    return info
+
+
+def unload():
+    """
+    Drops the published store; the next lookup loads DATA_PATH again.
+    """
+    global RISK_CACHE, _ACTIVE
+    with _LOAD_LOCK, _APPEND_LOCK:
+        if _ACTIVE is not None:
+            _RETIRED.add(_ACTIVE)
+        _ACTIVE = None
+        RISK_CACHE = None
 
 
 def get_customer_metrics(customer_id: str)-> dict:
-    if not RISK_CACHE:
-        load_and_precompute()
-    return RISK_CACHE.get(customer_id)
-
+    return current_snapshot().get(customer_id)
+
+
+def get_metrics_version(customer_id: str) -> tuple:
+    """
+    Changes whenever get_customer_metrics(customer_id) may return something
+    different (store reload or append_transactions); use it in cache keys.
+    """
+    return current_snapshot().metrics_version(customer_id)
+
+
+def get_metrics_records(customer_ids):
+    """
+    METRICS_DTYPE records and a found mask for many customers at once,
+    for the vectorized rule engine.
+    """
+    return current_snapshot().records_for(customer_ids)
+
+
+def _window_series(snapshot: StoreSnapshot) -> Optional[CashflowSeries]:
+    """
+    CashflowSeries over the snapshot's monthly aggregates, built on first
+    use; None for stores without them (lazy, shared).
+    """
+    series = snapshot.window_series
+    if series is not None:
+        return series
+    monthly = getattr(snapshot.store, "monthly", None)
+    if monthly is None:
+        return None
+    with _WINDOW_LOCK:
+        if snapshot.window_series is None:
+            with instrumentation.timer("risk_store_window_series_seconds"):
+                snapshot.window_series = CashflowSeries.from_monthly(snapshot.store.customer_ids, monthly)
+        return snapshot.window_series
+
+
+def _customer_series(snapshot: StoreSnapshot, customer_id: str) -> Optional[CashflowSeries]:
+    # Appended customers, and every customer of a lazy store.
+    with _APPEND_LOCK:
+        state = snapshot.customer_state.get(customer_id)
+        if state is not None:
+            rows = (list(state.month_keys), list(state.total_credit), list(state.total_debit), list(state.micro_counts))
+    if state is None:
+        rows = snapshot.store.monthly_rows(customer_id)
+        if rows is None:
+            return None
+    return CashflowSeries.from_customer_rows(customer_id, *rows)
+
+
+def get_window_metrics_records(
+    customer_ids,
+    months: Optional[int] = None,
+    start=None,
+    end=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    METRICS_DTYPE records and a found mask of many customers over one month
+    window: the trailing `months` months up to `end`, or [start, end].
+    Months are (year, month) pairs or month keys; a missing end is each
+    customer's latest month, a missing start their first. Each window costs
+    two prefix-sum lookups, whatever its length.
+    """
+    snapshot = current_snapshot()
+    ids = np.asarray(customer_ids, dtype=str).reshape(-1)
+    series = _window_series(snapshot)
+    if series is not None:
+        records, found = window_records_for(series, ids, start, end, months)
+        separate = np.flatnonzero(np.isin(ids, list(snapshot.customer_state))) if snapshot.customer_state else []
+    else:
+        records = np.zeros(len(ids), dtype=METRICS_DTYPE)
+        found = np.zeros(len(ids), dtype=np.bool_)
+        separate = range(len(ids))
+
+    for index in separate:
+        customer_id = str(ids[index])
+        customer = _customer_series(snapshot, customer_id)
+        if customer is None:
+            continue
+        record, _ = window_records_for(customer, [customer_id], start, end, months)
+        records[index] = record[0]
+        found[index] = True
+    return records, found
+
+
+def get_window_metrics(
+    customer_id: str,
+    months: Optional[int] = None,
+    start=None,
+    end=None,
+) -> Optional[dict]:
+    """
+    get_customer_metrics over a month window (see get_window_metrics_records),
+    e.g. get_window_metrics("CUST0001", months=6); None for unknown customers.
+    """
+    records, found = get_window_metrics_records([customer_id], months, start, end)
+    return metrics_record_to_dict(records[0]) if found[0] else None
+
+
+def _customer_state(snapshot: StoreSnapshot, customer_id: str) -> RunningCashflowState:
+    state = snapshot.customer_state.get(customer_id)
+    if state is not None:
+        return state
+
+    rows = snapshot.store.monthly_rows(customer_id)
+    if rows is None:
+        state = RunningCashflowState()
+    else:
+        state = RunningCashflowState.from_monthly_rows(*rows)
+    snapshot.customer_state[customer_id] = state
+    return state
+
+
+def append_transactions(customer_id: str, txns: Iterable[Dict]) -> dict:
+    """
+    Folds new transactions ({"year", "month", "amount", "type"}) into a
+    customer's metrics in O(len(txns)) and returns the refreshed metrics.
+
+    Results equal a full recompute over old + new transactions. Appended
+    transactions are held in memory only; they are not written to DATA_PATH.
+    """
+    current_snapshot()
+
+    # Encode everything first so a bad row cannot leave the state half-applied.
+    rows = [encode_transaction(txn) for txn in txns]
+
+    with _APPEND_LOCK:
+        record = _apply_rows(_ACTIVE, customer_id, rows)
+    return metrics_record_to_dict(record)
+
+
+def append_transaction_rows(updates: Iterable[Tuple[str, List[Tuple[int, int, int]]]]) -> int:
+    """
+    Bulk form of append_transactions for already-encoded
+    (month_key, amount_paise, type_code) rows, e.g. from encode_transaction.
+    Applies every (customer_id, rows) pair under a single lock acquisition
+    and returns the number of rows applied.
+    """
+    current_snapshot()
+
+    applied = 0
+    with _APPEND_LOCK:
+        snapshot = _ACTIVE
+        for customer_id, rows in updates:
+            _apply_rows(snapshot, customer_id, rows)
+            applied += len(rows)
+    return applied
+
+
+def persist_transaction_rows(updates: Dict[str, Sequence[Tuple[int, int, int]]], refresh: bool = True) -> int:
+    """
+    Writes encoded rows (customer_id -> rows) into DATA_PATH itself, so they
+    survive restarts and reload(), unlike append_transaction_rows. Customers
+    not in the dataset are added. Returns the number of rows written.
+
+    Snapshot and index keys follow the dataset's fingerprint, so the old ones
+    stop matching; with refresh=True (the default) the store is then rebuilt
+    with reload(), which also writes the new snapshot (or index).
+    """
+    with _LOAD_LOCK:
+        written = merge_transaction_rows(DATA_PATH, updates)
+    if written and refresh:
+        reload()
+    return written
+
+
+def _apply_rows(snapshot: StoreSnapshot, customer_id: str, rows: List[Tuple[int, int, int]]) -> np.void:
+    # Caller holds _APPEND_LOCK.
+    state = _customer_state(snapshot, customer_id)
+    for key, paise, code in rows:
+        state.add(key, paise, code)
+    record = state.metrics_record()
+    snapshot.store.set_record(customer_id, record)
+    versions = snapshot.customer_versions
+    versions[customer_id] = versions.get(customer_id, 0) + 1
+    return record
 
-    
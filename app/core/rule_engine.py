@@ -1,45 +1,205 @@
 # app/core/rule_engine.py
 
-from decimal import Decimal
+from bisect import bisect_left
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
 from app.config.policy_config import POLICY_CONFIG
 
-def evaluate_loan_eligibility(metrics: dict, loan_amount: Decimal) -> dict:
+_ZERO = Decimal("0")
+
+REASON_CODES = (
+    "ELIGIBLE",
+    "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT",
+    "LOSS_MAKING",
+    "FRAUD_PATTERN_DETECTED",
+    "NEGATIVE_GROWTH",
+    "VOLATILITY_THRESHOLD_EXCEEDED",
+)
+(
+    REASON_ELIGIBLE,
+    REASON_AMOUNT_EXCEEDS,
+    REASON_LOSS_MAKING,
+    REASON_FRAUD,
+    REASON_NEGATIVE_GROWTH,
+    REASON_VOLATILITY,
+) = range(len(REASON_CODES))
+
+
+class CompiledPolicy:
     """
-    Deterministically evaluates eligibility.
+    loan_rules flattened into a sorted tier table.
+
+    Rules are matched first-fit in list order. A rule is only ever selected
+    if its max_amount exceeds every earlier rule's, so keeping just those
+    rules yields strictly increasing max_amounts, and the first-fit rule for
+    an amount is the first tier with max_amount >= amount (binary search).
     """
 
-    cv = metrics["cv"]
-    growth = metrics["growth"]
-    fraud_flag = metrics["fraud_flag"]
-    loss_flag = metrics["loss_flag"]
+    def __init__(self, loan_rules: List[Dict]):
+        self.signature = _rules_signature(loan_rules)
+        self.rules = []
+        for rule in loan_rules:
+            if not self.rules or rule["max_amount"] > self.rules[-1]["max_amount"]:
+                self.rules.append(dict(rule))
 
-    # Select rule based on loan amount
-    applicable_rule = None
-    for rule in POLICY_CONFIG["loan_rules"]:
-        if loan_amount <= rule["max_amount"]:
-            applicable_rule = rule
-            break
+        self.max_amounts = [rule["max_amount"] for rule in self.rules]
 
-    if applicable_rule is None:
-        return {
-            "eligible": False,
-            "reason_code": "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT"
-        }
+        # Integer forms for the vectorized path: loan amounts become ceil(paise),
+        # cv is compared in units of 0.0001 (cv > max_cv <=> cv_e4 > floor(max_cv_e4)).
+        self.max_amounts_paise = np.array(
+            [int(amount.scaleb(2).to_integral_value(ROUND_FLOOR)) for amount in self.max_amounts],
+            dtype=np.int64,
+        )
+        self.max_cv_e4 = np.array(
+            [int(Decimal(rule["max_cv"]).scaleb(4).to_integral_value(ROUND_FLOOR)) for rule in self.rules],
+            dtype=np.int64,
+        )
+        self.require_positive_growth = np.array(
+            [bool(rule["require_positive_growth"]) for rule in self.rules], dtype=np.bool_
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def tier_for(self, loan_amount) -> Optional[int]:
+        tier = bisect_left(self.max_amounts, loan_amount)
+        return tier if tier < len(self.rules) else None
 
-    # Deterministic checks
-    if loss_flag:
+    def tiers_for_paise(self, loan_amounts_paise: np.ndarray) -> np.ndarray:
+        """
+        Tier index per amount; len(self) means no applicable rule.
+        """
+        return np.searchsorted(self.max_amounts_paise, loan_amounts_paise, side="left")
+
+
+def _rules_signature(loan_rules: List[Dict]) -> Tuple:
+    return tuple(
+        (rule["max_amount"], rule["max_cv"], rule["require_positive_growth"]) for rule in loan_rules
+    )
+
+
+_COMPILED_POLICY: Optional[CompiledPolicy] = None
+
+
+def get_compiled_policy(policy: Optional[Dict] = None) -> CompiledPolicy:
+    """
+    Compiled form of `policy` (POLICY_CONFIG by default). The compiled table
+    for POLICY_CONFIG is cached and rebuilt only when its loan_rules change.
+    """
+    global _COMPILED_POLICY
+    if policy is not None and policy is not POLICY_CONFIG:
+        return CompiledPolicy(policy["loan_rules"])
+
+    loan_rules = POLICY_CONFIG["loan_rules"]
+    compiled = _COMPILED_POLICY
+    if compiled is None or compiled.signature != _rules_signature(loan_rules):
+        compiled = _COMPILED_POLICY = CompiledPolicy(loan_rules)
+    return compiled
+
+
+def evaluate_rule(metrics: dict, rule: Dict) -> dict:
+    """
+    Deterministic checks for a customer once the applicable rule is known.
+    """
+    if metrics["loss_flag"]:
         return {"eligible": False, "reason_code": "LOSS_MAKING"}
 
-    if fraud_flag:
+    if metrics["fraud_flag"]:
         return {"eligible": False, "reason_code": "FRAUD_PATTERN_DETECTED"}
 
-    if applicable_rule["require_positive_growth"] and growth <= Decimal("0"):
+    if rule["require_positive_growth"] and metrics["growth"] <= _ZERO:
         return {"eligible": False, "reason_code": "NEGATIVE_GROWTH"}
 
-    if cv > applicable_rule["max_cv"]:
+    if metrics["cv"] > rule["max_cv"]:
         return {
             "eligible": False,
             "reason_code": "VOLATILITY_THRESHOLD_EXCEEDED"
         }
 
-    return {"eligible": True, "reason_code": "ELIGIBLE"}
\ No newline at end of file
+    return {"eligible": True, "reason_code": "ELIGIBLE"}
+
+
+def evaluate_loan_eligibility(metrics: dict, loan_amount: Decimal) -> dict:
+    """
+    Deterministically evaluates eligibility.
+    """
+
+    # Select rule based on loan amount
+    policy = get_compiled_policy()
+    tier = policy.tier_for(loan_amount)
+
+    if tier is None:
+        return {
+            "eligible": False,
+            "reason_code": "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT"
+        }
+
+    return evaluate_rule(metrics, policy.rules[tier])
+
+
+# ---------- Batch evaluation ----------
+
+def loan_amounts_to_paise(loan_amounts) -> np.ndarray:
+    """
+    Loan amounts as int64 paise, rounded up so `amount <= max_amount`
+    is preserved exactly for policy limits with at most 2 decimals.
+    """
+    amounts = np.asarray(loan_amounts)
+    if amounts.dtype.kind in "iu":
+        return amounts.astype(np.int64) * 100
+    if amounts.dtype.kind == "f":
+        # Rounding to 1e-4 paise first strips float noise from amount * 100.
+        return np.ceil(np.round(amounts * 100, 4)).astype(np.int64)
+
+    flat = [
+        int(Decimal(str(amount)).scaleb(2).to_integral_value(ROUND_CEILING))
+        for amount in amounts.ravel().tolist()
+    ]
+    return np.array(flat, dtype=np.int64).reshape(amounts.shape)
+
+
+def evaluate_loan_eligibility_batch(
+    records: np.ndarray,
+    loan_amounts,
+    policy: Optional[Dict] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized evaluate_loan_eligibility.
+
+    `records` are METRICS_DTYPE records and `loan_amounts` any array of
+    amounts; the two broadcast against each other, e.g. records[:, None]
+    with a 1-D grid of amounts scores every customer at every amount.
+    Returns (eligible, reason_code) arrays, reason codes indexing REASON_CODES.
+    """
+    compiled = get_compiled_policy(policy)
+    amounts_paise = loan_amounts_to_paise(loan_amounts)
+
+    tiers = compiled.tiers_for_paise(amounts_paise)
+    no_rule = tiers >= len(compiled)
+    tiers = np.minimum(tiers, max(len(compiled) - 1, 0))
+
+    if len(compiled):
+        max_cv_e4 = compiled.max_cv_e4[tiers]
+        require_growth = compiled.require_positive_growth[tiers]
+    else:
+        max_cv_e4 = np.zeros(tiers.shape, dtype=np.int64)
+        require_growth = np.zeros(tiers.shape, dtype=np.bool_)
+
+    shape = np.broadcast_shapes(records.shape, tiers.shape)
+    reasons = np.full(shape, REASON_ELIGIBLE, dtype=np.int8)
+
+    # Apply checks from lowest to highest precedence; later writes win.
+    reasons[np.broadcast_to(records["cv_e4"] > max_cv_e4, shape)] = REASON_VOLATILITY
+    reasons[np.broadcast_to(require_growth & (records["growth_e4"] <= 0), shape)] = REASON_NEGATIVE_GROWTH
+    reasons[np.broadcast_to(records["fraud_flag"], shape)] = REASON_FRAUD
+    reasons[np.broadcast_to(records["loss_flag"], shape)] = REASON_LOSS_MAKING
+    reasons[np.broadcast_to(no_rule, shape)] = REASON_AMOUNT_EXCEEDS
+
+    return reasons == REASON_ELIGIBLE, reasons
+
+
+def reason_code_names(reason_codes: np.ndarray) -> np.ndarray:
+    return np.asarray(REASON_CODES, dtype=object)[reason_codes]
@@ -0,0 +1,266 @@
+# app/core/shared_metrics.py
+
+# Per-customer metrics in an OS shared-memory segment, so every worker
+# process on a host serves from one copy that a single loader published.
+#
+# Segment layout (every section starts on a 64-byte boundary):
+#   header    _HEADER_DTYPE
+#   ids       count x S{id_width}   utf-8 customer ids, NUL padded
+#   records   count x METRICS_DTYPE
+#   slots     capacity x int64      open-addressing hash index: row or -1
+#
+# Slots use linear probing from crc32(id) & (capacity - 1); crc32 is stable
+# across processes, unlike hash().
+
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.analysis.financial_metrics import METRICS_DTYPE
+from app.core.metrics_table import OverlayMetricsMapping
+
+SHARED_FORMAT_VERSION = 1
+
+_MAGIC = b"RISKSHM1"
+_ALIGN = 64
+
+_HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("format_version", "<u4"),
+    ("id_width", "<u4"),
+    ("record_size", "<u4"),
+    ("count", "<u8"),
+    ("capacity", "<u8"),
+    ("version", "S64"),
+])
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _layout(count: int, id_width: int, capacity: int) -> Tuple[int, int, int, int]:
+    ids_offset = _aligned(_HEADER_DTYPE.itemsize)
+    records_offset = _aligned(ids_offset + count * id_width)
+    slots_offset = _aligned(records_offset + count * METRICS_DTYPE.itemsize)
+    return ids_offset, records_offset, slots_offset, slots_offset + capacity * 8
+
+
+def _hashes(keys: List[bytes]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(key) for key in keys), dtype=np.int64, count=len(keys))
+
+
+def _capacity_for(count: int) -> int:
+    # Power of two, at most half full.
+    capacity = 8
+    while capacity < 2 * count:
+        capacity *= 2
+    return capacity
+
+
+def _fill_slots(slots: np.ndarray, hashes: np.ndarray):
+    """
+    Inserts rows 0..len(hashes)-1 with linear probing, all rows at once: each
+    round places one row per free candidate slot, the rest probe onward.
+    """
+    mask = len(slots) - 1
+    slots[:] = -1
+    positions = hashes & mask
+    pending = np.arange(len(hashes), dtype=np.int64)
+    while len(pending):
+        candidates = positions[pending]
+        free = slots[candidates] == -1
+        claimed, first = np.unique(candidates[free], return_index=True)
+        slots[claimed] = pending[free][first]
+        placed = np.zeros(len(hashes), dtype=np.bool_)
+        placed[slots[claimed]] = True
+        pending = pending[~placed[pending]]
+        positions[pending] = (positions[pending] + 1) & mask
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 tracks attached segments too and would unlink this
+        # one when the attaching worker exits.
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+class SharedMetricsStore(OverlayMetricsMapping):
+    """
+    customer_id -> metrics mapping over a shared-memory segment; the same
+    lookup API as MetricsTable, so risk_store can serve it.
+
+    create() copies ids and METRICS_DTYPE records into a new segment (the
+    owner keeps it alive and unlink()s it at shutdown); attach() maps an
+    existing one. Arrays over the segment are read-only views, so attaching
+    costs no copy and no precompute, and resident memory is shared by all
+    attached processes. Lookups return copies of records.
+
+    set_record keeps replaced records in a process-local overlay;
+    incremental updates (monthly_rows) are not available.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, owner: bool = False):
+        header = np.frombuffer(segment.buf, dtype=_HEADER_DTYPE, count=1).copy()[0]
+        if header["magic"] != _MAGIC or int(header["format_version"]) != SHARED_FORMAT_VERSION:
+            raise ValueError(f"Shared memory segment {segment.name} is not a risk metrics store")
+        if int(header["record_size"]) != METRICS_DTYPE.itemsize:
+            raise ValueError(f"Shared memory segment {segment.name} was written with another METRICS_DTYPE")
+
+        count = int(header["count"])
+        id_width = int(header["id_width"])
+        capacity = int(header["capacity"])
+        ids_offset, records_offset, slots_offset, _ = _layout(count, id_width, capacity)
+        self.ids = np.frombuffer(segment.buf, dtype=f"S{id_width}", count=count, offset=ids_offset)
+        self.records = np.frombuffer(segment.buf, dtype=METRICS_DTYPE, count=count, offset=records_offset)
+        self.slots = np.frombuffer(segment.buf, dtype=np.int64, count=capacity, offset=slots_offset)
+        for array in (self.ids, self.records, self.slots):
+            array.flags.writeable = False
+        self.version = header["version"].decode()
+        self.id_width = id_width
+        self.name = segment.name
+        self.owner = owner
+        self._mask = capacity - 1
+        self._segment = segment
+        self._closed = False
+        super().__init__()
+
+    @classmethod
+    def create(
+        cls,
+        customer_ids,
+        records: np.ndarray,
+        name: Optional[str] = None,
+        version: str = "",
+    ) -> "SharedMetricsStore":
+        """
+        New segment holding customer_ids and their records; name=None lets
+        the OS pick one (see .name).
+        """
+        ids = np.char.encode(np.asarray(customer_ids, dtype=str), "utf-8") if len(customer_ids) else np.zeros(0, dtype="S1")
+        records = np.asarray(records, dtype=METRICS_DTYPE)
+        if len(ids) != len(records):
+            raise ValueError("customer_ids and records differ in length")
+        count = len(ids)
+        id_width = max(1, ids.dtype.itemsize)
+        capacity = _capacity_for(count)
+        ids_offset, records_offset, slots_offset, size = _layout(count, id_width, capacity)
+
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        try:
+            header = np.ndarray(1, dtype=_HEADER_DTYPE, buffer=segment.buf)
+            header[0] = (_MAGIC, SHARED_FORMAT_VERSION, id_width, METRICS_DTYPE.itemsize, count, capacity, version.encode())
+            np.ndarray(count, dtype=f"S{id_width}", buffer=segment.buf, offset=ids_offset)[:] = ids
+            np.ndarray(count, dtype=METRICS_DTYPE, buffer=segment.buf, offset=records_offset)[:] = records
+            slots = np.ndarray(capacity, dtype=np.int64, buffer=segment.buf, offset=slots_offset)
+            _fill_slots(slots, _hashes(ids.tolist()))
+            del header, slots
+            return cls(segment, owner=True)
+        except BaseException:
+            segment.close()
+            segment.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedMetricsStore":
+        segment = _attach_segment(name)
+        try:
+            return cls(segment)
+        except BaseException:
+            segment.close()
+            raise
+
+    def position(self, customer_id) -> int:
+        """
+        Row of customer_id in the segment, or -1.
+        """
+        if not isinstance(customer_id, str):
+            return -1
+        key = customer_id.encode("utf-8")
+        if len(key) > self.id_width:
+            return -1
+        slots, ids, mask = self.slots, self.ids, self._mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            row = int(slots[slot])
+            if row < 0:
+                return -1
+            if ids[row] == key:
+                return row
+            slot = (slot + 1) & mask
+
+    def positions(self, customer_ids) -> np.ndarray:
+        """
+        Vectorized position(): rows for an array of ids, -1 where unknown.
+        """
+        keys = np.char.encode(np.asarray(customer_ids, dtype=str).ravel(), "utf-8")
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if not len(keys) or not len(self.ids):
+            return rows
+        probes = _hashes(keys.tolist()) & self._mask
+        active = np.arange(len(keys), dtype=np.int64)
+        while len(active):
+            candidates = self.slots[probes[active]]
+            occupied = candidates >= 0
+            matched = occupied & (self.ids[np.maximum(candidates, 0)] == keys[active])
+            rows[active[matched]] = candidates[matched]
+            active = active[occupied & ~matched]
+            probes[active] = (probes[active] + 1) & self._mask
+        return rows
+
+    def _base_record(self, customer_id: str) -> Optional[np.void]:
+        row = self.position(customer_id)
+        return self.records[row:row + 1].copy()[0] if row >= 0 else None
+
+    def _base_records_for(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self.positions(ids).reshape(ids.shape)
+        found = rows >= 0
+        records = np.zeros(ids.shape, dtype=METRICS_DTYPE)
+        records[found] = self.records[rows[found]]
+        return records, found
+
+    def monthly_rows(self, customer_id: str):
+        raise RuntimeError("Shared metrics store has no monthly aggregates; cannot update incrementally")
+
+    def close(self):
+        """
+        Unmaps the segment from this process; the store is unusable after.
+        """
+        if self._closed:
+            return
+        # The segment can only be unmapped once no array views it.
+        self.ids = self.records = self.slots = None
+        self._closed = True
+        self._segment.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except (AttributeError, BufferError):
+            # Half-built, or a view outlived the store; the mapping then
+            # goes away with the process.
+            pass
+
+    def unlink(self):
+        """
+        Removes the segment (owner, at shutdown); attached processes keep
+        their mapping until they close it.
+        """
+        self._segment.unlink()
+
+    def _base_ids(self) -> Iterator[str]:
+        for key in self.ids.tolist():
+            yield key.decode("utf-8")
+
+    def _base_len(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self._segment.size
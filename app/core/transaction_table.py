@@ -0,0 +1,299 @@
+# app/core/transaction_table.py
+
+# Columnar, array-backed storage for customer transactions.
+#
+# Every transaction is split across three parallel arrays instead of living
+# in its own dict:
+#   months  - int16 month key (months since MONTH_EPOCH_YEAR-01)
+#   amounts - int64 amount in paise (minor units), so sums stay exact
+#   types   - int8 transaction type code (see TXN_TYPE_CODES)
+# Customers own a contiguous row range described by `offsets`.
+
+from array import array
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+MONTH_EPOCH_YEAR = 1970
+
+TXN_OTHER = 0
+TXN_CREDIT = 1
+TXN_DEBIT = 2
+TXN_DEBIT_MICRO = 3
+
+TXN_TYPE_CODES = {
+    "credit": TXN_CREDIT,
+    "debit": TXN_DEBIT,
+    "debit_micro": TXN_DEBIT_MICRO,
+}
+
+
+def month_key(year: int, month: int) -> int:
+    return (int(year) - MONTH_EPOCH_YEAR) * 12 + int(month) - 1
+
+
+def month_from_key(key: int) -> Tuple[int, int]:
+    year, month = divmod(int(key), 12)
+    return year + MONTH_EPOCH_YEAR, month + 1
+
+
+def parse_amount_paise(amount) -> int:
+    """
+    Converts a rupee amount ("1234.5", Decimal, int) to exact integer paise.
+    """
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, Decimal):
+        paise = amount.scaleb(2)
+        if paise != paise.to_integral_value():
+            raise ValueError(f"Amount has more than 2 decimal places: {amount}")
+        return int(paise)
+
+    text = str(amount).strip()
+    negative = text.startswith("-")
+    if negative:
+        text = text[1:]
+    whole, _, fraction = text.partition(".")
+    if not whole.isdigit() or (fraction and not fraction.isdigit()):
+        raise ValueError(f"Invalid amount: {amount}")
+    if len(fraction) > 2:
+        if fraction[2:].strip("0"):
+            raise ValueError(f"Amount has more than 2 decimal places: {amount}")
+        fraction = fraction[:2]
+    paise = int(whole) * 100 + int(fraction.ljust(2, "0"))
+    return -paise if negative else paise
+
+
+def paise_to_decimal(paise: int) -> Decimal:
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def encode_transaction(txn: Dict) -> Tuple[int, int, int]:
+    """
+    {"year", "month", "amount", "type"} -> (month_key, amount_paise, type_code).
+    """
+    return (
+        month_key(txn["year"], txn["month"]),
+        parse_amount_paise(txn["amount"]),
+        TXN_TYPE_CODES.get(txn["type"], TXN_OTHER),
+    )
+
+
+class TransactionTable:
+    """
+    Immutable columnar transaction table; build it with TransactionTableBuilder.
+    """
+
+    def __init__(
+        self,
+        customer_ids: List[str],
+        offsets: np.ndarray,
+        months: np.ndarray,
+        amounts: np.ndarray,
+        types: np.ndarray,
+    ):
+        self.customer_ids = customer_ids
+        self.offsets = offsets
+        self.months = months
+        self.amounts = amounts
+        self.types = types
+        self._index = {customer_id: i for i, customer_id in enumerate(customer_ids)}
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def __contains__(self, customer_id: str) -> bool:
+        return customer_id in self._index
+
+    @property
+    def num_transactions(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.months.nbytes + self.amounts.nbytes + self.types.nbytes
+
+    def customer_range(self, customer_id: str) -> Tuple[int, int]:
+        i = self._index[customer_id]
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def customer_columns(self, customer_id: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (months, amounts, types) views for one customer, without copying.
+        """
+        start, stop = self.customer_range(customer_id)
+        return self.months[start:stop], self.amounts[start:stop], self.types[start:stop]
+
+    def head(self, num_customers: int) -> "TransactionTable":
+        """
+        The first num_customers customers, as views over this table's columns.
+        """
+        stop = int(self.offsets[num_customers])
+        return TransactionTable(
+            customer_ids=self.customer_ids[:num_customers],
+            offsets=self.offsets[:num_customers + 1],
+            months=self.months[:stop],
+            amounts=self.amounts[:stop],
+            types=self.types[:stop],
+        )
+
+    @classmethod
+    def concatenate(cls, tables: List["TransactionTable"]) -> "TransactionTable":
+        customer_ids = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for table in tables:
+            customer_ids.extend(table.customer_ids)
+            offsets.append(table.offsets[1:] + base)
+            base += table.num_transactions
+        return cls(
+            customer_ids=customer_ids,
+            offsets=np.concatenate(offsets),
+            months=np.concatenate([t.months for t in tables] or [np.zeros(0, dtype=np.int16)]),
+            amounts=np.concatenate([t.amounts for t in tables] or [np.zeros(0, dtype=np.int64)]),
+            types=np.concatenate([t.types for t in tables] or [np.zeros(0, dtype=np.int8)]),
+        )
+
+    @classmethod
+    def from_customer_dict(cls, raw_data: Dict) -> "TransactionTable":
+        """
+        Builds a table from the generated dataset layout:
+        {customer_id: {"transactions": [{"year", "month", "amount", "type"}, ...]}}
+        """
+        builder = TransactionTableBuilder()
+        for customer_id, payload in raw_data.items():
+            builder.add_customer(customer_id, payload["transactions"])
+        return builder.build()
+
+
+class TransactionTableBuilder:
+
+    def __init__(self):
+        self._customer_ids: List[str] = []
+        self._offsets = array("q", [0])
+        self._months = array("h")
+        self._amounts = array("q")
+        self._types = array("b")
+
+    def __len__(self) -> int:
+        return len(self._customer_ids)
+
+    @property
+    def num_transactions(self) -> int:
+        return len(self._amounts)
+
+    def add_customer(self, customer_id: str, transactions: Iterable[Dict]):
+        months, amounts, types = self._months, self._amounts, self._types
+        for txn in transactions:
+            months.append(month_key(txn["year"], txn["month"]))
+            amounts.append(parse_amount_paise(txn["amount"]))
+            types.append(TXN_TYPE_CODES.get(txn["type"], TXN_OTHER))
+        self._customer_ids.append(customer_id)
+        self._offsets.append(len(amounts))
+
+    def add_customer_rows(self, customer_id: str, rows: Iterable[Tuple[int, int, int]]):
+        """
+        Adds already-encoded (month_key, amount_paise, type_code) rows.
+        """
+        months, amounts, types = self._months, self._amounts, self._types
+        for key, paise, code in rows:
+            months.append(key)
+            amounts.append(paise)
+            types.append(code)
+        self._customer_ids.append(customer_id)
+        self._offsets.append(len(amounts))
+
+    def build(self) -> TransactionTable:
+        # The numpy columns are zero-copy views over the builder's buffers;
+        # hand those buffers over and start the builder afresh.
+        table = TransactionTable(
+            customer_ids=self._customer_ids,
+            offsets=np.frombuffer(self._offsets, dtype=np.int64),
+            months=np.frombuffer(self._months, dtype=np.int16),
+            amounts=np.frombuffer(self._amounts, dtype=np.int64),
+            types=np.frombuffer(self._types, dtype=np.int8),
+        )
+        self.__init__()
+        return table
+
+
+class MonthlyTable:
+    """
+    Per-customer monthly aggregates in columnar form (one row per customer-month).
+
+    Rows of a customer are contiguous (see `offsets`) and keep the order in
+    which the months first appeared in the customer's transactions.
+    """
+
+    def __init__(
+        self,
+        customer_ids: List[str],
+        offsets: np.ndarray,
+        month_keys: np.ndarray,
+        total_credit: np.ndarray,
+        total_debit: np.ndarray,
+        micro_count: np.ndarray,
+    ):
+        self.customer_ids = customer_ids
+        self.offsets = offsets
+        self.month_keys = month_keys
+        self.total_credit = total_credit
+        self.total_debit = total_debit
+        self.micro_count = micro_count
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    @property
+    def net_cashflow(self) -> np.ndarray:
+        return self.total_credit - self.total_debit
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.offsets.nbytes + self.month_keys.nbytes + self.total_credit.nbytes
+            + self.total_debit.nbytes + self.micro_count.nbytes
+        )
+
+    def customer_rows(self, i: int) -> slice:
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def take(self, order: np.ndarray) -> "MonthlyTable":
+        """
+        Returns a new table with customers rearranged as customer_ids[order].
+        """
+        counts = np.diff(self.offsets)[order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = (
+            np.arange(offsets[-1], dtype=np.int64)
+            - np.repeat(offsets[:-1], counts)
+            + np.repeat(self.offsets[:-1][order], counts)
+        )
+        return MonthlyTable(
+            customer_ids=[self.customer_ids[i] for i in order],
+            offsets=offsets,
+            month_keys=self.month_keys[rows],
+            total_credit=self.total_credit[rows],
+            total_debit=self.total_debit[rows],
+            micro_count=self.micro_count[rows],
+        )
+
+    @classmethod
+    def concatenate(cls, tables: List["MonthlyTable"]) -> "MonthlyTable":
+        customer_ids = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for table in tables:
+            customer_ids.extend(table.customer_ids)
+            offsets.append(table.offsets[1:] + base)
+            base += int(table.offsets[-1])
+        return cls(
+            customer_ids=customer_ids,
+            offsets=np.concatenate(offsets),
+            month_keys=np.concatenate([t.month_keys for t in tables] or [np.zeros(0, dtype=np.int16)]),
+            total_credit=np.concatenate([t.total_credit for t in tables] or [np.zeros(0, dtype=np.int64)]),
+            total_debit=np.concatenate([t.total_debit for t in tables] or [np.zeros(0, dtype=np.int64)]),
+            micro_count=np.concatenate([t.micro_count for t in tables] or [np.zeros(0, dtype=np.int64)]),
+        )
@@ -0,0 +1,232 @@
+# app/core/window_metrics.py
+
+# Growth, CV and stability over arbitrary month windows.
+#
+# CashflowSeries keeps every customer's monthly net cashflow sorted by month,
+# with prefix sums of net cashflow, its square and debit_micro counts. A
+# window [start, end] of month keys maps to a row range by binary search over
+# the customer's (few dozen) months, and its sums are two prefix lookups, so
+# each query costs the same whatever the window length. Batches of queries
+# are answered with one vectorized pass (see metrics_from_window_sums).
+#
+# Within a window, metrics follow the full-history definitions over the
+# months that have transactions: growth compares the first and last such
+# month, CV is the population CV of their net cashflow.
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.analysis.financial_metrics import METRICS_DTYPE, metrics_from_window_sums
+from app.core.transaction_table import MonthlyTable, month_key
+
+# Prefix sums of squares stay int64 while they provably fit; beyond that
+# they fall back to exact Python ints.
+_INT64_SAFE = float(2 ** 62)
+
+
+def as_month_key(month) -> int:
+    """
+    A month key from a (year, month) pair, or a month key unchanged.
+    """
+    if isinstance(month, (tuple, list)):
+        return month_key(*month)
+    return int(month)
+
+
+class CashflowSeries:
+    """
+    Monthly net cashflow series of many customers, ordered by month, with
+    prefix sums for O(1) window aggregates.
+
+    customer_ids must be sorted ascending (as in MetricsTable); rows of
+    customer i are offsets[i]:offsets[i + 1].
+    """
+
+    def __init__(
+        self,
+        customer_ids: np.ndarray,
+        offsets: np.ndarray,
+        month_keys: np.ndarray,
+        net_cashflow: np.ndarray,
+        micro_count: np.ndarray,
+    ):
+        self.customer_ids = customer_ids
+        self.offsets = offsets
+        self.month_keys = month_keys
+        self.net_cashflow = net_cashflow
+
+        self.prefix_net = np.zeros(len(net_cashflow) + 1, dtype=np.int64)
+        np.cumsum(net_cashflow, out=self.prefix_net[1:])
+        self.prefix_micro = np.zeros(len(micro_count) + 1, dtype=np.int64)
+        np.cumsum(micro_count, out=self.prefix_micro[1:])
+
+        squares = net_cashflow.astype(np.float64) ** 2
+        if squares.sum() < _INT64_SAFE:
+            self.prefix_sq = np.zeros(len(net_cashflow) + 1, dtype=np.int64)
+            np.cumsum(net_cashflow * net_cashflow, out=self.prefix_sq[1:])
+        else:
+            values = [0] + [value * value for value in net_cashflow.tolist()]
+            self.prefix_sq = np.cumsum(np.array(values, dtype=object))
+
+        # (customer, month) as one sortable int64, for vectorized lookups.
+        self._base = int(month_keys.min()) if len(month_keys) else 0
+        self._span = (int(month_keys.max()) - self._base + 2) if len(month_keys) else 2
+        customer_of_row = np.repeat(np.arange(len(customer_ids), dtype=np.int64), np.diff(offsets))
+        self._keys = customer_of_row * self._span + (month_keys.astype(np.int64) - self._base)
+
+    @classmethod
+    def from_monthly(cls, customer_ids: np.ndarray, monthly: MonthlyTable) -> "CashflowSeries":
+        """
+        From monthly aggregates aligned with the sorted customer_ids.
+        """
+        counts = np.diff(monthly.offsets)
+        month_keys = np.asarray(monthly.month_keys)
+        # Months are usually already in order within each customer.
+        rising = np.ones(len(month_keys), dtype=np.bool_)
+        rising[1:] = month_keys[1:] > month_keys[:-1]
+        rising[np.asarray(monthly.offsets[:-1])[counts > 0]] = True
+        if rising.all():
+            order = slice(None)
+        else:
+            customer_of_row = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+            order = np.lexsort((month_keys, customer_of_row))
+        return cls(
+            np.asarray(customer_ids),
+            np.asarray(monthly.offsets, dtype=np.int64),
+            month_keys[order].astype(np.int64),
+            np.asarray(monthly.net_cashflow)[order].astype(np.int64),
+            np.asarray(monthly.micro_count)[order].astype(np.int64),
+        )
+
+    @classmethod
+    def from_customer_rows(cls, customer_id: str, month_keys, total_credit, total_debit, micro_count) -> "CashflowSeries":
+        """
+        Series of a single customer, e.g. from MetricsTable.monthly_rows.
+        """
+        keys = np.asarray(month_keys, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        net = np.asarray(total_credit, dtype=np.int64) - np.asarray(total_debit, dtype=np.int64)
+        return cls(
+            np.asarray([customer_id], dtype=str),
+            np.array([0, len(keys)], dtype=np.int64),
+            keys[order],
+            net[order],
+            np.asarray(micro_count, dtype=np.int64)[order],
+        )
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    @property
+    def nbytes(self) -> int:
+        size = self.offsets.nbytes + self.month_keys.nbytes + self.net_cashflow.nbytes
+        size += self.prefix_net.nbytes + self.prefix_micro.nbytes + self._keys.nbytes
+        return size + (self.prefix_sq.nbytes if self.prefix_sq.dtype != object else 8 * len(self.prefix_sq))
+
+    def positions(self, customer_ids) -> np.ndarray:
+        """
+        Index of each customer in this series, -1 where unknown.
+        """
+        ids = np.asarray(customer_ids, dtype=str)
+        if not len(self.customer_ids):
+            return np.full(ids.shape, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.customer_ids, ids), len(self.customer_ids) - 1)
+        return np.where(self.customer_ids[positions] == ids, positions, -1).astype(np.int64)
+
+    def last_month(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Latest month key of each customer (-1 for customers without months).
+        """
+        last = np.full(positions.shape, -1, dtype=np.int64)
+        has_months = (positions >= 0) & (self.offsets[positions + 1] > self.offsets[positions])
+        last[has_months] = self.month_keys[self.offsets[positions[has_months] + 1] - 1]
+        return last
+
+    def window_rows(self, positions: np.ndarray, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row range [lo, hi) of each customer's months within [start, end].
+        """
+        base, span = self._base, self._span
+        customer = positions * span
+        lo = np.searchsorted(self._keys, customer + np.clip(start - base, 0, span - 1), side="left")
+        hi = np.searchsorted(self._keys, customer + np.clip(end - base, -1, span - 1), side="right")
+        return lo, np.maximum(hi, lo)
+
+    def window_records(self, positions: np.ndarray, start, end) -> np.ndarray:
+        """
+        METRICS_DTYPE records of customers `positions` (all >= 0) over
+        [start, end] month keys (scalars or arrays broadcasting with them).
+        """
+        start, end = np.broadcast_arrays(
+            np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64), positions
+        )[:2]
+        lo, hi = self.window_rows(positions, start, end)
+        count = hi - lo
+        last = np.maximum(hi - 1, 0)
+        first = np.minimum(lo, max(len(self.net_cashflow) - 1, 0))
+        net = self.net_cashflow if len(self.net_cashflow) else np.zeros(1, dtype=np.int64)
+        return metrics_from_window_sums(
+            count,
+            self.prefix_net[hi] - self.prefix_net[lo],
+            self.prefix_sq[hi] - self.prefix_sq[lo],
+            np.where(count > 0, net[first], 0),
+            np.where(count > 0, net[last], 0),
+            self.prefix_micro[hi] - self.prefix_micro[lo],
+            lambda i: self.net_cashflow[lo[i]:hi[i]].tolist(),
+        )
+
+
+def window_bounds(
+    series: CashflowSeries,
+    positions: np.ndarray,
+    start=None,
+    end=None,
+    months: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (start, end) month keys per customer for a window given either as
+    start/end (each (year, month) or a month key) or as the trailing
+    `months` months up to `end`. A missing end means each customer's latest
+    month; a missing start means their first.
+    """
+    if months is not None and start is not None:
+        raise ValueError("Give either start or months, not both")
+    if months is not None and months < 1:
+        raise ValueError("months must be at least 1")
+
+    if end is None:
+        end_keys = series.last_month(positions)
+    else:
+        end_keys = np.full(positions.shape, as_month_key(end), dtype=np.int64)
+
+    if months is not None:
+        start_keys = end_keys - (months - 1)
+    elif start is not None:
+        start_keys = np.full(positions.shape, as_month_key(start), dtype=np.int64)
+    else:
+        start_keys = np.full(positions.shape, np.iinfo(np.int32).min, dtype=np.int64)
+    return start_keys, end_keys
+
+
+def window_records_for(
+    series: CashflowSeries,
+    customer_ids: Sequence[str],
+    start=None,
+    end=None,
+    months: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (records, found) for many customers over one window specification;
+    records of unknown customers are zero-filled.
+    """
+    ids = np.asarray(customer_ids, dtype=str).reshape(-1)
+    positions = series.positions(ids)
+    found = positions >= 0
+    records = np.zeros(len(ids), dtype=METRICS_DTYPE)
+    if found.any():
+        known = positions[found]
+        start_keys, end_keys = window_bounds(series, known, start, end, months)
+        records[found] = series.window_records(known, start_keys, end_keys)
+    return records, found
+
@@ -0,0 +1,321 @@
+# app/data/vectorized_generator.py
+
+# Seeded, NumPy-vectorized counterpart of FinancialProfileGenerator for
+# scale testing.
+#
+# The same four profiles (stable, growing, declining, fraud) are generated a
+# block of customers at a time as integer-paise columns instead of dicts:
+# every (customer, month, kind) gets a transaction count and a total, and
+# totals are split across transactions with random weights exactly like
+# _distribute_amount (round-half-even to the paisa, remainder on the last one).
+# Trends continue across years, so a multi-year dataset keeps growing or
+# declining month over month.
+#
+# Block b is seeded with SeedSequence(seed, spawn_key=(b,)), so the output
+# depends only on (seed, block_size), never on how many workers produced it.
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.dataset_shards import ShardWriter, encode_customer_line
+from app.core.parallel import map_ordered
+from app.core.transaction_table import (
+    TXN_CREDIT,
+    TXN_DEBIT,
+    TXN_DEBIT_MICRO,
+    TransactionTable,
+    month_from_key,
+    month_key,
+)
+
+PROFILES = ("stable", "growing", "declining", "fraud")
+PROFILE_STABLE, PROFILE_GROWING, PROFILE_DECLINING, PROFILE_FRAUD = range(len(PROFILES))
+
+# Customers generated (and seeded) together; part of the reproducibility key.
+BLOCK_SIZE = 1000
+
+_TYPE_NAMES = {TXN_CREDIT: "credit", TXN_DEBIT: "debit", TXN_DEBIT_MICRO: "debit_micro"}
+
+# Per (customer, month) segment kinds, in the order they are emitted.
+_SEGMENT_CODES = np.array([TXN_DEBIT_MICRO, TXN_CREDIT, TXN_DEBIT], dtype=np.int8)
+
+
+def customer_id_width(num_customers: int) -> int:
+    return max(3, len(str(num_customers)))
+
+
+def _integers(rng: np.random.Generator, low: int, high: int, shape) -> np.ndarray:
+    # Inclusive bounds, like random.randint.
+    return rng.integers(low, high + 1, size=shape)
+
+
+def _monthly_plan(rng: np.random.Generator, profiles: np.ndarray, num_months: int):
+    """
+    (counts, totals) of shape (customers, months, 3) for the micro / credit /
+    debit segments of every customer-month; totals are int64 paise.
+    """
+    n = len(profiles)
+    shape = (n, num_months)
+    m = np.arange(num_months, dtype=np.float64)
+
+    counts = np.zeros(shape + (3,), dtype=np.int64)
+    totals = np.zeros(shape + (3,), dtype=np.float64)
+
+    # Draw every profile's randomness for the whole block up front so the
+    # stream of draws does not depend on the profile mix.
+    stable_in_noise = _integers(rng, -5, 5, shape) / 100
+    stable_out_noise = _integers(rng, -2, 2, shape) / 100
+    spikes = np.where(rng.random(shape) < 0.35, _integers(rng, 3, 8, shape), 1)
+    micro_burst = rng.random(shape) < 0.5
+    count_draws = rng.random(shape + (2,))
+
+    def draw_counts(low, high, column):
+        return low + np.floor(count_draws[..., column] * (high - low + 1)).astype(np.int64)
+
+    plans = {
+        PROFILE_STABLE: (
+            500000 * (1 + stable_in_noise), 400000 * (1 + stable_out_noise), (10, 20), (15, 25),
+        ),
+        PROFILE_GROWING: (
+            np.broadcast_to(300000 * 1.05 ** m, shape), np.broadcast_to(200000 * 1.04 ** m, shape), (12, 22), (15, 28),
+        ),
+        PROFILE_DECLINING: (
+            np.broadcast_to(600000 * 0.95 ** m, shape), np.broadcast_to(500000 * 0.95 ** m, shape), (8, 18), (12, 22),
+        ),
+        PROFILE_FRAUD: (
+            200000.0 * spikes, np.full(shape, 180000.0), (5, 15), (20, 40),
+        ),
+    }
+    for profile, (inflow, outflow, credit_range, debit_range) in plans.items():
+        rows = profiles == profile
+        if not rows.any():
+            continue
+        totals[rows, :, 1] = inflow[rows]
+        totals[rows, :, 2] = outflow[rows]
+        counts[rows, :, 1] = draw_counts(*credit_range, 0)[rows]
+        counts[rows, :, 2] = draw_counts(*debit_range, 1)[rows]
+
+    fraud = profiles == PROFILE_FRAUD
+    burst = micro_burst & fraud[:, None]
+    counts[..., 0] = np.where(burst, 25, 0)
+    totals[..., 0] = np.where(burst, 5000.0, 0.0)
+
+    totals_paise = np.round(totals * 100).astype(np.int64)
+    return counts, totals_paise
+
+
+def _distribute(rng: np.random.Generator, counts: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """
+    Splits each segment total across its count with weights in [1, 100],
+    rounding half-even to the paisa and putting the remainder on the last row.
+    """
+    num_rows = int(counts.sum())
+    segment = np.repeat(np.arange(len(counts)), counts)
+    weights = _integers(rng, 1, 100, num_rows)
+
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    cumulative = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(weights, out=cumulative[1:])
+    weight_sums = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+    scaled = weights * totals[segment]
+    divisor = weight_sums[segment]
+    amounts, remainder = np.divmod(scaled, divisor)
+    round_up = (2 * remainder > divisor) | ((2 * remainder == divisor) & (amounts % 2 == 1))
+    amounts += round_up
+
+    nonempty = counts > 0
+    last = offsets[1:][nonempty] - 1
+    cumulative_amounts = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(amounts, out=cumulative_amounts[1:])
+    segment_sums = cumulative_amounts[offsets[1:]] - cumulative_amounts[offsets[:-1]]
+    amounts[last] += (totals - segment_sums)[nonempty]
+    return amounts
+
+
+def generate_block(
+    seed: int,
+    block: int,
+    num_customers: int,
+    start_year: int = 2025,
+    years: int = 1,
+    block_size: int = BLOCK_SIZE,
+) -> Tuple[TransactionTable, List[str]]:
+    """
+    Customers block * block_size + 1 ... (capped at num_customers) as a
+    TransactionTable, plus each customer's profile name.
+    """
+    first = block * block_size
+    n = max(0, min(block_size, num_customers - first))
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    num_months = 12 * years
+
+    profiles = rng.integers(0, len(PROFILES), size=n)
+    counts, totals = _monthly_plan(rng, profiles, num_months)
+    counts = counts.reshape(-1)
+    totals = totals.reshape(-1)
+
+    amounts = _distribute(rng, counts, totals)
+    first_key = month_key(start_year, 1)
+    segment_months = np.tile(np.repeat(np.arange(num_months, dtype=np.int16) + first_key, 3), n)
+    segment_codes = np.tile(_SEGMENT_CODES, n * num_months)
+
+    per_customer = counts.reshape(n, -1).sum(axis=1)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(per_customer, out=offsets[1:])
+
+    width = customer_id_width(num_customers)
+    table = TransactionTable(
+        customer_ids=[f"cust_{first + i + 1:0{width}d}" for i in range(n)],
+        offsets=offsets,
+        months=np.repeat(segment_months, counts).astype(np.int16),
+        amounts=amounts,
+        types=np.repeat(segment_codes, counts),
+    )
+    return table, [PROFILES[p] for p in profiles.tolist()]
+
+
+def generate_transaction_table(
+    num_customers: int,
+    seed: int = 0,
+    start_year: int = 2025,
+    years: int = 1,
+    block_size: int = BLOCK_SIZE,
+) -> TransactionTable:
+    """
+    The whole dataset as one in-memory TransactionTable (for fixtures and
+    benchmarks that don't need a file).
+    """
+    return TransactionTable.concatenate([
+        generate_block(seed, b, num_customers, start_year, years, block_size)[0]
+        for b in range(num_blocks(num_customers, block_size))
+    ])
+
+
+def num_blocks(num_customers: int, block_size: int = BLOCK_SIZE) -> int:
+    return -(-num_customers // block_size)
+
+
+def format_paise(paise: int) -> str:
+    sign = "-" if paise < 0 else ""
+    whole, fraction = divmod(abs(paise), 100)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+def table_json_members(table: TransactionTable, profiles: List[str]) -> str:
+    """
+    '"cust_001": {"profile": ..., "transactions": [...]}, ...' in the
+    generated_transactions.json schema (amounts as strings).
+    """
+    dates = {}
+    members = []
+    months = table.months.tolist()
+    amounts = table.amounts.tolist()
+    types = table.types.tolist()
+    for i, customer_id in enumerate(table.customer_ids):
+        head = f'{{"customer_id": "{customer_id}", "year": '
+        txns = []
+        for row in range(int(table.offsets[i]), int(table.offsets[i + 1])):
+            key = months[row]
+            date = dates.get(key)
+            if date is None:
+                year, month = month_from_key(key)
+                date = dates[key] = f'{year}, "month": {month}, "amount": "'
+            txns.append(f'{head}{date}{format_paise(amounts[row])}", "type": "{_TYPE_NAMES[types[row]]}"}}')
+        members.append(f'{json.dumps(customer_id)}: {{"profile": "{profiles[i]}", "transactions": [{", ".join(txns)}]}}')
+    return ", ".join(members)
+
+
+def _generate_json_block(args) -> str:
+    # Runs in a worker process.
+    seed, block, num_customers, start_year, years, block_size = args
+    table, profiles = generate_block(seed, block, num_customers, start_year, years, block_size)
+    return table_json_members(table, profiles)
+
+
+def write_json_dataset(
+    output_path: Path,
+    num_customers: int,
+    seed: int = 0,
+    start_year: int = 2025,
+    years: int = 1,
+    workers: Optional[int] = None,
+    block_size: int = BLOCK_SIZE,
+) -> Path:
+    """
+    Writes a generated_transactions.json-compatible file (compact, no
+    indentation) block by block, generating blocks across processes.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    tasks = [
+        (seed, b, num_customers, start_year, years, block_size)
+        for b in range(num_blocks(num_customers, block_size))
+    ]
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write("{")
+        for i, text in enumerate(map_ordered(_generate_json_block, tasks, min(workers, len(tasks)))):
+            if i:
+                f.write(", ")
+            f.write(text)
+        f.write("}")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _generate_shard_block(args) -> List[Tuple[str, int]]:
+    # Runs in a worker process.
+    seed, block, num_customers, start_year, years, block_size = args
+    return table_shard_lines(*generate_block(seed, block, num_customers, start_year, years, block_size))
+
+
+def table_shard_lines(table: TransactionTable, profiles: List[str]) -> List[Tuple[str, int]]:
+    """
+    One (shard line, transaction count) per customer of the table.
+    """
+    lines = []
+    for i, customer_id in enumerate(table.customer_ids):
+        start, stop = int(table.offsets[i]), int(table.offsets[i + 1])
+        line = encode_customer_line(
+            customer_id, profiles[i], table.months[start:stop], table.amounts[start:stop], table.types[start:stop]
+        )
+        lines.append((line, stop - start))
+    return lines
+
+
+def write_sharded_dataset(
+    output_dir: Path,
+    num_customers: int,
+    seed: int = 0,
+    start_year: int = 2025,
+    years: int = 1,
+    workers: Optional[int] = None,
+    num_shards: int = 8,
+    block_size: int = BLOCK_SIZE,
+) -> Path:
+    """
+    Streams the dataset into the sharded line-delimited format (see
+    app/core/dataset_shards.py), generating blocks across processes.
+    Customers are split into num_shards contiguous shards.
+    """
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    tasks = [
+        (seed, b, num_customers, start_year, years, block_size)
+        for b in range(num_blocks(num_customers, block_size))
+    ]
+    metadata = {"generator": {"seed": seed, "start_year": start_year, "years": years, "block_size": block_size}}
+    customers_per_shard = -(-num_customers // max(1, num_shards)) if num_customers else 1
+
+    with ShardWriter(output_dir, customers_per_shard, metadata) as writer:
+        for lines in map_ordered(_generate_shard_block, tasks, min(workers, len(tasks))):
+            for line, num_transactions in lines:
+                writer.write_line(line, num_transactions)
+    return Path(output_dir)
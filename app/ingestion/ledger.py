@@ -0,0 +1,86 @@
+# app/ingestion/ledger.py
+
+# Which statement files have already been written into a dataset, so that
+# ingesting the same statements again is a no-op.
+#
+# A statement is identified by its customer_id and the SHA-256 of its
+# contents (not its path), so moved or renamed copies are recognized too.
+# The ledger is a JSON-lines file next to the dataset; every ingest run
+# appends one line {"dataset": <fingerprint after the write>, "statements":
+# [[customer_id, sha256], ...]}. If the dataset's current fingerprint is not
+# the one recorded last, the dataset was replaced or rewritten by something
+# else (e.g. a regenerated dataset) and the ledger no longer describes it:
+# it is then ignored and started afresh.
+#
+# The ledger line is written right after the dataset rewrite, not together
+# with it: a crash between the two can still let that one run be ingested
+# twice.
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable, Optional, Set, Tuple
+
+from app.core.dataset_shards import dataset_root
+from app.core.metrics_snapshot import dataset_fingerprint
+
+StatementKey = Tuple[str, str]
+
+
+def default_ledger_path(data_path: Path) -> Path:
+    base = dataset_root(data_path) or Path(data_path)
+    return base.with_name(base.name + ".ingested.jsonl")
+
+
+def statement_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestLedger:
+    """
+    The statement keys ((customer_id, sha256) pairs) already ingested into
+    the dataset at data_path.
+    """
+
+    def __init__(self, data_path: Path, path: Optional[Path] = None):
+        self.data_path = Path(data_path)
+        self.path = Path(path) if path is not None else default_ledger_path(data_path)
+        self._keys: Set[StatementKey] = set()
+        self._stale = False
+        self._read()
+
+    def _read(self):
+        if not self.path.exists():
+            return
+        fingerprint = None
+        with open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                fingerprint = entry["dataset"]
+                self._keys.update((customer_id, sha256) for customer_id, sha256 in entry["statements"])
+        if fingerprint != dataset_fingerprint(self.data_path):
+            self._keys.clear()
+            self._stale = True
+
+    def __contains__(self, key: StatementKey) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def record(self, keys: Iterable[StatementKey]):
+        """
+        Adds keys of statements whose rows were just written to the dataset.
+        """
+        keys = sorted(set(keys))
+        entry = {"dataset": dataset_fingerprint(self.data_path), "statements": [list(key) for key in keys]}
+        with open(self.path, "w" if self._stale else "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._stale = False
+        self._keys.update(keys)
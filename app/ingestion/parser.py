@@ -1,17 +1,42 @@
+import io
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 from decimal import Decimal
 
 
+@lru_cache(maxsize=65536)
+def _format_statement_date(date_str: str) -> str:
+    # Statements repeat the same few thousand dates; parse each one once.
+    return datetime.strptime(date_str, "%d-%m-%Y").strftime("%Y-%m-%d")
+
+
+def _compile_txn_pattern(date_pattern: str):
+    return re.compile(rf"({date_pattern})\s+(.+?)\s+(-?[\d,]+(?:\.\d+)?)\s+(.+)")
+
+
 class BankStatementParser:
 
     DATE_PATTERN = r"\d{2}-\d{2}-\d{4}"
-    CREDIT_KEYWORDS = ["credit", "cr", "in"]
-    DEBIT_KEYWORDS = ["debit", "dr", "wdl", "out"]
+    CREDIT_KEYWORDS = frozenset(["credit", "cr", "in"])
+    DEBIT_KEYWORDS = frozenset(["debit", "dr", "wdl", "out"])
+
+    # Compiled once per class: subclasses that override DATE_PATTERN get
+    # their own (see __init_subclass__) unless they set TXN_PATTERN.
+    TXN_PATTERN = _compile_txn_pattern(DATE_PATTERN)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "TXN_PATTERN" not in cls.__dict__:
+            cls.TXN_PATTERN = _compile_txn_pattern(cls.DATE_PATTERN)
 
     def __init__(self, customer_id: str):
         self.customer_id = customer_id
+        # Lines that looked like transactions but failed to parse: counted
+        # by parse_stream, kept by parse_text.
+        self.rejected = 0
+        self.rejects: List[Dict] = []
 
     def _normalize_txn_type(self, raw_type: str) -> str:
         token = raw_type.lower().split()
@@ -27,39 +52,65 @@ class BankStatementParser:
         return Decimal(cleaned)
 
     def _format_date(self, date_str: str) -> str:
-        return datetime.strptime(date_str, "%d-%m-%Y").strftime("%Y-%m-%d")
+        return _format_statement_date(date_str)
 
-    def parse_text(self, raw_text: str) -> List[Dict]:
-        
-        transactions = []
-        lines = raw_text.split("\n")
+    def parse_stream(
+        self,
+        lines: Iterable[str],
+        on_reject: Optional[Callable[[Dict], None]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Lazily parses statement lines from a file object or any iterable of
+        lines, yielding the same transactions as parse_text.
 
-        txn_pattern = re.compile(
-            rf"({self.DATE_PATTERN})\s+(.+?)\s+(-?[\d,]+(?:\.\d+)?)\s+(.+)"
-        )
+        Lines that look like transactions but fail to parse are counted in
+        self.rejected, passed to `on_reject` as {"line_number", "line",
+        "error"} (1-based line number, stripped line) and skipped; lines that
+        don't look like transactions are skipped silently.
+        """
+        match_line = self.TXN_PATTERN.match
+        customer_id = self.customer_id
 
-        for line in lines:
+        for line_number, line in enumerate(lines, 1):
             try:
                 line = line.strip()
 
-                match = txn_pattern.match(line)
+                match = match_line(line)
                 if not match:
                     continue
 
                 date_raw, txn_type_raw, amount_raw, description_raw = match.groups()
 
                 transaction = {
-                    "customer_id": self.customer_id,
+                    "customer_id": customer_id,
                     "date": self._format_date(date_raw),
                     "transaction_type": self._normalize_txn_type(txn_type_raw),
                     "amount": self._parse_amount(amount_raw),
                     "description": description_raw.strip(),
                 }
-
-                transactions.append(transaction)
             except Exception as e:
-                print(f"Error parsing line: '{line}' - {e}")
+                self.rejected += 1
+                if on_reject is not None:
+                    on_reject({"line_number": line_number, "line": line, "error": str(e)})
                 continue
 
-        return transactions
-    
\ No newline at end of file
+            yield transaction
+
+    def parse_text(self, raw_text: str, on_reject: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        All transactions of a statement; rejected lines are kept in
+        self.rejects and also passed to `on_reject` (see parse_stream).
+        Nothing is printed.
+        """
+        # newline="\n" splits exactly where raw_text.split("\n") would,
+        # without materialising the list of lines.
+        lines = io.StringIO(raw_text, newline="\n")
+        self.rejects = []
+        rejects = self.rejects
+
+        def reject(details: Dict):
+            rejects.append(details)
+            if on_reject is not None:
+                on_reject(details)
+
+        return list(self.parse_stream(lines, on_reject=reject))
@@ -0,0 +1,190 @@
+# app/ingestion/pipeline.py
+
+# Bulk ingestion: raw bank statements -> BankStatementParser -> risk store.
+#
+# Statement files are parsed across a process pool. Workers normalize the
+# parser's {"date", "transaction_type", "amount"} records to the metrics
+# schema ({"year", "month", "amount", "type"}) and encode them to compact
+# (month_key, amount_paise, type_code) rows; the parent collects the rows per
+# customer and merges them into the risk store's dataset (DATA_PATH) with
+# persist_transaction_rows, so they are on disk for the next process and the
+# next reload(). Rows are buffered packed (24 bytes each, see PackedRows) and
+# merged once per run, so the dataset is rewritten once however many
+# statements there are. The store is then reloaded from it.
+#
+# Statements already written into the dataset (see app/ingestion/ledger.py)
+# are skipped, so ingesting the same files again changes nothing.
+#
+# A statement's customer_id is its file name without the extension
+# (statements/2024/cust_001.txt -> "cust_001"), so one customer's statements
+# can sit in separate subdirectories.
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core import risk_store
+from app.core.dataset_update import PackedRows
+from app.core.parallel import map_ordered
+from app.core.transaction_table import encode_transaction
+from app.ingestion.ledger import IngestLedger, statement_digest
+from app.ingestion.parser import BankStatementParser
+
+STATEMENT_PATTERN = "*.txt"
+
+# Statement files handed to a worker per task.
+FILES_PER_TASK = 16
+
+# Reject details kept per file in the report (all rejects are counted).
+REJECT_SAMPLES = 3
+
+
+def normalize_transaction(txn: Dict) -> Dict:
+    """
+    Parser output -> the {"year", "month", "amount", "type"} layout used by
+    the metrics code and append_transactions.
+    """
+    date = txn["date"]
+    return {
+        "year": int(date[:4]),
+        "month": int(date[5:7]),
+        "amount": txn["amount"],
+        "type": txn["transaction_type"],
+    }
+
+
+def customer_id_for(path: Path) -> str:
+    return Path(path).stem
+
+
+def parse_statement_file(path: Path, customer_id: Optional[str] = None) -> Tuple[str, List[Tuple[int, int, int]], Dict]:
+    """
+    Parses and encodes one statement file.
+    Returns (customer_id, rows, stats); rows are (month_key, amount_paise, type_code).
+    """
+    path = Path(path)
+    customer_id = customer_id or customer_id_for(path)
+    started = time.perf_counter()
+
+    rejects = []
+    rows = []
+    parser = BankStatementParser(customer_id)
+    with open(path, "r", encoding="utf-8", errors="replace", newline="\n") as f:
+        for txn in parser.parse_stream(f, on_reject=rejects.append):
+            try:
+                rows.append(encode_transaction(normalize_transaction(txn)))
+            except ValueError as e:
+                # e.g. amounts with fractional paise; the parser keeps no line number here.
+                line = f"{txn['date']} {txn['transaction_type']} {txn['amount']} {txn['description']}"
+                rejects.append({"line_number": None, "line": line, "error": str(e)})
+
+    sha256 = statement_digest(path)
+    seconds = time.perf_counter() - started
+    stats = {
+        "path": str(path),
+        "customer_id": customer_id,
+        "sha256": sha256,
+        "bytes": path.stat().st_size,
+        "transactions": len(rows),
+        "rejects": len(rejects),
+        "reject_samples": rejects[:REJECT_SAMPLES],
+        "seconds": seconds,
+        "transactions_per_sec": len(rows) / seconds if seconds > 0 else 0.0,
+    }
+    return customer_id, rows, stats
+
+
+def _parse_statement_files(paths: List[str]):
+    # Runs in a worker process.
+    return [parse_statement_file(Path(path)) for path in paths]
+
+
+def find_statements(source: Path, pattern: str = STATEMENT_PATTERN) -> List[Path]:
+    source = Path(source)
+    if source.is_file():
+        return [source]
+    return sorted(path for path in source.rglob(pattern) if path.is_file())
+
+
+def _iter_parsed(paths: List[Path], workers: int, files_per_task: int):
+    if workers <= 1 or len(paths) <= files_per_task:
+        for path in paths:
+            yield parse_statement_file(path)
+        return
+
+    tasks = [
+        [str(path) for path in paths[i:i + files_per_task]]
+        for i in range(0, len(paths), files_per_task)
+    ]
+    # Results come back in submission order, so the store sees statements
+    # in path order regardless of scheduling.
+    for parsed in map_ordered(_parse_statement_files, tasks, min(workers, len(tasks))):
+        yield from parsed
+
+
+def ingest_statements(
+    source: Path,
+    pattern: str = STATEMENT_PATTERN,
+    workers: Optional[int] = None,
+    files_per_task: int = FILES_PER_TASK,
+    refresh: bool = True,
+) -> Dict:
+    """
+    Parses every statement under `source` (a directory, searched
+    recursively for `pattern`, or a single file) and writes the
+    transactions into the risk store's dataset in one merge. Statements
+    the dataset already holds are skipped ("skipped" in their stats). With
+    refresh=True the store is reloaded from the dataset afterwards (see
+    persist_transaction_rows).
+
+    Returns a report with per-file stats ("files") and totals.
+    """
+    paths = find_statements(source, pattern)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    started = time.perf_counter()
+    ledger = IngestLedger(risk_store.DATA_PATH)
+
+    files = []
+    skipped = 0
+    updates: Dict[str, PackedRows] = {}
+    keys = set()
+    for customer_id, rows, stats in _iter_parsed(paths, workers, files_per_task):
+        files.append(stats)
+        key = (customer_id, stats["sha256"])
+        stats["skipped"] = key in ledger or key in keys
+        if stats["skipped"]:
+            skipped += 1
+            continue
+        keys.add(key)
+        if rows:
+            packed = updates.get(customer_id)
+            if packed is None:
+                packed = updates[customer_id] = PackedRows()
+            packed.extend(rows)
+    parsed_seconds = time.perf_counter() - started
+
+    stored = risk_store.persist_transaction_rows(updates, refresh=False)
+    if keys:
+        ledger.record(keys)
+    write_seconds = time.perf_counter() - started - parsed_seconds
+    if stored and refresh:
+        risk_store.reload()
+
+    seconds = time.perf_counter() - started
+    return {
+        "files": files,
+        "totals": {
+            "files": len(files),
+            "customers": len({stats["customer_id"] for stats in files}),
+            "bytes": sum(stats["bytes"] for stats in files),
+            "transactions": stored,
+            "rejects": sum(stats["rejects"] for stats in files),
+            "skipped": skipped,
+            "workers": workers,
+            "parse_seconds": parsed_seconds,
+            "write_seconds": write_seconds,
+            "seconds": seconds,
+            "transactions_per_sec": stored / seconds if seconds > 0 else 0.0,
+        },
+    }
@@ -1,3 +1,4 @@
+import argparse
 import json
 import random
 from decimal import Decimal
@@ -11,6 +12,7 @@ except ImportError:
 
 
 OUTPUT_PATH = Path("data/generated_transactions.json")
+SHARDED_OUTPUT_PATH = Path("data/generated_transactions")
 
 
 def decimal_to_string(obj):
@@ -27,7 +29,7 @@ def decimal_to_string(obj):
     return obj
 
 
-def generate_dataset(num_customers: int = 20, year: int = 2025):
+def generate_dataset(num_customers: int = 20, year: int = 2025, output_path: Path = OUTPUT_PATH):
 
     profiles = ["stable", "growing", "declining", "fraud"]
 
@@ -51,14 +53,56 @@ def generate_dataset(num_customers: int = 20, year: int = 2025):
     # Convert Decimal to string before saving
     dataset_serializable = decimal_to_string(dataset)
 
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(OUTPUT_PATH, "w") as f:
+    with open(output_path, "w") as f:
         json.dump(dataset_serializable, f, indent=2)
 
-    print(f"Dataset generated at: {OUTPUT_PATH}")
+    print(f"Dataset generated at: {output_path}")
+
+
+def generate_dataset_vectorized(
+    num_customers: int,
+    years: int = 1,
+    year: int = 2025,
+    seed: int = 0,
+    workers: int = None,
+    output_path: Path = None,
+    shards: int = None,
+):
+    from app.data.vectorized_generator import write_json_dataset, write_sharded_dataset
+
+    print(f"Generating {num_customers} customers x {years} years (seed {seed})...")
+    if shards:
+        output_path = output_path or SHARDED_OUTPUT_PATH
+        write_sharded_dataset(
+            output_path, num_customers, seed=seed, start_year=year, years=years, workers=workers, num_shards=shards
+        )
+    else:
+        output_path = output_path or OUTPUT_PATH
+        write_json_dataset(output_path, num_customers, seed=seed, start_year=year, years=years, workers=workers)
+    print(f"Dataset generated at: {output_path}")
 
 
 if __name__ == "__main__":
-    print("Generating synthetic dataset of bank transactions...")
-    generate_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset of bank transactions")
+    parser.add_argument("--vectorized", action="store_true", help="Seeded NumPy generator for large datasets")
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--years", type=int, default=1, help="Years of history (vectorized mode)")
+    parser.add_argument("--year", type=int, default=2025, help="First year of history")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (vectorized mode)")
+    parser.add_argument("--workers", type=int, default=None, help="Generator processes (vectorized mode)")
+    parser.add_argument(
+        "--shards", type=int, default=None,
+        help=f"Write a sharded line-delimited dataset with this many shards (vectorized mode, default output {SHARDED_OUTPUT_PATH})",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.vectorized or args.shards:
+        generate_dataset_vectorized(
+            args.customers, args.years, args.year, args.seed, args.workers, args.output, args.shards
+        )
+    else:
+        print("Generating synthetic dataset of bank transactions...")
+        generate_dataset(args.customers, args.year, args.output or OUTPUT_PATH)
\ No newline at end of file
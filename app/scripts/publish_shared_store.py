@@ -0,0 +1,51 @@
+# Load the risk store once and publish it in shared memory for workers.
+#
+#   python -m app.scripts.publish_shared_store --name risk-metrics
+#   RISK_SHARED_STORE=risk-metrics <start workers>
+#
+# Workers with RISK_SHARED_STORE set attach to the segment read-only instead
+# of loading the dataset. The segment lives until this process is stopped
+# (Ctrl-C / SIGTERM), which unlinks it.
+
+import argparse
+import os
+import signal
+import threading
+from pathlib import Path
+
+from app.core import risk_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the risk store to shared memory")
+    parser.add_argument("--name", default="risk-metrics", help="Shared memory segment name")
+    parser.add_argument("--data-path", type=Path, default=None, help="Dataset to load (default: risk_store.DATA_PATH)")
+    parser.add_argument("--workers", type=int, default=None, help="Precompute processes (default: all cores)")
+    args = parser.parse_args()
+
+    # This process is the loader; never attach to a segment itself.
+    risk_store.SHARED_STORE_NAME = None
+    if args.data_path is not None:
+        risk_store.DATA_PATH = args.data_path
+    # Offline loader: use every core unless told otherwise.
+    risk_store.load_and_precompute(workers=args.workers or os.cpu_count())
+
+    store = risk_store.publish_shared_store(args.name)
+    print(
+        f"Published {len(store)} customers (version {store.version}, {store.nbytes / 2**20:.1f} MiB) "
+        f"to shared memory '{store.name}'; set RISK_SHARED_STORE={store.name} in workers"
+    )
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    try:
+        stop.wait()
+    finally:
+        store.unlink()
+        store.close()
+        print(f"Removed shared memory '{store.name}'")
+
+
+if __name__ == "__main__":
+    main()
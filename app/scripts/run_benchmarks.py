@@ -0,0 +1,46 @@
+# Runs the performance benchmark suite and saves the results as JSON.
+#
+#   python -m app.scripts.run_benchmarks                      # 1k, 100k, 1M transactions
+#   python -m app.scripts.run_benchmarks --sizes 1000 --only parse_text loan_tool
+#   python -m app.scripts.run_benchmarks --compare benchmarks/baseline.json
+#
+# Fixtures come from the vectorized generator with a fixed seed, so results
+# of different versions are comparable run to run.
+
+import argparse
+from pathlib import Path
+
+from app.benchmarks.fixtures import FIXTURE_SEED
+from app.benchmarks.harness import compare_results, load_results, save_results
+from app.benchmarks.suite import BENCHMARKS, DEFAULT_SIZES, run_suite
+
+DEFAULT_OUTPUT = Path("benchmarks/results.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the risk pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Fixture sizes in transactions")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=FIXTURE_SEED)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.only, args.repeat, args.seed)
+    config = {"sizes": args.sizes, "only": args.only, "repeat": args.repeat, "seed": args.seed}
+    save_results(args.output, results, config)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        rows = compare_results(load_results(args.compare), load_results(args.output))
+        print(f"\nCompared with {args.compare} (speedup > 1 is faster):")
+        for row in rows:
+            line = f"{row['name']:<40} {row['size']:>9,} txns  {row['speedup']:6.2f}x"
+            if "memory_ratio" in row:
+                line += f"  memory x{row['memory_ratio']:.2f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
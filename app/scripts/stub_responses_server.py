@@ -0,0 +1,238 @@
+# Local stand-in for the OpenAI Responses API, for load tests and benchmarks.
+#
+# POST /v1/responses behaves like a tiny, deterministic model:
+#   - a text input mentioning customer ids (cust_001, ...) gets one
+#     get_customer_loan_eligibility function_call per customer, using the
+#     first amount found in the text;
+#   - function_call_output inputs get an assistant message summarising them;
+#   - anything else gets a plain assistant message.
+#
+# Requests with "stream": true get the same response as server-sent events
+# (response.created, output item / text delta events, response.completed),
+# one output_text.delta per word, chunk_delay seconds apart.
+#
+# Point the agent at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Tuple
+
+_CUSTOMER_PATTERN = re.compile(r"\bcust_\d+\b")
+_AMOUNT_PATTERN = re.compile(r"\b\d[\d,]*(?:\.\d+)?\b")
+_ids = itertools.count(1)
+
+
+def _next_id(prefix: str) -> str:
+    return f"{prefix}_{next(_ids):08d}"
+
+
+def _message(text: str) -> dict:
+    return {
+        "type": "message",
+        "id": _next_id("msg"),
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}],
+    }
+
+
+def _function_call(name: str, arguments: dict) -> dict:
+    return {
+        "type": "function_call",
+        "id": _next_id("fc"),
+        "call_id": _next_id("call"),
+        "name": name,
+        "arguments": json.dumps(arguments),
+        "status": "completed",
+    }
+
+
+def build_output(request: dict) -> list:
+    user_input = request.get("input")
+
+    if isinstance(user_input, str):
+        customers = _CUSTOMER_PATTERN.findall(user_input)
+        amounts = _AMOUNT_PATTERN.findall(_CUSTOMER_PATTERN.sub("", user_input))
+        if customers and amounts and request.get("tools"):
+            amount = float(amounts[0].replace(",", ""))
+            return [
+                _function_call("get_customer_loan_eligibility", {"customer_id": customer, "loan_amount": amount})
+                for customer in dict.fromkeys(customers)
+            ]
+        return [_message("I can only help with loan eligibility questions.")]
+
+    outputs = [item for item in user_input or [] if item.get("type") == "function_call_output"]
+    if outputs:
+        lines = []
+        for item in outputs:
+            result = json.loads(item["output"])
+            for entry in result if isinstance(result, list) else [result]:
+                verdict = "eligible" if entry.get("eligible") else "not eligible"
+                lines.append(f"{verdict} ({entry.get('reason_code', entry.get('error'))})")
+        return [_message("; ".join(lines))]
+
+    return [_message("OK")]
+
+
+def build_response(request: dict) -> dict:
+    return {
+        "id": _next_id("resp"),
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": request.get("model", "stub"),
+        "status": "completed",
+        "output": build_output(request),
+        "parallel_tool_calls": True,
+        "previous_response_id": request.get("previous_response_id"),
+        "tool_choice": "auto",
+        "tools": request.get("tools") or [],
+        "error": None,
+        "incomplete_details": None,
+        "instructions": None,
+        "metadata": {},
+        "temperature": 1.0,
+        "top_p": 1.0,
+        "text": {"format": {"type": "text"}},
+        "usage": {
+            "input_tokens": 0,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": 0,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": 0,
+        },
+    }
+
+
+def _text_chunks(text: str) -> list:
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def build_stream_events(response: dict) -> Iterator[dict]:
+    """
+    The streaming events of a completed build_response() result, in the
+    order the Responses API sends them.
+    """
+    sequence = itertools.count()
+
+    def event(kind: str, **fields) -> dict:
+        return {"type": kind, "sequence_number": next(sequence), **fields}
+
+    yield event("response.created", response={**response, "status": "in_progress", "output": []})
+    for output_index, item in enumerate(response["output"]):
+        if item["type"] != "message":
+            yield event("response.output_item.added", output_index=output_index, item={**item, "status": "in_progress", "arguments": ""})
+            yield event(
+                "response.function_call_arguments.done",
+                output_index=output_index, item_id=item["id"], arguments=item["arguments"],
+            )
+            yield event("response.output_item.done", output_index=output_index, item=item)
+            continue
+
+        yield event("response.output_item.added", output_index=output_index, item={**item, "status": "in_progress", "content": []})
+        for content_index, part in enumerate(item["content"]):
+            location = {"output_index": output_index, "item_id": item["id"], "content_index": content_index}
+            yield event("response.content_part.added", part={**part, "text": ""}, **location)
+            for chunk in _text_chunks(part["text"]):
+                yield event("response.output_text.delta", delta=chunk, logprobs=[], **location)
+            yield event("response.output_text.done", text=part["text"], logprobs=[], **location)
+            yield event("response.content_part.done", part=part, **location)
+        yield event("response.output_item.done", output_index=output_index, item=item)
+    yield event("response.completed", response=response)
+
+
+class StubResponsesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls on delayed ACKs (~40 ms).
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/responses"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        response = build_response(request)
+        if request.get("stream"):
+            self._send_stream(response)
+            return
+
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, response: dict):
+        # Chunked transfer encoding keeps the connection reusable.
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for event in build_stream_events(response):
+                if event["type"] == "response.output_text.delta" and self.server.chunk_delay:
+                    time.sleep(self.server.chunk_delay)
+                data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading mid-stream.
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubResponsesServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.0, chunk_delay: float = 0.0):
+        super().__init__(address, StubResponsesHandler)
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    chunk_delay: float = 0.0,
+) -> StubResponsesServer:
+    """
+    Starts the stub in a daemon thread; call .shutdown() to stop it.
+    """
+    server = StubResponsesServer((host, port), latency=latency, chunk_delay=chunk_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub of the Responses API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed text chunks")
+    args = parser.parse_args()
+
+    server = StubResponsesServer((args.host, args.port), latency=args.latency, chunk_delay=args.chunk_delay)
+    print(f"Stub Responses API listening on {server.base_url}")
+    server.serve_forever()
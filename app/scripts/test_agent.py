@@ -1,4 +1,7 @@
-from app.agent.agent_handler import run_agent
+import sys
+
+from app.agent import agent_handler
+from app.agent.agent_handler import run_agent, run_agent_stream
 
 def test_agent():
     # Example input that would trigger a tool call
@@ -9,5 +12,21 @@ def test_agent():
 
     print("Agent Response:", response)
 
+def test_agent_stream():
+    user_input = "Is cust_001 eligible for a 5000 rupees loan?"
+    print(f"Running streaming agent test with input: '{user_input}'")
+    # The fast path would answer this in one chunk; stream it from the LLM.
+    agent_handler.FAST_PATH_ENABLED = False
+
+    timings = {}
+    print("Agent Response: ", end="", flush=True)
+    for chunk in run_agent_stream(user_input, timings):
+        print(chunk, end="", flush=True)
+    print()
+    print("Timings:", timings)
+
 if __name__ == "__main__":
-    test_agent()
\ No newline at end of file
+    if "--stream" in sys.argv[1:]:
+        test_agent_stream()
+    else:
+        test_agent()
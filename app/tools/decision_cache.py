@@ -0,0 +1,59 @@
+# app/tools/decision_cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class DecisionCache:
+    """
+    Bounded LRU memo of eligibility results.
+
+    Callers key entries on (customer_id, policy tier, metrics version), so
+    a metrics change simply stops matching old entries; those then age out.
+    A change of compiled policy object drops everything, since tiers of
+    different policies are not comparable.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._policy = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, policy) -> Optional[dict]:
+        with self._lock:
+            if policy is not self._policy:
+                self._entries.clear()
+                self._policy = policy
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -1,6 +1,35 @@
-from decimal import Decimal
-from app.core.risk_store import get_customer_metrics
-from app.core.rule_engine import evaluate_loan_eligibility
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+from app.core import instrumentation
+from app.core.risk_store import current_snapshot
+from app.core.rule_engine import (
+    REASON_CODES,
+    evaluate_loan_eligibility_batch,
+    evaluate_rule,
+    get_compiled_policy,
+)
+from app.tools.decision_cache import DecisionCache
+
+# Decisions depend only on the customer's metrics and the policy tier of the
+# amount, so they are memoized per (customer_id, tier, metrics version).
+DECISION_CACHE = DecisionCache()
+
+
+def _parse_loan_amount(loan_amount) -> Tuple[Optional[Decimal], Optional[str]]:
+    """
+    (amount, None) for a finite numeric loan_amount, else (None, error).
+    """
+    if loan_amount is None:
+        return None, "missing loan_amount"
+    if isinstance(loan_amount, bool):
+        return None, f"invalid loan_amount: {loan_amount!r}"
+    try:
+        amount = Decimal(str(loan_amount))
+    except InvalidOperation:
+        return None, f"invalid loan_amount: {loan_amount!r}"
+    if not amount.is_finite():
+        return None, f"invalid loan_amount: {loan_amount!r}"
+    return amount, None
 
 
 def get_customer_loan_eligibility(customer_id: str, loan_amount: float) -> dict:
@@ -10,21 +39,48 @@ def get_customer_loan_eligibility(customer_id: str, loan_amount: float) -> dict:
     """
 
     # 1️⃣ Fetch precomputed metrics
-    metrics = get_customer_metrics(customer_id)
+    # One store snapshot for the whole call, so a concurrent reload cannot
+    # pair one version's cache key with another version's metrics.
+    snapshot = current_snapshot()
+    metrics = snapshot.get(customer_id)
 
     if not metrics:
+        if instrumentation.ENABLED:
+            instrumentation.inc("loan_decisions_total", reason_code="CUSTOMER_NOT_FOUND")
         return {
             "eligible": False,
             "reason_code": "CUSTOMER_NOT_FOUND"
         }
 
     # 2️⃣ Convert loan amount to Decimal (for deterministic rule logic)
-    loan_amount_decimal = Decimal(str(loan_amount))
+    loan_amount_decimal, error = _parse_loan_amount(loan_amount)
+    if error is not None:
+        return {"error": error}
 
-    # 3️⃣ Evaluate eligibility via rule engine
-    decision = evaluate_loan_eligibility(metrics, loan_amount_decimal)
+    # 3️⃣ Serve repeated questions within the same policy tier from the memo
+    policy = get_compiled_policy()
+    tier = policy.tier_for(loan_amount_decimal)
+    cache_key = (customer_id, tier, snapshot.metrics_version(customer_id))
+    cached = DECISION_CACHE.get(cache_key, policy)
+    if cached is not None:
+        if instrumentation.ENABLED:
+            instrumentation.inc("decision_cache_lookups_total", result="hit")
+            instrumentation.inc("loan_decisions_total", reason_code=cached["reason_code"])
+        return dict(cached)
+    if instrumentation.ENABLED:
+        instrumentation.inc("decision_cache_lookups_total", result="miss")
 
-    # 4️⃣ Convert any Decimal values to float for JSON compatibility
+    # 4️⃣ Evaluate eligibility via rule engine
+    if tier is None:
+        decision = {
+            "eligible": False,
+            "reason_code": "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT"
+        }
+    else:
+        with instrumentation.timer("rule_evaluation_seconds", mode="single"):
+            decision = evaluate_rule(metrics, policy.rules[tier])
+
+    # 5️⃣ Convert any Decimal values to float for JSON compatibility
     json_safe_result = {}
 
     for key, value in decision.items():
@@ -33,4 +89,70 @@ def get_customer_loan_eligibility(customer_id: str, loan_amount: float) -> dict:
         else:
             json_safe_result[key] = value
 
-    return json_safe_result
\ No newline at end of file
+    DECISION_CACHE.put(cache_key, json_safe_result)
+    if instrumentation.ENABLED:
+        instrumentation.inc("loan_decisions_total", reason_code=json_safe_result["reason_code"])
+    return dict(json_safe_result)
+
+def _parse_batch_request(request) -> Tuple[Optional[str], Optional[Decimal], Optional[str]]:
+    """
+    (customer_id, loan_amount, None) for a well-formed batch request,
+    else (None, None, error).
+    """
+    if not isinstance(request, dict):
+        return None, None, "request must be an object with customer_id and loan_amount"
+    customer_id = request.get("customer_id")
+    if not isinstance(customer_id, str) or not customer_id:
+        return None, None, "missing customer_id"
+    amount, error = _parse_loan_amount(request.get("loan_amount"))
+    if error is not None:
+        return None, None, error
+    return customer_id, amount, None
+
+
+def get_customer_loan_eligibility_batch(requests: List[Dict]) -> List[Dict]:
+    """
+    Batched get_customer_loan_eligibility for many (customer_id, loan_amount)
+    pairs. Metrics are fetched and evaluated in one vectorized pass; results
+    come back in request order, each echoing its customer_id and loan_amount.
+    A malformed request (missing or non-numeric fields) gets an "error"
+    result of its own; the rest of the batch is still evaluated.
+    """
+    if not requests:
+        return []
+
+    results = []
+    valid = []
+    for request in requests:
+        customer_id, loan_amount, error = _parse_batch_request(request)
+        if isinstance(request, dict):
+            result = {"customer_id": request.get("customer_id"), "loan_amount": request.get("loan_amount")}
+        else:
+            result = {"customer_id": None, "loan_amount": None}
+        if error is not None:
+            result["error"] = error
+        else:
+            valid.append((result, customer_id, loan_amount))
+        results.append(result)
+
+    if valid:
+        customer_ids = [customer_id for _, customer_id, _ in valid]
+        loan_amounts = [loan_amount for _, _, loan_amount in valid]
+        records, found = current_snapshot().records_for(customer_ids)
+        with instrumentation.timer("rule_evaluation_seconds", mode="batch"):
+            eligible, reason_codes = evaluate_loan_eligibility_batch(records, loan_amounts)
+
+        for (result, _, _), is_found, is_eligible, reason in zip(
+            valid, found.tolist(), eligible.tolist(), reason_codes.tolist()
+        ):
+            if is_found:
+                result.update({"eligible": is_eligible, "reason_code": REASON_CODES[reason]})
+            else:
+                result.update({"eligible": False, "reason_code": "CUSTOMER_NOT_FOUND"})
+
+    if instrumentation.ENABLED:
+        for result in results:
+            if "error" in result:
+                continue
+            instrumentation.inc("loan_decisions_total", reason_code=result["reason_code"])
+    return results
@@ -0,0 +1,129 @@
+# tests/conftest.py
+
+# Shared fixtures: random portfolios and the original Decimal metrics code
+# path (per customer, as the first risk_store computed it) that every faster
+# path is checked against.
+
+import json
+import random
+from decimal import Decimal
+from typing import Dict, List
+
+import pytest
+
+from app.analysis.financial_metrics import aggregate_by_month, compute_cashflow_growth, compute_cashflow_volatility
+from app.core import risk_store
+
+TYPES = ("credit", "credit", "debit", "debit", "debit_micro", "refund")
+
+
+def random_transactions(rng: random.Random, months: int = 8) -> List[Dict]:
+    """
+    One customer's transactions over `months` random months, with small and
+    large amounts so that ties and sign changes come up.
+    """
+    transactions = []
+    start = rng.randint(0, 30)
+    for offset in sorted(rng.sample(range(36), min(months, 36))):
+        year, month = divmod(start + offset, 12)
+        for _ in range(rng.randint(1, 6)):
+            scale = rng.choice((1, 100, 10_000, 1_000_000))
+            transactions.append({
+                "year": 2023 + year,
+                "month": month + 1,
+                "amount": Decimal(rng.randint(1, 100 * scale)).scaleb(-2),
+                "type": rng.choice(TYPES),
+            })
+    rng.shuffle(transactions)
+    return transactions
+
+
+def tie_transactions() -> List[Dict]:
+    # Growth (0.33 - 0.32) / 0.32 = 0.03125: exactly half a step of 0.0001.
+    return [
+        {"year": 2024, "month": 1, "amount": Decimal("0.32"), "type": "credit"},
+        {"year": 2024, "month": 2, "amount": Decimal("0.33"), "type": "credit"},
+    ]
+
+
+def random_portfolio(seed: int, customers: int = 200) -> Dict[str, List[Dict]]:
+    rng = random.Random(seed)
+    portfolio = {
+        f"cust_{i:05d}": random_transactions(rng, rng.choice((0, 1, 2, 3, 6, 12)))
+        for i in range(customers)
+    }
+    portfolio["cust_tie"] = tie_transactions()
+    return portfolio
+
+
+def reference_metrics(transactions: List[Dict]) -> Dict:
+    """
+    The original risk_store computation for one customer.
+    """
+    monthly = aggregate_by_month(transactions)
+    volatility = compute_cashflow_volatility(monthly)
+    return {
+        "growth": compute_cashflow_growth(monthly),
+        "cv": volatility["cv"],
+        "stability": volatility["stability_level"],
+        "fraud_flag": any(txn["type"] == "debit_micro" for txn in transactions),
+        "loss_flag": sum(m["net_cashflow"] for m in monthly.values()) < 0,
+    }
+
+
+def assert_same_metrics(got: Dict, expected: Dict):
+    # repr() also compares the Decimal exponents ("0" vs "0.0000").
+    assert {key: repr(got[key]) for key in expected} == {key: repr(value) for key, value in expected.items()}
+
+
+def assert_store_matches(store, portfolio: Dict[str, List[Dict]]):
+    """
+    Every lookup path of a risk store backend (get, records_for) agrees with
+    reference_metrics, and unknown customers are not found.
+    """
+    from app.analysis.financial_metrics import metrics_record_to_dict
+
+    expected = {customer_id: reference_metrics(transactions) for customer_id, transactions in portfolio.items()}
+    for customer_id, metrics in expected.items():
+        assert_same_metrics(store.get(customer_id), metrics)
+    assert store.get("cust_unknown") is None
+
+    customer_ids = list(expected) + ["cust_unknown"]
+    records, found = store.records_for(customer_ids)
+    assert found.tolist() == [True] * len(expected) + [False]
+    for customer_id, record in zip(expected, records):
+        assert_same_metrics(metrics_record_to_dict(record), expected[customer_id])
+
+
+def write_json_dataset(path, portfolio: Dict[str, List[Dict]]):
+    payload = {
+        customer_id: {
+            "profile": "test",
+            "transactions": [
+                {"customer_id": customer_id, **txn, "amount": str(txn["amount"])} for txn in transactions
+            ],
+        }
+        for customer_id, transactions in portfolio.items()
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f)
+    return path
+
+
+@pytest.fixture
+def portfolio() -> Dict[str, List[Dict]]:
+    return random_portfolio(seed=11)
+
+
+@pytest.fixture
+def risk_dataset(tmp_path, monkeypatch, portfolio):
+    """
+    risk_store pointed at a JSON dataset of `portfolio`, without snapshots;
+    the store is unloaded again afterwards.
+    """
+    path = write_json_dataset(tmp_path / "transactions.json", portfolio)
+    monkeypatch.setattr(risk_store, "DATA_PATH", path)
+    monkeypatch.setattr(risk_store, "SNAPSHOT_ENABLED", False)
+    risk_store.unload()
+    yield path
+    risk_store.unload()
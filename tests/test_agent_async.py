@@ -0,0 +1,149 @@
+# tests/test_agent_async.py
+
+# AsyncAgentRuntime against the local Responses stub: the max_in_flight cap,
+# queue_timeout backpressure, tool call timeouts, and closing runtimes
+# (owned by the caller, or by run_agent_async for a single call).
+
+import asyncio
+import time
+
+import pytest
+
+from app.agent import agent_handler
+from app.scripts.stub_responses_server import start_stub_server
+from app.tools.loan_tools import get_customer_loan_eligibility
+
+QUESTION = "Is cust_00001 eligible for a 5000 loan?"
+LATENCY = 0.2
+
+
+@pytest.fixture
+def stub_server(monkeypatch, risk_dataset):
+    server = start_stub_server(latency=LATENCY)
+    # Every question goes to the stub, and .env must not override its URL.
+    monkeypatch.setattr(agent_handler, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(agent_handler, "_ENV_LOADED", True)
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def expected_answer() -> str:
+    result = get_customer_loan_eligibility("cust_00001", 5000.0)
+    verdict = "eligible" if result.get("eligible") else "not eligible"
+    return f"{verdict} ({result.get('reason_code', result.get('error'))})"
+
+
+async def run_with_peak(runtime, calls):
+    peak = 0
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, runtime.in_flight)
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample())
+    try:
+        results = await asyncio.gather(*(runtime.run_agent(QUESTION) for _ in range(calls)), return_exceptions=True)
+    finally:
+        sampler.cancel()
+    return results, peak
+
+
+def test_max_in_flight_queues_callers(stub_server):
+    async def main():
+        async with agent_handler.AsyncAgentRuntime(
+            base_url=stub_server.base_url, api_key="sk-test", max_in_flight=2, queue_timeout=10.0
+        ) as runtime:
+            started = time.perf_counter()
+            results, peak = await run_with_peak(runtime, 4)
+            return results, peak, time.perf_counter() - started, runtime
+
+    results, peak, elapsed, runtime = asyncio.run(main())
+    assert results == [expected_answer()] * 4
+    assert peak == 2
+    assert runtime.in_flight == 0 and runtime.rejected == 0
+    # Two requests per conversation, two rounds of conversations.
+    assert elapsed >= 2 * 2 * LATENCY
+
+
+def test_queue_timeout_raises_overloaded(stub_server):
+    async def main():
+        async with agent_handler.AsyncAgentRuntime(
+            base_url=stub_server.base_url, api_key="sk-test", max_in_flight=1, queue_timeout=0.05
+        ) as runtime:
+            results, peak = await run_with_peak(runtime, 3)
+            return results, peak, runtime
+
+    results, peak, runtime = asyncio.run(main())
+    assert results[0] == expected_answer()
+    assert all(isinstance(result, agent_handler.AgentOverloadedError) for result in results[1:])
+    assert peak == 1
+    assert runtime.rejected == 2 and runtime.in_flight == 0
+
+
+def test_run_agent_async_uses_and_keeps_the_callers_runtime(stub_server):
+    async def ask():
+        async with agent_handler.AsyncAgentRuntime() as runtime:
+            answers = [await agent_handler.run_agent_async(QUESTION, runtime=runtime) for _ in range(2)]
+            assert not runtime.closed
+        return answers, runtime
+
+    answers, runtime = asyncio.run(ask())
+    assert answers == [expected_answer()] * 2
+    assert runtime.closed and runtime.client.is_closed()
+
+
+def test_run_agent_async_without_runtime_closes_its_own(stub_server, monkeypatch):
+    created = []
+    runtime_class = agent_handler.AsyncAgentRuntime
+
+    def tracking_runtime(*args, **kwargs):
+        created.append(runtime_class(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(agent_handler, "AsyncAgentRuntime", tracking_runtime)
+
+    assert asyncio.run(agent_handler.run_agent_async(QUESTION)) == expected_answer()
+    assert asyncio.run(agent_handler.run_agent_async(QUESTION)) == expected_answer()
+    assert len(created) == 2
+    assert all(runtime.closed and runtime.client.is_closed() for runtime in created)
+
+
+def test_close_from_the_loop_keeps_the_close_task(stub_server):
+    async def main():
+        runtime = agent_handler.AsyncAgentRuntime()
+        await runtime.run_agent(QUESTION)
+        runtime.close()
+        task = runtime._closing
+        await task
+        return runtime, task
+
+    runtime, task = asyncio.run(main())
+    assert task.done() and runtime.closed and runtime.client.is_closed()
+
+
+def test_stuck_tool_call_times_out_and_frees_its_slot(stub_server, monkeypatch):
+    tool_call = agent_handler.execute_tool_call
+
+    def stuck(call):
+        time.sleep(1.5)
+        return tool_call(call)
+
+    monkeypatch.setattr(agent_handler, "execute_tool_call", stuck)
+
+    async def main():
+        async with agent_handler.AsyncAgentRuntime(
+            base_url=stub_server.base_url, api_key="sk-test", max_in_flight=1, request_timeout=0.5
+        ) as runtime:
+            started = time.perf_counter()
+            answer = await runtime.run_agent(QUESTION)
+            return answer, time.perf_counter() - started, runtime
+
+    answer, elapsed, runtime = asyncio.run(main())
+    assert "TimeoutError" in answer
+    assert elapsed < 1.5
+    assert runtime.in_flight == 0
@@ -0,0 +1,57 @@
+# tests/test_agent_stream.py
+
+# run_agent_stream against the local Responses stub: chunks arrive in order,
+# join to the synchronous answer, and every timing is recorded.
+
+import re
+
+import pytest
+from openai import OpenAI
+
+from app.agent import agent_handler
+from app.scripts.stub_responses_server import start_stub_server
+from app.tools.loan_tools import get_customer_loan_eligibility
+
+
+@pytest.fixture
+def stub_client(monkeypatch, risk_dataset):
+    server = start_stub_server(latency=0.02, chunk_delay=0.01)
+    monkeypatch.setattr(agent_handler, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(agent_handler, "client", OpenAI(base_url=server.base_url, api_key="sk-test"))
+    yield agent_handler.client
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_with_tool_call(stub_client):
+    result = get_customer_loan_eligibility("cust_00001", 5000.0)
+    verdict = "eligible" if result.get("eligible") else "not eligible"
+    expected = f"{verdict} ({result['reason_code']})"
+
+    timings = {}
+    chunks = list(agent_handler.run_agent_stream("Is cust_00001 eligible for a 5000 loan?", timings))
+
+    # The stub streams one delta per word, spaces included.
+    assert chunks == re.findall(r"\s*\S+", expected)
+    assert "".join(chunks) == expected == agent_handler.run_agent("Is cust_00001 eligible for a 5000 loan?")
+
+    assert set(timings) == {"initial", "tools", "final", "first_chunk_seconds", "seconds"}
+    assert set(timings["initial"]) == set(timings["final"]) == {"first_token_seconds", "seconds"}
+    # The initial response is only a tool call; text comes from the final one.
+    assert timings["initial"]["first_token_seconds"] is None
+    assert 0 < timings["final"]["first_token_seconds"] <= timings["final"]["seconds"]
+    assert timings["tools"]["seconds"] > 0
+    assert timings["initial"]["seconds"] + timings["tools"]["seconds"] < timings["first_chunk_seconds"]
+    assert timings["first_chunk_seconds"] < timings["seconds"]
+    assert timings["initial"]["seconds"] + timings["tools"]["seconds"] + timings["final"]["seconds"] <= timings["seconds"]
+
+
+def test_stream_without_tools(stub_client):
+    timings = {}
+    chunks = list(agent_handler.run_agent_stream("hello there", timings))
+
+    assert "".join(chunks) == "I can only help with loan eligibility questions."
+    assert len(chunks) == 8
+    assert set(timings) == {"initial", "first_chunk_seconds", "seconds"}
+    assert 0 < timings["initial"]["first_token_seconds"] <= timings["initial"]["seconds"] <= timings["seconds"]
+    assert timings["first_chunk_seconds"] < timings["seconds"]
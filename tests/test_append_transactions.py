@@ -0,0 +1,51 @@
+# tests/test_append_transactions.py
+
+import random
+
+from app.analysis.financial_metrics import (
+    RunningCashflowState,
+    aggregate_portfolio_by_month,
+    metrics_record_to_dict,
+)
+from app.core import risk_store
+from app.core.transaction_table import TransactionTableBuilder, encode_transaction
+
+from tests.conftest import assert_same_metrics, random_transactions, reference_metrics
+
+
+def test_running_state_matches_recompute(portfolio):
+    for customer_id, transactions in portfolio.items():
+        state = RunningCashflowState()
+        for i, txn in enumerate(transactions):
+            state.add(*encode_transaction(txn))
+            if i % 3 == 0 or i == len(transactions) - 1:
+                assert_same_metrics(
+                    metrics_record_to_dict(state.metrics_record()), reference_metrics(transactions[:i + 1])
+                )
+
+
+def test_running_state_from_monthly_rows_matches_recompute(portfolio):
+    builder = TransactionTableBuilder()
+    rng = random.Random(3)
+    split = {customer_id: rng.randint(0, len(txns)) for customer_id, txns in portfolio.items()}
+    for customer_id, transactions in portfolio.items():
+        builder.add_customer(customer_id, transactions[:split[customer_id]])
+    monthly = aggregate_portfolio_by_month(builder.build())
+
+    for i, (customer_id, transactions) in enumerate(portfolio.items()):
+        rows = monthly.customer_rows(i)
+        state = RunningCashflowState.from_monthly_rows(
+            monthly.month_keys[rows], monthly.total_credit[rows], monthly.total_debit[rows], monthly.micro_count[rows]
+        )
+        for txn in transactions[split[customer_id]:]:
+            state.add(*encode_transaction(txn))
+        assert_same_metrics(metrics_record_to_dict(state.metrics_record()), reference_metrics(transactions))
+
+
+def test_append_transactions_matches_recompute(risk_dataset, portfolio):
+    rng = random.Random(5)
+    customer_ids = rng.sample(sorted(portfolio), 40) + ["cust_new"]
+    for customer_id in customer_ids:
+        new = random_transactions(rng, rng.randint(1, 4))
+        got = risk_store.append_transactions(customer_id, new)
+        assert_same_metrics(got, reference_metrics(portfolio.get(customer_id, []) + new))
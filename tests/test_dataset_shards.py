@@ -0,0 +1,35 @@
+# tests/test_dataset_shards.py
+
+import pytest
+
+from app.core import risk_store
+from app.core.dataset_shards import convert_json_dataset, read_manifest, shard_paths
+
+from tests.conftest import assert_store_matches
+
+
+@pytest.fixture
+def sharded_dataset(risk_dataset, tmp_path, monkeypatch):
+    root = convert_json_dataset(risk_dataset, tmp_path / "dataset", num_shards=4)
+    monkeypatch.setattr(risk_store, "DATA_PATH", root)
+    risk_store.unload()
+    return root
+
+
+def test_convert_keeps_every_customer_and_transaction(sharded_dataset, portfolio):
+    manifest = read_manifest(sharded_dataset)
+
+    assert len(shard_paths(sharded_dataset)) == 4
+    assert manifest["customers"] == len(portfolio)
+    assert manifest["transactions"] == sum(len(transactions) for transactions in portfolio.values())
+
+
+@pytest.mark.parametrize("workers, source", [(1, "sharded"), (2, "sharded_parallel")])
+def test_sharded_load_matches_decimal_path(sharded_dataset, portfolio, monkeypatch, workers, source):
+    monkeypatch.setattr(risk_store, "PARALLEL_MIN_BYTES", 0)
+
+    store = risk_store.load_and_precompute(workers=workers)
+
+    assert risk_store.store_info()["source"] == source
+    assert sorted(store) == sorted(portfolio)
+    assert_store_matches(store, portfolio)
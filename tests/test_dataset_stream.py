@@ -0,0 +1,34 @@
+# tests/test_dataset_stream.py
+
+import json
+
+import pytest
+
+from app.core import risk_store
+from app.core.dataset_stream import iter_customer_payloads
+from app.core.transaction_table import encode_transaction
+
+from tests.conftest import assert_store_matches
+
+
+# Small chunks put customer boundaries, strings and numbers across reads.
+@pytest.mark.parametrize("chunk_size", [7, 4096, 1 << 20])
+def test_iter_customer_payloads_matches_json_load(risk_dataset, chunk_size):
+    with open(risk_dataset) as f:
+        expected = json.load(f)
+
+    streamed = list(iter_customer_payloads(risk_dataset, chunk_size=chunk_size))
+
+    assert [customer_id for customer_id, _ in streamed] == list(expected)
+    for customer_id, payload in streamed:
+        assert payload["profile"] == expected[customer_id]["profile"]
+        assert payload["transactions"] == [encode_transaction(txn) for txn in expected[customer_id]["transactions"]]
+
+
+@pytest.mark.parametrize("batch_rows", [1, 50, 1_000_000])
+def test_streaming_load_matches_decimal_path(risk_dataset, portfolio, batch_rows):
+    store = risk_store.load_and_precompute(streaming=True, batch_rows=batch_rows)
+
+    assert risk_store.store_info()["source"] == "streaming"
+    assert sorted(store) == sorted(portfolio)
+    assert_store_matches(store, portfolio)
@@ -0,0 +1,127 @@
+# tests/test_ingestion.py
+
+import json
+import random
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.analysis.financial_metrics import metrics_record_to_dict
+from app.core import risk_store
+from app.core.dataset_shards import convert_json_dataset, read_manifest
+from app.core.transaction_table import encode_transaction
+from app.ingestion.pipeline import ingest_statements
+
+from tests.conftest import assert_same_metrics, random_transactions, reference_metrics, write_json_dataset
+
+STATEMENTS = {
+    "cust_00001": "05-01-2024 CR 1,000.50 salary\n09-01-2024 DR 200 rent\n03-02-2024 CR 900 salary\n",
+    "cust_new": "01-03-2024 UPI IN 700 refund\n15-04-2024 wdl 100.25 atm\nnot a transaction\n31-02-2024 CR 5 bad\n",
+}
+
+
+def _expected(portfolio):
+    expected = {customer_id: list(portfolio.get(customer_id, [])) for customer_id in STATEMENTS}
+    parsed = {
+        "cust_00001": [(2024, 1, "1000.50", "credit"), (2024, 1, "200", "debit"), (2024, 2, "900", "credit")],
+        "cust_new": [(2024, 3, "700", "credit"), (2024, 4, "100.25", "debit")],
+    }
+    for customer_id, rows in parsed.items():
+        expected[customer_id] += [
+            {"year": year, "month": month, "amount": Decimal(amount), "type": kind} for year, month, amount, kind in rows
+        ]
+    return {customer_id: reference_metrics(transactions) for customer_id, transactions in expected.items()}
+
+
+@pytest.fixture
+def statements(tmp_path):
+    directory = tmp_path / "statements"
+    directory.mkdir()
+    for customer_id, text in STATEMENTS.items():
+        (directory / f"{customer_id}.txt").write_text(text)
+    return directory
+
+
+@pytest.mark.parametrize("layout", ["json", "sharded"])
+def test_ingested_statements_survive_a_restart(tmp_path, monkeypatch, portfolio, statements, layout):
+    data_path = write_json_dataset(tmp_path / "transactions.json", portfolio)
+    if layout == "sharded":
+        data_path = convert_json_dataset(data_path, tmp_path / "dataset", num_shards=3)
+    monkeypatch.setattr(risk_store, "DATA_PATH", Path(data_path))
+    risk_store.unload()
+    expected = _expected(portfolio)
+
+    try:
+        report = ingest_statements(statements, workers=1)
+        for customer_id, metrics in expected.items():
+            assert_same_metrics(risk_store.get_customer_metrics(customer_id), metrics)
+    finally:
+        risk_store.unload()
+
+    assert report["totals"]["transactions"] == 5
+    assert report["totals"]["rejects"] == 1
+    if layout == "sharded":
+        assert read_manifest(data_path)["customers"] == len(portfolio) + 1
+
+    # A fresh process only sees what was written to the dataset.
+    script = (
+        "import json, sys\n"
+        "from pathlib import Path\n"
+        "from app.core import risk_store\n"
+        "risk_store.DATA_PATH = Path(sys.argv[1])\n"
+        "ids = sys.argv[2:]\n"
+        "print(json.dumps({c: risk_store.get_customer_metrics(c) for c in ids}, default=repr))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script, str(data_path), *STATEMENTS],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    fresh = json.loads(out.splitlines()[-1])
+    assert fresh == json.loads(json.dumps(expected, default=repr))
+
+
+@pytest.mark.parametrize("layout", ["json", "sharded"])
+def test_ingesting_the_same_statements_twice_changes_nothing(tmp_path, monkeypatch, portfolio, statements, layout):
+    data_path = write_json_dataset(tmp_path / "transactions.json", portfolio)
+    if layout == "sharded":
+        data_path = convert_json_dataset(data_path, tmp_path / "dataset", num_shards=3)
+    monkeypatch.setattr(risk_store, "DATA_PATH", Path(data_path))
+    risk_store.unload()
+    expected = _expected(portfolio)
+
+    try:
+        first = ingest_statements(statements, workers=1)
+        # A copy under another name is the same statement.
+        (statements / "2024").mkdir()
+        (statements / "2024" / "cust_new.txt").write_text(STATEMENTS["cust_new"])
+        second = ingest_statements(statements, workers=1)
+        for customer_id, metrics in expected.items():
+            assert_same_metrics(risk_store.get_customer_metrics(customer_id), metrics)
+    finally:
+        risk_store.unload()
+
+    assert first["totals"]["transactions"] == 5
+    assert first["totals"]["skipped"] == 0
+    assert second["totals"]["transactions"] == 0
+    assert second["totals"]["skipped"] == 3
+
+
+def test_append_transaction_rows_matches_recompute(risk_dataset, portfolio):
+    rng = random.Random(6)
+    updates, expected = [], {}
+    for customer_id in rng.sample(sorted(portfolio), 40):
+        new = random_transactions(rng, 3)
+        updates.append((customer_id, [encode_transaction(txn) for txn in new]))
+        expected[customer_id] = portfolio[customer_id] + new
+
+    applied = risk_store.append_transaction_rows(updates)
+
+    assert applied == sum(len(rows) for _, rows in updates)
+    records, found = risk_store.get_metrics_records(np.asarray(list(expected)))
+    assert found.all()
+    for record, (customer_id, transactions) in zip(records, expected.items()):
+        assert_same_metrics(metrics_record_to_dict(record), reference_metrics(transactions))
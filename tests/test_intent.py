@@ -0,0 +1,88 @@
+# tests/test_intent.py
+
+from decimal import Decimal
+
+import pytest
+
+from app.agent.intent import extract_intent
+
+
+@pytest.mark.parametrize("question, customer_id, amount", [
+    ("Is cust_001 eligible for a 5000 rupees loan?", "cust_001", "5000"),
+    ("Is cust_001 eligible for a rs 5000 loan?", "cust_001", "5000"),
+    ("Can cust_003 get a 5k loan?", "cust_003", "5000"),
+    ("Is cust_004 eligible for a loan of 2.5 lakh", "cust_004", "250000"),
+    ("cust_005 loan eligibility for ₹1,00,000?", "cust_005", "100000"),
+    ("Is cust_001 eligible for a loan of 10,00,000 rupees?", "cust_001", "1000000"),
+    ("Is cust_001 eligible for a loan of 1,000,000.50 rupees?", "cust_001", "1000000.50"),
+    ("Is cust_006 eligible for a loan for 5000/-?", "cust_006", "5000"),
+])
+def test_extracts_rupee_amounts(question, customer_id, amount):
+    assert extract_intent(question) == {"customer_id": customer_id, "loan_amount": Decimal(amount)}
+
+
+@pytest.mark.parametrize("question", [
+    "is CUST_002 eligible for Rs.5,000 loan",
+    "is Cust_002 eligible for Rs.5,000 loan",
+])
+def test_non_canonical_customer_ids_go_to_the_llm(question):
+    assert extract_intent(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Is cust_001 eligible for a 5000 usd loan?",
+    "Is cust_001 eligible for a 5000 dollar loan?",
+    "Is cust_001 eligible for a loan of 5000 EUR?",
+    "Is cust_001 eligible for a $5000 loan?",
+    "Is cust_001 eligible for a 5000usd loan?",
+    "Is cust_001 eligible for a £5k loan?",
+])
+def test_other_currencies_go_to_the_llm(question):
+    assert extract_intent(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Is cust_001 eligible for a loan of 5,00?",
+    "Is cust_001 eligible for a loan of 1,0,000?",
+    "Is cust_001 eligible for a loan of 50,00,00 rupees?",
+])
+def test_invalid_digit_grouping_goes_to_the_llm(question):
+    assert extract_intent(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Is cust_001 eligible for a loan in 2024?",
+    "Is cust_001 or cust_002 eligible for a 5000 loan?",
+    "Why is cust_001 not eligible for a 5000 loan?",
+    "Is cust_001 eligible for a 5000 or 10000 loan?",
+    "Is cust_001 eligible for a loan?",
+    "Isn't cust_001 eligible for a 5k loan?",
+])
+def test_ambiguous_questions_go_to_the_llm(question):
+    assert extract_intent(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Can cust_001 get a loan with a salary of 50000 rupees?",
+    "Is cust_001 eligible for a loan? They have 5000 rupees saved.",
+    "Is cust_001 eligible for a loan with an income of Rs 40000?",
+    "Is cust_001 eligible for a loan? Balance is 5000.",
+    "Is cust_001 eligible for a -5000 loan?",
+    "Is cust_001 eligible for a loan of -5000 rupees?",
+    "Is cust_001 eligible for a loan of +5000?",
+    "Is cust_001 eligible for a loan of 5000 paise?",
+    "Is cust_001 eligible for a 5000 rupees loan at 12% interest?",
+])
+def test_amounts_not_of_the_loan_go_to_the_llm(question):
+    assert extract_intent(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Is cust_001 eligible for a Rs 5000 home loan under the old policy?",
+    "Is cust_001 eligible for a Rs 5000 loan under the new policy?",
+    "Is cust_001 eligible for a personal loan of 5000 rupees?",
+    "Is cust_001 eligible for a 5000 rupees car loan?",
+    "Is cust_001 eligible for a loan of 5000 rupees with a tenure of 12?",
+])
+def test_qualifiers_the_answer_cannot_express_go_to_the_llm(question):
+    assert extract_intent(question) is None
@@ -0,0 +1,39 @@
+# tests/test_keyed_dirs.py
+
+import os
+import shutil
+
+from app.core import risk_store
+from app.core.dataset_index import default_index_dir, load_or_build_index
+
+from tests.conftest import write_json_dataset
+
+
+def test_saving_one_dataset_keeps_other_datasets_artifacts(tmp_path, monkeypatch, portfolio):
+    first = write_json_dataset(tmp_path / "first.json", portfolio)
+    second = tmp_path / "second.json"
+    shutil.copy(first, second)
+    snapshots = tmp_path / ".risk_snapshots"
+
+    def load(path):
+        monkeypatch.setattr(risk_store, "DATA_PATH", path)
+        risk_store.unload()
+        risk_store.load_and_precompute(use_snapshot=True)
+        load_or_build_index(path)
+
+    try:
+        load(first)
+        load(second)
+        assert len(os.listdir(snapshots)) == len(os.listdir(default_index_dir(first))) == 2
+
+        # A new version of `first` replaces only its own snapshot and index.
+        stat = first.stat()
+        os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        before = set(os.listdir(snapshots))
+        load(first)
+        after = set(os.listdir(snapshots))
+    finally:
+        risk_store.unload()
+
+    assert len(after) == len(os.listdir(default_index_dir(first))) == 2
+    assert len(before & after) == 1
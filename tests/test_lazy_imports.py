@@ -0,0 +1,34 @@
+# tests/test_lazy_imports.py
+
+# A bare `import app.agent.agent_handler` loads none of the heavy modules
+# (see LAZY_MODULES): each is imported on first use.
+
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from app.benchmarks.suite import _import_agent
+
+
+def test_agent_import_is_lazy():
+    probe = json.loads(_import_agent().stdout)
+    assert probe["loaded"] == []
+
+
+def test_metrics_server_serves_metrics(monkeypatch):
+    from app.core import instrumentation
+
+    monkeypatch.setattr(instrumentation, "ENABLED", instrumentation.ENABLED)
+    server = instrumentation.start_metrics_server(port=0)
+    try:
+        instrumentation.inc("lazy_import_test_total")
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urlopen(f"{base}/metrics") as response:
+            assert "lazy_import_test_total 1" in response.read().decode()
+        with pytest.raises(HTTPError):
+            urlopen(f"{base}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
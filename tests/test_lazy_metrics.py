@@ -0,0 +1,49 @@
+# tests/test_lazy_metrics.py
+
+import pytest
+
+from app.core import risk_store
+from app.core.dataset_index import default_index_dir
+from app.core.dataset_shards import convert_json_dataset
+from app.core.lazy_metrics import LazyMetricsStore
+
+from tests.conftest import assert_store_matches
+
+MAX_ENTRIES = 16
+
+
+@pytest.fixture(params=["json", "sharded"])
+def lazy_dataset(request, risk_dataset, tmp_path, monkeypatch):
+    path = risk_dataset
+    if request.param == "sharded":
+        path = convert_json_dataset(risk_dataset, tmp_path / "dataset", num_shards=3)
+        monkeypatch.setattr(risk_store, "DATA_PATH", path)
+    monkeypatch.setattr(risk_store, "LAZY_CACHE_ENTRIES", MAX_ENTRIES)
+    risk_store.unload()
+    return path
+
+
+def test_lazy_store_matches_decimal_path(lazy_dataset, portfolio):
+    store = risk_store.load_and_precompute(lazy=True)
+
+    assert isinstance(store, LazyMetricsStore)
+    assert risk_store.store_info()["source"] == "lazy"
+    assert sorted(store) == sorted(portfolio)
+    assert_store_matches(store, portfolio)
+    # Twice over the portfolio: the LRU stays within its budget.
+    assert_store_matches(store, portfolio)
+    assert store.stats()["size"] == MAX_ENTRIES
+
+
+def test_lazy_store_reuses_its_index(lazy_dataset, portfolio):
+    def index_files():
+        return {path: path.stat().st_mtime_ns for path in default_index_dir(lazy_dataset).rglob("*")}
+
+    risk_store.load_and_precompute(lazy=True)
+    built = index_files()
+    risk_store.unload()
+
+    store = risk_store.load_and_precompute(lazy=True)
+
+    assert built and index_files() == built
+    assert_store_matches(store, portfolio)
@@ -0,0 +1,42 @@
+# tests/test_loan_tools.py
+
+from app.tools.loan_tools import get_customer_loan_eligibility, get_customer_loan_eligibility_batch
+
+
+def test_batch_reports_malformed_requests_per_item(risk_dataset):
+    requests = [
+        {"customer_id": "cust_00001", "loan_amount": 5000},
+        {"customer_id": "cust_00002"},
+        {"customer_id": "cust_00003", "loan_amount": "five thousand"},
+        {"customer_id": "cust_unknown", "loan_amount": 5000},
+        {"customer_id": "cust_00004", "loan_amount": "NaN"},
+        {"loan_amount": 5000},
+        "cust_00005",
+        {"customer_id": "cust_00006", "loan_amount": 2500000},
+    ]
+
+    results = get_customer_loan_eligibility_batch(requests)
+
+    assert len(results) == len(requests)
+    for index in (1, 2, 4, 5, 6):
+        assert "error" in results[index] and "reason_code" not in results[index]
+    assert results[3] == {
+        "customer_id": "cust_unknown", "loan_amount": 5000, "eligible": False, "reason_code": "CUSTOMER_NOT_FOUND",
+    }
+    for index in (0, 7):
+        request = requests[index]
+        single = get_customer_loan_eligibility(request["customer_id"], request["loan_amount"])
+        assert results[index] == {**request, "eligible": single["eligible"], "reason_code": single["reason_code"]}
+
+
+def test_unknown_customer_is_reported_before_the_amount_is_checked(risk_dataset):
+    for amount in (None, "abc", "NaN", 5000):
+        assert get_customer_loan_eligibility("cust_unknown", amount) == {
+            "eligible": False, "reason_code": "CUSTOMER_NOT_FOUND",
+        }
+
+
+def test_invalid_amount_returns_an_error(risk_dataset):
+    for amount in (None, "abc", "NaN", "Infinity", True):
+        result = get_customer_loan_eligibility("cust_00001", amount)
+        assert set(result) == {"error"}
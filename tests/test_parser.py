@@ -0,0 +1,73 @@
+# tests/test_parser.py
+
+import io
+import random
+
+from app.ingestion.parser import BankStatementParser
+
+
+def _statement(seed: int, lines: int = 2000) -> str:
+    rng = random.Random(seed)
+    types = ["CREDIT", "Debit", "cr", "DR salary", "wdl", "UPI IN", "xfer out", "neft", "Cr Dr"]
+    amounts = ["1,234.50", "-500", "12", "1.2.3", "99999999.99", "0", ","]
+    out = []
+    for i in range(lines):
+        date = f"{rng.randint(0, 31):02d}-{rng.randint(0, 13):02d}-{rng.choice([2023, 2024, '0000'])}"
+        line = f"  {date}  {rng.choice(types)} {rng.choice(amounts)}  desc {i} \r"
+        roll = rng.random()
+        if roll < 0.05:
+            line = "Date Type Amount Description"
+        elif roll < 0.07:
+            line = f"{date} cr 10"
+        out.append(line)
+    return "\n".join(out) + "\n"
+
+
+def test_parse_stream_matches_parse_text():
+    text = _statement(1)
+    parser = BankStatementParser("cust_001")
+    expected = parser.parse_text(text)
+
+    rejects = []
+    streamed = BankStatementParser("cust_001")
+    got = list(streamed.parse_stream(io.StringIO(text, newline="\n"), on_reject=rejects.append))
+
+    assert got == expected
+    assert rejects == parser.rejects
+    assert streamed.rejected == parser.rejected == len(rejects) > 0
+
+
+def test_parse_stream_reports_rejects_by_line():
+    parser = BankStatementParser("cust_001")
+    rejects = []
+    lines = ["01-02-2024 CR 100 salary", "31-02-2024 CR 5 bad date", "01-02-2024 XX 5 bad type", "header"]
+
+    got = list(parser.parse_stream(lines, on_reject=rejects.append))
+
+    assert [txn["description"] for txn in got] == ["salary"]
+    assert [reject["line_number"] for reject in rejects] == [2, 3]
+    assert parser.rejected == 2
+
+
+def test_parse_text_sends_rejects_to_the_sink_without_printing(capsys):
+    parser = BankStatementParser("cust_001")
+    sink = []
+    parser.parse_text(_statement(2), on_reject=sink.append)
+
+    assert len(parser.rejects) > 1
+    assert sink == parser.rejects
+    assert capsys.readouterr().out == ""
+
+
+def test_subclass_date_pattern_is_used():
+    class SlashParser(BankStatementParser):
+        DATE_PATTERN = r"\d{2}/\d{2}/\d{4}"
+
+        def _format_date(self, date_str):
+            day, month, year = date_str.split("/")
+            return f"{year}-{month}-{day}"
+
+    got = SlashParser("cust_001").parse_text("01/02/2024 CR 100 salary\n01-02-2024 CR 5 other\n")
+
+    assert [(txn["date"], txn["description"]) for txn in got] == [("2024-02-01", "salary")]
+    assert BankStatementParser.TXN_PATTERN.match("01/02/2024 CR 100 salary") is None
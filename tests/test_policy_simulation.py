@@ -0,0 +1,62 @@
+# tests/test_policy_simulation.py
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.config.policy_config import POLICY_CONFIG
+from app.core import risk_store
+from app.core.policy_simulation import policy_variant, simulate_policies
+from app.core.rule_engine import REASON_CODES, evaluate_rule
+
+AMOUNTS = [Decimal("1000"), Decimal("500000"), Decimal("500000.01"), Decimal("2000000"), Decimal("2500000")]
+
+
+def _decide(metrics, policy, amount):
+    # First-fit rule in list order, as the rule engine defines it.
+    for rule in policy["loan_rules"]:
+        if amount <= rule["max_amount"]:
+            return evaluate_rule(metrics, rule)
+    return {"eligible": False, "reason_code": "LOAN_AMOUNT_EXCEEDS_POLICY_LIMIT"}
+
+
+def _random_policy(rng: random.Random):
+    limits = sorted(rng.sample([100_000, 500_000, 1_000_000, 2_000_000, 3_000_000], rng.randint(0, 4)))
+    rules = [
+        {
+            "max_amount": Decimal(limit),
+            "max_cv": Decimal(rng.choice(["0", "0.1", "0.25", "0.3501", "0.5", "2"])),
+            "require_positive_growth": rng.random() < 0.5,
+        }
+        for limit in limits
+    ]
+    if rng.random() < 0.3:
+        rules.reverse()
+    return {"loan_rules": rules}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_simulate_policies_matches_brute_force(risk_dataset, portfolio, seed):
+    rng = random.Random(seed)
+    candidates = {"random": _random_policy(rng), "tier 1 cv 0.20": policy_variant(POLICY_CONFIG, 1, max_cv=Decimal("0.20"))}
+    metrics = [risk_store.get_customer_metrics(customer_id) for customer_id in portfolio]
+
+    results = simulate_policies(candidates, AMOUNTS)
+
+    for name, policy in candidates.items():
+        for amount, result in zip(AMOUNTS, results[name]["amounts"]):
+            decisions = [_decide(m, policy, amount) for m in metrics]
+            baseline = [_decide(m, POLICY_CONFIG, amount) for m in metrics]
+            reasons = {code: 0 for code in REASON_CODES}
+            for decision in decisions:
+                reasons[decision["reason_code"]] += 1
+
+            assert result["reasons"] == reasons
+            assert result["approved"] == reasons["ELIGIBLE"]
+            assert result["diff"]["newly_approved"] == sum(
+                d["eligible"] and not b["eligible"] for d, b in zip(decisions, baseline)
+            )
+            assert result["diff"]["newly_rejected"] == sum(
+                b["eligible"] and not d["eligible"] for d, b in zip(decisions, baseline)
+            )
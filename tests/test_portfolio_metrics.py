@@ -0,0 +1,40 @@
+# tests/test_portfolio_metrics.py
+
+from app.analysis.financial_metrics import (
+    aggregate_portfolio_by_month,
+    compute_portfolio_metrics,
+    metrics_record_to_dict,
+)
+from app.core import risk_store
+from app.core.transaction_table import TransactionTableBuilder
+
+from tests.conftest import assert_same_metrics, reference_metrics
+
+
+def test_compute_portfolio_metrics_matches_decimal_path(portfolio):
+    builder = TransactionTableBuilder()
+    for customer_id, transactions in portfolio.items():
+        builder.add_customer(customer_id, transactions)
+    table = builder.build()
+
+    records = compute_portfolio_metrics(aggregate_portfolio_by_month(table))
+
+    assert len(records) == len(portfolio)
+    for record, (customer_id, transactions) in zip(records, portfolio.items()):
+        assert_same_metrics(metrics_record_to_dict(record), reference_metrics(transactions))
+
+
+def test_load_and_precompute_matches_decimal_path(risk_dataset, portfolio):
+    store = risk_store.load_and_precompute()
+
+    assert sorted(store) == sorted(portfolio)
+    for customer_id, transactions in portfolio.items():
+        assert_same_metrics(store[customer_id], reference_metrics(transactions))
+
+
+def test_load_is_serial_unless_workers_are_configured(risk_dataset, monkeypatch):
+    monkeypatch.setattr(risk_store, "PARALLEL_MIN_BYTES", 0)
+
+    risk_store.load_and_precompute()
+    assert risk_store.store_info()["source"] == "serial"
+    assert risk_store.reload().source == "serial"
@@ -0,0 +1,39 @@
+# tests/test_risk_store_concurrency.py
+
+import threading
+import time
+
+from app.core import risk_store
+
+THREADS = 16
+
+
+def test_concurrent_first_lookups_load_once(risk_dataset, monkeypatch):
+    loads = []
+    load = risk_store._load
+
+    def slow_load(*args, **kwargs):
+        loads.append(threading.get_ident())
+        # Keep the load open long enough for every thread to pile up on it.
+        time.sleep(0.2)
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(risk_store, "_load", slow_load)
+    barrier = threading.Barrier(THREADS)
+    stores = [None] * THREADS
+
+    def lookup(index):
+        barrier.wait()
+        risk_store.get_customer_metrics("cust_00001")
+        stores[index] = risk_store.current_snapshot().store
+
+    threads = [threading.Thread(target=lookup, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(store is stores[0] for store in stores)
+    assert stores[0] is risk_store.RISK_CACHE
+    assert risk_store.store_info()["loading"] is False
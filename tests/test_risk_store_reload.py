@@ -0,0 +1,59 @@
+# tests/test_risk_store_reload.py
+
+import gc
+from decimal import Decimal
+
+import pytest
+
+from app.core import risk_store
+
+from tests.conftest import assert_same_metrics, reference_metrics, write_json_dataset
+
+CUSTOMER = "cust_00001"
+
+
+def _changed_portfolio(portfolio):
+    changed = dict(portfolio)
+    changed[CUSTOMER] = portfolio[CUSTOMER] + [
+        {"year": 2030, "month": 1, "amount": Decimal("123.45"), "type": "debit_micro"},
+    ]
+    return changed
+
+
+def test_held_snapshot_keeps_serving_across_reload(risk_dataset, portfolio, tmp_path):
+    # Snapshots retired by earlier tests are only garbage by now.
+    gc.collect()
+    held = risk_store.current_snapshot()
+    before = held.get(CUSTOMER)
+    changed = _changed_portfolio(portfolio)
+    new_path = write_json_dataset(tmp_path / "changed.json", changed)
+
+    reloaded = risk_store.reload(new_path)
+
+    assert reloaded is risk_store.current_snapshot()
+    assert reloaded.generation == held.generation + 1
+    assert risk_store.DATA_PATH == new_path
+    assert_same_metrics(held.get(CUSTOMER), reference_metrics(portfolio[CUSTOMER]))
+    assert held.get(CUSTOMER) == before
+    assert_same_metrics(risk_store.get_customer_metrics(CUSTOMER), reference_metrics(changed[CUSTOMER]))
+    assert risk_store.store_info()["retired_in_use"] == 1
+
+    del held
+    gc.collect()
+    assert risk_store.store_info()["retired_in_use"] == 0
+
+
+def test_failed_reload_keeps_the_active_store(risk_dataset, tmp_path):
+    active = risk_store.current_snapshot()
+
+    with pytest.raises(OSError):
+        risk_store.reload(tmp_path / "missing.json")
+
+    assert risk_store.DATA_PATH == risk_dataset
+    assert risk_store.current_snapshot() is active
+    assert risk_store.store_info()["generation"] == active.generation
+
+    future = risk_store.reload_in_background(tmp_path / "missing.json")
+    assert isinstance(future.exception(timeout=10), OSError)
+    assert risk_store.DATA_PATH == risk_dataset
+    assert risk_store.current_snapshot() is active
@@ -0,0 +1,56 @@
+# tests/test_rule_engine.py
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.analysis.financial_metrics import DECIMAL_QUANTIZED, METRICS_DTYPE, metrics_record_to_dict
+from app.core.rule_engine import REASON_CODES, evaluate_loan_eligibility, evaluate_loan_eligibility_batch
+
+AMOUNTS = [
+    Decimal("0.01"), Decimal("1000"), Decimal("500000"), Decimal("500000.01"),
+    Decimal("1999999.99"), Decimal("2000000"), Decimal("2000000.01"), Decimal("9999999.99"),
+]
+
+
+def _records(count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    records = np.zeros(count, dtype=METRICS_DTYPE)
+    records["growth_e4"] = rng.integers(-3, 4, count) * rng.integers(0, 10_000, count)
+    # cv values around the policy limits (0.25 and 0.35) in steps of 0.0001.
+    records["cv_e4"] = rng.choice([0, 2499, 2500, 2501, 3499, 3500, 3501, 12_000], count)
+    records["growth_kind"] = records["cv_kind"] = DECIMAL_QUANTIZED
+    records["stability"] = rng.integers(0, 4, count)
+    records["fraud_flag"] = rng.random(count) < 0.1
+    records["loss_flag"] = rng.random(count) < 0.1
+    return records
+
+
+@pytest.mark.parametrize("amount_type", [Decimal, float, str])
+def test_batch_matches_single_evaluation(amount_type):
+    records = _records(500, seed=1)
+    amounts = [amount_type(str(amount)) if amount_type is not float else float(amount) for amount in AMOUNTS]
+
+    eligible, reasons = evaluate_loan_eligibility_batch(records[:, None], amounts)
+
+    for i, record in enumerate(records):
+        metrics = metrics_record_to_dict(record)
+        for j, amount in enumerate(AMOUNTS):
+            expected = evaluate_loan_eligibility(metrics, amount)
+            assert (bool(eligible[i, j]), REASON_CODES[reasons[i, j]]) == (
+                expected["eligible"], expected["reason_code"]
+            ), (metrics, amount)
+
+
+def test_batch_pairs_records_with_amounts():
+    records = _records(300, seed=2)
+    rng = random.Random(2)
+    amounts = [rng.choice(AMOUNTS) for _ in records]
+
+    eligible, reasons = evaluate_loan_eligibility_batch(records, amounts)
+
+    for record, amount, is_eligible, reason in zip(records, amounts, eligible, reasons):
+        expected = evaluate_loan_eligibility(metrics_record_to_dict(record), amount)
+        assert (bool(is_eligible), REASON_CODES[reason]) == (expected["eligible"], expected["reason_code"])
@@ -0,0 +1,61 @@
+# tests/test_shared_metrics.py
+
+import numpy as np
+import pytest
+
+from app.core import risk_store
+from app.core.shared_metrics import SharedMetricsStore
+
+from tests.conftest import assert_store_matches
+
+
+@pytest.fixture
+def published(risk_dataset):
+    risk_store.load_and_precompute()
+    owner = risk_store.publish_shared_store()
+    yield owner
+    owner.close()
+    try:
+        owner.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def test_attached_store_matches_decimal_path(published, portfolio):
+    attached = SharedMetricsStore.attach(published.name)
+    try:
+        assert not attached.owner
+        assert attached.version == published.version
+        assert sorted(attached) == sorted(portfolio)
+        assert_store_matches(attached, portfolio)
+    finally:
+        attached.close()
+
+
+def test_attached_views_are_read_only(published):
+    attached = SharedMetricsStore.attach(published.name)
+    try:
+        assert not any(view.flags.writeable for view in (attached.ids, attached.records, attached.slots))
+        with pytest.raises(ValueError):
+            attached.records[0] = np.zeros(1, dtype=attached.records.dtype)[0]
+    finally:
+        attached.close()
+
+
+def test_risk_store_serves_the_shared_segment(published, portfolio, monkeypatch):
+    monkeypatch.setattr(risk_store, "SHARED_STORE_NAME", published.name)
+    risk_store.unload()
+
+    store = risk_store.load_and_precompute()
+
+    assert risk_store.store_info()["source"] == "shared"
+    assert_store_matches(store, portfolio)
+    risk_store.unload()
+    store.close()
+
+
+def test_unlink_removes_the_segment(published):
+    published.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        SharedMetricsStore.attach(published.name)
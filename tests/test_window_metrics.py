@@ -0,0 +1,53 @@
+# tests/test_window_metrics.py
+
+import random
+
+import numpy as np
+import pytest
+
+from app.analysis.financial_metrics import metrics_record_to_dict
+from app.core import risk_store
+from app.core.transaction_table import month_key
+
+from tests.conftest import assert_same_metrics, reference_metrics
+
+
+def _in_window(transactions, start, end):
+    return [txn for txn in transactions if start <= month_key(txn["year"], txn["month"]) <= end]
+
+
+def _month_keys(transactions):
+    return sorted({month_key(txn["year"], txn["month"]) for txn in transactions})
+
+
+def test_window_metrics_match_brute_force(risk_dataset, portfolio):
+    rng = random.Random(9)
+    for customer_id, transactions in portfolio.items():
+        keys = _month_keys(transactions) or [month_key(2024, 1)]
+        for _ in range(10):
+            start = rng.randint(keys[0] - 2, keys[-1] + 1)
+            end = rng.randint(start - 1, keys[-1] + 2)
+            got = risk_store.get_window_metrics(customer_id, start=start, end=end)
+            assert_same_metrics(got, reference_metrics(_in_window(transactions, start, end)))
+
+
+@pytest.mark.parametrize("months", [1, 3, 6, 12])
+def test_trailing_windows_match_brute_force(risk_dataset, portfolio, months):
+    customer_ids = sorted(portfolio)
+    records, found = risk_store.get_window_metrics_records(np.asarray(customer_ids), months=months)
+
+    assert found.all()
+    for record, customer_id in zip(records, customer_ids):
+        transactions = portfolio[customer_id]
+        keys = _month_keys(transactions)
+        window = _in_window(transactions, keys[-1] - months + 1, keys[-1]) if keys else []
+        assert_same_metrics(metrics_record_to_dict(record), reference_metrics(window))
+
+
+def test_full_window_matches_stored_metrics(risk_dataset, portfolio):
+    for customer_id in portfolio:
+        assert_same_metrics(risk_store.get_window_metrics(customer_id), risk_store.get_customer_metrics(customer_id))
+
+
+def test_window_of_unknown_customer(risk_dataset):
+    assert risk_store.get_window_metrics("cust_missing", months=3) is None